@@ -0,0 +1,126 @@
+"""
+Pool of pre-provisioned Hedera accounts for AidLedger onboarding
+Creating an account and associating it with AidCoin takes two rounds of
+consensus, so a refill job creates them ahead of time and stores their
+keys encrypted. Registration then claims one with a single
+UPDATE ... FOR UPDATE SKIP LOCKED statement.
+"""
+
+import base64
+import hashlib
+import logging
+from typing import List, Optional
+
+from cryptography.fernet import Fernet
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from .hedera_service import hedera_service
+from .models import PooledAccount
+
+logger = logging.getLogger(__name__)
+
+REFILL_LOCK = 'accounts:refill'
+
+CLAIM_SQL = """
+    UPDATE {table} SET claimed_at = %s
+    WHERE id IN (
+        SELECT id FROM {table}
+        WHERE claimed_at IS NULL
+        ORDER BY id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING account_id
+"""
+
+
+def low_water_mark() -> int:
+    return getattr(settings, 'ACCOUNT_POOL_LOW_WATER', 20)
+
+
+def target_size() -> int:
+    return getattr(settings, 'ACCOUNT_POOL_TARGET', 50)
+
+
+def _fernet() -> Fernet:
+    key = getattr(settings, 'WALLET_ENCRYPTION_KEY', '')
+    if not key:
+        # Derived from SECRET_KEY when no dedicated key is configured
+        key = base64.urlsafe_b64encode(hashlib.sha256(settings.SECRET_KEY.encode()).digest())
+    return Fernet(key)
+
+
+def encrypt_key(private_key: str) -> str:
+    return _fernet().encrypt(private_key.encode()).decode()
+
+
+def decrypt_key(encrypted_key: str) -> str:
+    return _fernet().decrypt(encrypted_key.encode()).decode()
+
+
+def claim_accounts(count: int) -> List[str]:
+    """Check out up to count available accounts in one statement; concurrent claims never collide"""
+    with connection.cursor() as cursor:
+        cursor.execute(CLAIM_SQL.format(table=PooledAccount._meta.db_table), [timezone.now(), count])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def claim_account() -> Optional[str]:
+    """Check out one account; None when the pool is empty"""
+    claimed = claim_accounts(1)
+    return claimed[0] if claimed else None
+
+
+def provision_account(claimed: bool = False) -> PooledAccount:
+    """Create a token-associated account on Hedera and store it (slow: two consensus rounds)"""
+    account_id, private_key = hedera_service.create_token_account(
+        getattr(settings, 'ACCOUNT_INITIAL_BALANCE_HBAR', 1)
+    )
+    return PooledAccount.objects.create(
+        account_id=account_id,
+        encrypted_key=encrypt_key(private_key),
+        claimed_at=timezone.now() if claimed else None
+    )
+
+
+def checkout_account() -> str:
+    """Account for a new user: from the pool, or created on the spot if it has run dry"""
+    account_id = claim_account()
+    if account_id is None:
+        logger.warning("Account pool is empty; creating an account synchronously")
+        account_id = provision_account(claimed=True).account_id
+    return account_id
+
+
+def available_count() -> int:
+    return PooledAccount.objects.filter(claimed_at__isnull=True).count()
+
+
+def refill(low_water: Optional[int] = None, target: Optional[int] = None) -> int:
+    """Top the pool up to target once it has fallen below the low-water mark; returns accounts created"""
+    low_water = low_water_mark() if low_water is None else low_water
+    target = target_size() if target is None else target
+
+    available = available_count()
+    if available >= low_water:
+        return 0
+    # One refill at a time across workers
+    if not cache.add(REFILL_LOCK, True, 3600):
+        logger.info("Account pool refill already running")
+        return 0
+
+    created = 0
+    try:
+        for _ in range(target - available):
+            provision_account()
+            created += 1
+    except Exception as e:
+        logger.error(f"Account pool refill stopped after {created} accounts: {e}")
+    finally:
+        cache.delete(REFILL_LOCK)
+
+    logger.info(f"Added {created} accounts to the pool")
+    return created
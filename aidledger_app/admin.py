@@ -1,5 +1,85 @@
-from django.contrib import admin
-from .models import CustomUser, Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats
+import json
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from .models import (
+    CustomUser, Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats, RecurringDonation
+)
+from . import reverify, search
+
+
+def exact_count_limit() -> int:
+    return getattr(settings, 'ADMIN_EXACT_COUNT_LIMIT', 100000)
+
+
+def estimated_count(queryset) -> int:
+    """The planner's row estimate for a queryset, from EXPLAIN; no rows are read"""
+    plan = queryset.order_by().explain(format='json')
+    return int(json.loads(plan)[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts exactly while the planner expects fewer than ADMIN_EXACT_COUNT_LIMIT
+    rows, and shows its estimate beyond that instead of a COUNT(*) over
+    millions of rows
+    """
+    
+    @cached_property
+    def count(self):
+        if connection.vendor != 'postgresql':
+            return super().count
+        estimate = estimated_count(self.object_list)
+        if estimate < exact_count_limit():
+            return super().count
+        return estimate
+
+
+class LedgerAdminMixin:
+    """Changelists for the ledger tables: joined names, estimated counts and background re-verification"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    date_hierarchy = 'timestamp'
+    actions = ['reverify_on_mirror_node']
+    
+    @admin.action(description='Re-verify selected on the Mirror Node (in the background)')
+    def reverify_on_mirror_node(self, request, queryset):
+        job_id, count, truncated = reverify.start(queryset, request.user.pk)
+        message = f"Re-verifying {count} rows in the background (job {job_id}); the report appears here when done."
+        if truncated:
+            message += f" Only the first {count} selected rows were taken."
+        self.message_user(request, message, messages.INFO)
+    
+    def changelist_view(self, request, extra_context=None):
+        for report in reverify.pop_reports(request.user.pk):
+            if 'error' in report:
+                self.message_user(
+                    request, f"Re-verification job {report['job']} failed: {report['error']}", messages.ERROR
+                )
+                continue
+            level = messages.WARNING if report['mismatched'] or report['unreachable'] else messages.SUCCESS
+            summary = (
+                f"Re-verification job {report['job']} ({report['label']}): {report['verified']} verified, "
+                f"{report['mismatched']} mismatched, {report['unreachable']} unreachable, {report['queued']} queued"
+            )
+            if report['sample']:
+                summary += f". Mismatched: {', '.join(report['sample'])}"
+            self.message_user(request, summary, level)
+        return super().changelist_view(request, extra_context)
+
+
+class IndexedSearchMixin:
+    """Route admin search through the trigram/full-text indexes instead of icontains scans"""
+    
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if len(search_term) < search.MIN_QUERY_LENGTH:
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter_queryset(queryset, search_term), False
+
 
 
 @admin.register(CustomUser)
@@ -9,14 +89,14 @@ class CustomUserAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'phone_number']
 
 @admin.register(Donor)
-class DonorAdmin(admin.ModelAdmin):
+class DonorAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'wallet_id', 'total_donated', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'email', 'wallet_id']
     readonly_fields = ['created_at']
 
 @admin.register(NGO)
-class NGOAdmin(admin.ModelAdmin):
+class NGOAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'region', 'wallet_id', 'total_received', 'created_at']
     list_filter = ['region', 'created_at']
     search_fields = ['name', 'region', 'wallet_id']
@@ -24,7 +104,7 @@ class NGOAdmin(admin.ModelAdmin):
 
 
 @admin.register(Recipient)
-class RecipientAdmin(admin.ModelAdmin):
+class RecipientAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['name', 'location', 'wallet_id', 'created_at']
     list_filter = ['created_at']
     search_fields = ['name', 'location', 'wallet_id']
@@ -32,23 +112,34 @@ class RecipientAdmin(admin.ModelAdmin):
 
 
 @admin.register(Donation)
-class DonationAdmin(admin.ModelAdmin):
+class DonationAdmin(LedgerAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['donor', 'ngo', 'amount', 'status', 'timestamp']
-    list_filter = ['status', 'timestamp']
+    list_select_related = ['donor', 'ngo']
+    list_filter = ['status']
     search_fields = ['donor__name', 'ngo__name', 'txn_hash']
     readonly_fields = ['txn_hash', 'timestamp']
     raw_id_fields = ['donor', 'ngo']
 
 
 @admin.register(Distribution)
-class DistributionAdmin(admin.ModelAdmin):
+class DistributionAdmin(LedgerAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['ngo', 'recipient', 'amount', 'status', 'timestamp']
-    list_filter = ['status', 'timestamp']
+    list_select_related = ['ngo', 'recipient']
+    list_filter = ['status']
     search_fields = ['ngo__name', 'recipient__name', 'txn_hash']
     readonly_fields = ['txn_hash', 'timestamp']
     raw_id_fields = ['ngo', 'recipient']
 
 
+@admin.register(RecurringDonation)
+class RecurringDonationAdmin(admin.ModelAdmin):
+    list_display = ['donor', 'ngo', 'amount', 'interval', 'next_run_at', 'active']
+    list_filter = ['interval', 'active']
+    search_fields = ['donor__name', 'ngo__name']
+    readonly_fields = ['last_run_at', 'created_at']
+    raw_id_fields = ['donor', 'ngo']
+
+
 @admin.register(AidLedgerStats)
 class AidLedgerStatsAdmin(admin.ModelAdmin):
     list_display = [
@@ -0,0 +1,107 @@
+"""
+Admission control for Hedera write operations
+Caps how many ledger submissions a process runs at once and how many may
+queue behind them. When the network slows down, excess submissions are
+turned away at once with a Retry-After hint instead of piling up inside
+getReceipt and starving the workers that serve read-only pages.
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the moving average of submission latency
+LATENCY_SMOOTHING = 0.2
+
+
+class LedgerBusy(Exception):
+    """A ledger submission was refused because the queue is full"""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"The ledger is busy; retry in {retry_after} seconds")
+
+
+class AdmissionController:
+    """Counting gate with a bounded wait queue, shared by the threads of one process"""
+
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.latency = None
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_settings(cls) -> 'AdmissionController':
+        return cls(
+            getattr(settings, 'LEDGER_MAX_CONCURRENT_SUBMISSIONS', 8),
+            getattr(settings, 'LEDGER_MAX_QUEUED_SUBMISSIONS', 16),
+            getattr(settings, 'LEDGER_QUEUE_TIMEOUT', 5),
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, from observed latency"""
+        latency = self.latency or 1.0
+        backlog = self.active + self.waiting + 1
+        return max(1, math.ceil(latency * backlog / self.max_concurrent))
+
+    def _reject(self) -> LedgerBusy:
+        self.rejected += 1
+        retry_after = self.retry_after()
+        logger.warning(
+            f"Rejected ledger submission: {self.active} active, {self.waiting} queued, retry in {retry_after}s"
+        )
+        return LedgerBusy(retry_after)
+
+    @contextmanager
+    def slot(self):
+        """Hold one submission slot, waiting in the bounded queue if all are taken"""
+        with self._condition:
+            if self.active >= self.max_concurrent:
+                if self.waiting >= self.max_queued:
+                    raise self._reject()
+                self.waiting += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self.active < self.max_concurrent, self.queue_timeout
+                    )
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    raise self._reject()
+            self.active += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._condition:
+                self.active -= 1
+                self.latency = elapsed if self.latency is None else (
+                    LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * self.latency
+                )
+                self._condition.notify()
+
+
+ledger_admission = AdmissionController.from_settings()
+
+
+def admitted(method):
+    """Run a HederaService write operation inside an admission slot"""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with ledger_admission.slot():
+            return method(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,148 @@
+"""
+Fund-flow tracing for AidLedger
+Attributes each NGO distribution to the prior donations that funded it and
+stores the result as FundAllocation edges, so donor impact is an indexed lookup
+"""
+
+import logging
+from decimal import Decimal
+from typing import List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, QuerySet, Sum
+from django.utils.module_loading import import_string
+
+from .models import NGO, Donation, Distribution, FundAllocation
+
+logger = logging.getLogger(__name__)
+
+
+class AllocationPolicy:
+    """Decides which of an NGO's open donations a distribution draws from first"""
+
+    def order(self, donations: QuerySet) -> QuerySet:
+        raise NotImplementedError
+
+
+class FIFOPolicy(AllocationPolicy):
+    """Oldest donations are spent first"""
+
+    def order(self, donations: QuerySet) -> QuerySet:
+        return donations.order_by('timestamp', 'id')
+
+
+class LIFOPolicy(AllocationPolicy):
+    """Most recent donations are spent first"""
+
+    def order(self, donations: QuerySet) -> QuerySet:
+        return donations.order_by('-timestamp', '-id')
+
+
+def get_policy() -> AllocationPolicy:
+    """Load the configured allocation policy (FIFO by default)"""
+    path = getattr(settings, 'FUND_ALLOCATION_POLICY', 'aidledger_app.allocation.FIFOPolicy')
+    return import_string(path)()
+
+
+def allocate_distribution(distribution: Distribution, policy: AllocationPolicy) -> List[FundAllocation]:
+    """
+    Attribute one distribution to donations received by its NGO up to the
+    distribution's timestamp. Any unfunded remainder is left unattributed.
+    Must run inside a transaction that holds the NGO row lock.
+    """
+    remaining = distribution.amount
+    allocations, touched = [], []
+
+    open_donations = policy.order(
+        Donation.objects.filter(
+            ngo_id=distribution.ngo_id,
+            status='confirmed',
+            timestamp__lte=distribution.timestamp,
+            allocated_amount__lt=F('amount'),
+        )
+    ).select_for_update()
+
+    for donation in open_donations.iterator(chunk_size=100):
+        if remaining <= 0:
+            break
+        share = min(donation.amount - donation.allocated_amount, remaining)
+        donation.allocated_amount += share
+        remaining -= share
+        touched.append(donation)
+        allocations.append(FundAllocation(
+            donation=donation,
+            distribution=distribution,
+            donor_id=donation.donor_id,
+            recipient_id=distribution.recipient_id,
+            amount=share,
+        ))
+
+    Donation.objects.bulk_update(touched, ['allocated_amount'])
+    FundAllocation.objects.bulk_create(allocations)
+
+    distribution.allocated = True
+    distribution.save(update_fields=['allocated'])
+
+    if remaining > 0:
+        logger.warning(
+            f"Distribution {distribution.txn_hash} exceeds traced donations by {remaining} AID"
+        )
+    return allocations
+
+
+def allocate_pending(batch_size: int = 100) -> int:
+    """Trace every confirmed distribution not yet allocated, oldest first"""
+    policy = get_policy()
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            pending = list(
+                Distribution.objects
+                .filter(allocated=False, status='confirmed')
+                .order_by('id')
+                .select_for_update(skip_locked=True)[:batch_size]
+            )
+            if not pending:
+                break
+
+            # Serialize allocation per NGO so two workers never split one donation;
+            # every worker takes its NGO locks in pk order, so batches never deadlock
+            ngo_ids = sorted({distribution.ngo_id for distribution in pending})
+            list(NGO.objects.select_for_update().filter(pk__in=ngo_ids).order_by('pk').values_list('pk', flat=True))
+
+            for distribution in pending:
+                allocate_distribution(distribution, policy)
+            processed += len(pending)
+
+    if processed:
+        logger.info(f"Allocated {processed} distributions to donations")
+    return processed
+
+
+def donor_impact(donor_id: int) -> dict:
+    """Summarize which recipients a donor's money reached"""
+    recipients = list(
+        FundAllocation.objects
+        .filter(donor_id=donor_id)
+        .values('recipient_id', 'recipient__name', 'recipient__location')
+        .annotate(amount=Sum('amount'), distributions=Count('distribution', distinct=True))
+        .order_by('-amount')
+    )
+    traced = sum((row['amount'] for row in recipients), Decimal('0'))
+
+    return {
+        'donor_id': donor_id,
+        'traced_amount': traced,
+        'recipients': [
+            {
+                'recipient_id': row['recipient_id'],
+                'recipient_name': row['recipient__name'],
+                'location': row['recipient__location'],
+                'amount': row['amount'],
+                'distributions': row['distributions'],
+            }
+            for row in recipients
+        ],
+    }
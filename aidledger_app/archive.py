@@ -0,0 +1,224 @@
+"""
+Cold archive lookups for AidLedger
+Each archived month is a Parquet segment sorted by timestamp, written in
+small row groups, with two sidecar indexes of fixed-width big-endian
+records sorted bytewise:
+
+    <month>.txn.idx     blake2b-64(txn_hash), row
+    <month>.entity.idx  entity kind, entity id, timestamp (us), row
+
+Indexes are memory-mapped and binary searched, so a lookup only reads the
+row groups holding the matching rows. Rows come back as unsaved model
+instances that serialize and render exactly like live ones.
+"""
+
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .models import ArchivedPartition, Donation, Distribution, Donor, NGO, Recipient
+
+SEGMENT_ROW_GROUP_SIZE = 4096
+
+TXN_RECORD = struct.Struct('>8sI')
+ENTITY_RECORD = struct.Struct('>BQQI')
+ENTITY_KEY = struct.Struct('>BQ')
+
+# Entity column -> (kind stored in the entity index, model)
+ENTITY_COLUMNS = {
+    'donor_id': (1, Donor),
+    'ngo_id': (2, NGO),
+    'recipient_id': (3, Recipient),
+}
+
+ARCHIVED_TABLES = {
+    'donations': (Donation, ['donor_id', 'ngo_id']),
+    'distributions': (Distribution, ['ngo_id', 'recipient_id']),
+}
+
+
+def history_limit() -> int:
+    return getattr(settings, 'ARCHIVE_HISTORY_LIMIT', 1000)
+
+
+def txn_digest(txn_hash: str) -> bytes:
+    return hashlib.blake2b(txn_hash.encode(), digest_size=8).digest()
+
+
+def index_paths(segment: Path) -> Tuple[Path, Path]:
+    segment = Path(segment)
+    return segment.with_suffix('.txn.idx'), segment.with_suffix('.entity.idx')
+
+
+def _write_index(path: Path, record: struct.Struct, entries: List[tuple]) -> None:
+    partial = path.with_name(path.name + '.partial')
+    with open(partial, 'wb') as sink:
+        sink.write(b''.join(record.pack(*entry) for entry in sorted(entries)))
+        sink.flush()
+        os.fsync(sink.fileno())
+    os.replace(partial, path)
+
+
+def build_indexes(table: str, segment: Path, target: Optional[Path] = None) -> None:
+    """Write the txn_hash and entity indexes of a segment next to target (default: the segment)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    _, columns = ARCHIVED_TABLES[table]
+    data = pq.read_table(segment, columns=['txn_hash', 'timestamp', *columns], memory_map=True)
+    timestamps = data.column('timestamp').cast(pa.int64()).to_pylist()
+
+    txn_entries = [(txn_digest(txn_hash), row) for row, txn_hash in enumerate(data.column('txn_hash').to_pylist())]
+    entity_entries = []
+    for column in columns:
+        kind = ENTITY_COLUMNS[column][0]
+        for row, entity_id in enumerate(data.column(column).to_pylist()):
+            entity_entries.append((kind, entity_id, timestamps[row], row))
+
+    txn_path, entity_path = index_paths(target or segment)
+    _write_index(txn_path, TXN_RECORD, txn_entries)
+    _write_index(entity_path, ENTITY_RECORD, entity_entries)
+
+
+def _open_index(archive: ArchivedPartition, which: int):
+    """Memory-map one of a segment's indexes, building both first if an older archive lacks them"""
+    path = index_paths(archive.path)[which]
+    if not path.exists():
+        build_indexes(archive.table, Path(archive.path))
+    with open(path, 'rb') as source:
+        if os.fstat(source.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _lower_bound(index, record: struct.Struct, key: bytes) -> int:
+    """First record whose leading bytes are >= key"""
+    low, high = 0, len(index) // record.size
+    while low < high:
+        middle = (low + high) // 2
+        start = middle * record.size
+        if index[start:start + len(key)] < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _matching(index, record: struct.Struct, key: bytes) -> List[tuple]:
+    """Records whose leading bytes equal key, in index order"""
+    matches = []
+    position = _lower_bound(index, record, key) * record.size
+    while index[position:position + len(key)] == key:
+        matches.append(record.unpack_from(index, position))
+        position += record.size
+    return matches
+
+
+def _read_rows(segment: str, rows: List[int]) -> List[dict]:
+    """Rows of a segment by position, in the order asked for, decoding only their row groups"""
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(segment, memory_map=True)
+    starts = [0]
+    for group in range(parquet.metadata.num_row_groups - 1):
+        starts.append(starts[-1] + parquet.metadata.row_group(group).num_rows)
+
+    wanted = defaultdict(list)
+    for row in rows:
+        wanted[bisect.bisect_right(starts, row) - 1].append(row)
+
+    found = {}
+    for group, group_rows in wanted.items():
+        chunk = parquet.read_row_group(group).take([row - starts[group] for row in group_rows]).to_pylist()
+        found.update(zip(group_rows, chunk))
+    return [found[row] for row in rows]
+
+
+def _instances(table: str, rows: List[dict]) -> list:
+    """Unsaved model instances for archived rows, with their related entities fetched in bulk"""
+    model, columns = ARCHIVED_TABLES[table]
+    related = {
+        column: ENTITY_COLUMNS[column][1].objects.in_bulk({row[column] for row in rows})
+        for column in columns
+    }
+    instances = []
+    for row in rows:
+        instance = model(**row)
+        for column in columns:
+            entity = related[column].get(row[column])
+            if entity is not None:
+                setattr(instance, column[:-len('_id')], entity)
+        instance.archived = True
+        instances.append(instance)
+    return instances
+
+
+def find_transaction(txn_hash: str) -> Optional[Tuple[str, object]]:
+    """(table, instance) for an archived row with this txn_hash, newest archive first"""
+    digest = txn_digest(txn_hash)
+    for archive in ArchivedPartition.objects.order_by('-month', 'table'):
+        index = _open_index(archive, 0)
+        if index is None:
+            continue
+        with index:
+            candidates = [row for _, row in _matching(index, TXN_RECORD, digest)]
+        if not candidates:
+            continue
+        # Distinct hashes can share a 64-bit digest; the row itself settles it
+        for row in _read_rows(archive.path, candidates):
+            if row['txn_hash'] == txn_hash:
+                return archive.table, _instances(archive.table, [row])[0]
+    return None
+
+
+def _entity_key(column: str, entity_id: int) -> bytes:
+    return ENTITY_KEY.pack(ENTITY_COLUMNS[column][0], entity_id)
+
+
+def entity_history(table: str, filters: Dict[str, int], limit: Optional[int] = None) -> list:
+    """
+    Archived rows matching every column in filters, newest first. The
+    first filter is looked up in the entity index; the rest are checked
+    on the rows it finds.
+    """
+    limit = history_limit() if limit is None else limit
+    key = _entity_key(*next(iter(filters.items())))
+
+    history = []
+    for archive in ArchivedPartition.objects.filter(table=table).order_by('-month'):
+        if len(history) >= limit:
+            break
+        index = _open_index(archive, 1)
+        if index is None:
+            continue
+        with index:
+            rows = [row for *_, row in reversed(_matching(index, ENTITY_RECORD, key))]
+        if len(filters) == 1:
+            rows = rows[:limit - len(history)]
+        matches = [
+            row for row in _read_rows(archive.path, rows)
+            if all(row[name] == value for name, value in filters.items())
+        ]
+        history.extend(matches[:limit - len(history)])
+    # Related entities for every segment in one query per column
+    return _instances(table, history)
+
+
+def entity_count(table: str, column: str, entity_id: int) -> int:
+    """How many archived rows reference an entity, counted from the indexes alone"""
+    key = _entity_key(column, entity_id)
+    count = 0
+    for archive in ArchivedPartition.objects.filter(table=table):
+        index = _open_index(archive, 1)
+        if index is None:
+            continue
+        with index:
+            count += len(_matching(index, ENTITY_RECORD, key))
+    return count
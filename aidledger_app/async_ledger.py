@@ -0,0 +1,166 @@
+"""
+Async ledger client for AidLedger's ASGI endpoints
+Mirror Node reads use a pooled httpx.AsyncClient, and HCS submissions hand
+off only the brief node submission to a thread then await consensus by
+polling the Mirror Node, so a waiting request holds a coroutine, not a thread
+"""
+
+import asyncio
+import logging
+import weakref
+from decimal import Decimal
+from typing import Any, Dict
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .circuit import MIRROR_READ, CircuitOpen, breakers
+from .hedera_service import hedera_service
+
+logger = logging.getLogger(__name__)
+
+TINYBARS_PER_HBAR = Decimal(100000000)
+
+# One pooled client per event loop; a client cannot be shared across loops
+_clients = weakref.WeakKeyDictionary()
+
+
+class LedgerTimeout(Exception):
+    """Consensus was not observed on the Mirror Node in time"""
+
+
+class LedgerRejected(Exception):
+    """The network reached consensus on a failed transaction"""
+
+
+def mirror_url() -> str:
+    return settings.HEDERA_CONFIG.get('MIRROR_NODE_URL', 'https://testnet.mirrornode.hedera.com').rstrip('/')
+
+
+def consensus_timeout() -> float:
+    return getattr(settings, 'LEDGER_CONSENSUS_TIMEOUT', 30)
+
+
+def mirror_transaction_id(txn_hash: str) -> str:
+    """Convert an SDK id (0.0.2@1700000000.123456789) to the Mirror Node's 0.0.2-1700000000-123456789"""
+    if '@' not in txn_hash:
+        return txn_hash
+    account, valid_start = txn_hash.split('@', 1)
+    return f"{account}-{valid_start.replace('.', '-')}"
+
+
+def get_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=mirror_url(),
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+        )
+        _clients[loop] = client
+    return client
+
+
+async def mirror_get(path: str) -> httpx.Response:
+    """GET from the Mirror Node through the mirror-read circuit breaker"""
+    breaker = breakers[MIRROR_READ]
+    # May run the blocking health probe when the circuit is ready to close
+    await sync_to_async(breaker.before_call, thread_sensitive=False)()
+    try:
+        response = await get_client().get(path)
+    except httpx.HTTPError:
+        breaker.record(failed=True)
+        raise
+    breaker.record(failed=response.status_code >= 500)
+    return response
+
+
+async def verify_transaction(txn_hash: str) -> Dict[str, Any]:
+    """Look a transaction up on the Mirror Node"""
+    try:
+        response = await mirror_get(f"/api/v1/transactions/{mirror_transaction_id(txn_hash)}")
+        if response.status_code == 200:
+            return response.json()
+        return {"error": "Transaction not found", "status_code": response.status_code}
+    except CircuitOpen as e:
+        return {"error": str(e), "retry_after": e.retry_after}
+    except Exception as e:
+        logger.error(f"Failed to verify transaction: {e}")
+        return {"error": str(e)}
+
+
+async def get_account_balance(wallet_id: str) -> Dict[str, Any]:
+    """HBAR and token balances for a wallet, from the Mirror Node or the last known balance"""
+    cache_key = f"hedera:balance:{wallet_id}"
+    try:
+        response = await mirror_get(f"/api/v1/accounts/{wallet_id}")
+        response.raise_for_status()
+        balance = response.json().get('balance') or {}
+        result = {
+            "wallet_id": wallet_id,
+            "hbar_balance": f"{Decimal(balance.get('balance', 0)) / TINYBARS_PER_HBAR} ℏ",
+            "token_balances": [
+                {"token_id": token['token_id'], "balance": token['balance']}
+                for token in balance.get('tokens', [])
+            ]
+        }
+        await cache.aset(cache_key, result, getattr(settings, 'HEDERA_BALANCE_CACHE_SECONDS', 86400))
+        return result
+    except Exception as e:
+        cached = await cache.aget(cache_key)
+        if cached is not None:
+            logger.warning(f"Serving cached balance for {wallet_id}: {e}")
+            return {**cached, "stale": True}
+        logger.error(f"Failed to get account balance: {e}")
+        raise
+
+
+async def wait_for_consensus(txn_hash: str) -> Dict[str, Any]:
+    """Poll the Mirror Node with backoff until the transaction's result is known"""
+    path = f"/api/v1/transactions/{mirror_transaction_id(txn_hash)}"
+    deadline = asyncio.get_running_loop().time() + consensus_timeout()
+    delay = 0.5
+
+    while True:
+        try:
+            response = await mirror_get(path)
+        except CircuitOpen:
+            # The message is already submitted; keep waiting out the Mirror Node outage
+            response = None
+        if response is None:
+            pass
+        elif response.status_code == 200:
+            transactions = response.json().get('transactions') or []
+            if transactions:
+                result = transactions[0].get('result')
+                if result != 'SUCCESS':
+                    raise LedgerRejected(f"Transaction {txn_hash} failed with {result}")
+                return transactions[0]
+        elif response.status_code != 404:
+            response.raise_for_status()
+
+        if asyncio.get_running_loop().time() + delay > deadline:
+            raise LedgerTimeout(f"Transaction {txn_hash} not seen on the Mirror Node in time")
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, 3.0)
+
+
+async def log_donation(donor_name: str, ngo_name: str, amount: float) -> str:
+    """Submit a donation message and await its consensus without holding a thread"""
+    txn_hash = await sync_to_async(hedera_service.log_donation_to_hcs, thread_sensitive=False)(
+        donor_name, ngo_name, amount, wait_for_receipt=False
+    )
+    await wait_for_consensus(txn_hash)
+    return txn_hash
+
+
+async def log_distribution(ngo_name: str, recipient_name: str, amount: float) -> str:
+    """Submit a distribution message and await its consensus without holding a thread"""
+    txn_hash = await sync_to_async(hedera_service.log_distribution_to_hcs, thread_sensitive=False)(
+        ngo_name, recipient_name, amount, wait_for_receipt=False
+    )
+    await wait_for_consensus(txn_hash)
+    return txn_hash
@@ -0,0 +1,117 @@
+"""
+Caching for AidLedger's public pages and API
+Keeps the dashboard fragments (recent donations, recent distributions and
+stats) in the cache and invalidates them only when a new event is confirmed,
+and tracks per-resource versions for conditional list responses
+"""
+
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Donation, Distribution, AidLedgerStats, ResourceVersion
+
+logger = logging.getLogger(__name__)
+
+RECENT_LIMIT = 10
+
+DASHBOARD_RECENT_DONATIONS = 'dashboard:recent_donations'
+DASHBOARD_RECENT_DISTRIBUTIONS = 'dashboard:recent_distributions'
+DASHBOARD_STATS = 'dashboard:stats'
+DASHBOARD_LAST_MODIFIED = 'dashboard:last_modified'
+
+# Fragments affected by each kind of change
+DASHBOARD_FRAGMENTS = {
+    'donation': [DASHBOARD_RECENT_DONATIONS, DASHBOARD_STATS],
+    'distribution': [DASHBOARD_RECENT_DISTRIBUTIONS, DASHBOARD_STATS],
+    'stats': [DASHBOARD_STATS],
+    'entity': [DASHBOARD_RECENT_DONATIONS, DASHBOARD_RECENT_DISTRIBUTIONS],
+}
+
+
+def dashboard_timeout() -> int:
+    return getattr(settings, 'DASHBOARD_CACHE_SECONDS', 300)
+
+
+def recent_donations() -> List[dict]:
+    """Latest donations with donor/NGO names joined in a single query"""
+    return cache.get_or_set(DASHBOARD_RECENT_DONATIONS, lambda: list(
+        Donation.objects.order_by('-timestamp').values(
+            'amount', 'txn_hash', 'timestamp', donor_name=F('donor__name'), ngo_name=F('ngo__name')
+        )[:RECENT_LIMIT]
+    ), dashboard_timeout())
+
+
+def recent_distributions() -> List[dict]:
+    """Latest distributions with NGO/recipient names joined in a single query"""
+    return cache.get_or_set(DASHBOARD_RECENT_DISTRIBUTIONS, lambda: list(
+        Distribution.objects.order_by('-timestamp').values(
+            'amount', 'txn_hash', 'timestamp', ngo_name=F('ngo__name'), recipient_name=F('recipient__name')
+        )[:RECENT_LIMIT]
+    ), dashboard_timeout())
+
+
+def dashboard_stats() -> Optional[dict]:
+    """The stats row as a dict; an empty dict when none exists yet"""
+    return cache.get_or_set(DASHBOARD_STATS, lambda: AidLedgerStats.objects.values(
+        'total_donations', 'total_distributions', 'total_donors', 'total_ngos', 'total_recipients'
+    ).first() or {}, dashboard_timeout())
+
+
+def dashboard_last_modified(request=None) -> datetime:
+    """When any dashboard fragment last changed (seeded on first use)"""
+    last_modified = cache.get(DASHBOARD_LAST_MODIFIED)
+    if last_modified is None:
+        last_modified = timezone.now()
+        cache.add(DASHBOARD_LAST_MODIFIED, last_modified, None)
+        last_modified = cache.get(DASHBOARD_LAST_MODIFIED, last_modified)
+    return last_modified
+
+
+def dashboard_etag(request) -> str:
+    """ETag over the content version and who is looking (the navbar is per-user)"""
+    viewer = request.user.pk if request.user.is_authenticated else 'anonymous'
+    version = f"{dashboard_last_modified().isoformat()}:{viewer}"
+    return hashlib.md5(version.encode()).hexdigest()
+
+
+def dashboard_page_key(request) -> str:
+    return f"dashboard:page:{dashboard_etag(request)}"
+
+
+def invalidate_dashboard(change: str) -> None:
+    """Drop the fragments touched by a change and move Last-Modified forward"""
+    cache.delete_many(DASHBOARD_FRAGMENTS[change])
+    cache.set(DASHBOARD_LAST_MODIFIED, timezone.now(), None)
+    logger.debug(f"Invalidated dashboard fragments for {change}")
+
+
+def list_cache_timeout() -> int:
+    return getattr(settings, 'API_LIST_CACHE_SECONDS', 300)
+
+
+def resource_versions(resources: Iterable[str]) -> Dict[str, int]:
+    """Current version of each resource in one query (0 if never written)"""
+    resources = list(resources)
+    versions = dict(
+        ResourceVersion.objects.filter(resource__in=resources).values_list('resource', 'version')
+    )
+    return {resource: versions.get(resource, 0) for resource in resources}
+
+
+def bump_version(resource: str) -> None:
+    """Advance a resource's change counter; cached pages keyed on the old one go stale"""
+    if ResourceVersion.objects.filter(resource=resource).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ResourceVersion.objects.create(resource=resource, version=1)
+    except IntegrityError:
+        ResourceVersion.objects.filter(resource=resource).update(version=F('version') + 1)
@@ -0,0 +1,193 @@
+"""
+Circuit breakers for the Hedera integration
+One breaker per operation class tracks the failure rate over a rolling
+window. When it trips, calls fail at once with CircuitOpen instead of
+waiting out the SDK or HTTP timeout. After a cool-down a health probe is
+run; if it passes the breaker closes again, otherwise it stays open for
+another cool-down.
+"""
+
+import functools
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple, Type
+
+from django.conf import settings
+
+from .admission import LedgerBusy
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+HCS_SUBMIT = 'hcs_submit'
+TOKEN_TRANSFER = 'token_transfer'
+BALANCE_QUERY = 'balance_query'
+MIRROR_READ = 'mirror_read'
+OPERATION_CLASSES = [HCS_SUBMIT, TOKEN_TRANSFER, BALANCE_QUERY, MIRROR_READ]
+
+
+class CircuitOpen(Exception):
+    """The operation class is failing; the call was not attempted"""
+
+    def __init__(self, name: str, retry_after: int):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Hedera {name} is unavailable; retry in {retry_after} seconds")
+
+
+class CircuitBreaker:
+    """Failure-rate breaker over a rolling window of one-second buckets"""
+
+    def __init__(self, name: str, window_seconds: int = 30, min_calls: int = 10,
+                 failure_rate: float = 0.5, open_seconds: float = 15,
+                 ignore: Tuple[Type[Exception], ...] = ()):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.ignore = ignore
+        self.state = CLOSED
+        self.opened_at = None
+        self.probe = None
+        self._buckets = deque()  # [second, calls, failures]
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: float) -> list:
+        second = int(now)
+        while self._buckets and self._buckets[0][0] <= second - self.window_seconds:
+            self._buckets.popleft()
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        return self._buckets[-1]
+
+    def stats(self) -> Tuple[int, int]:
+        """(calls, failures) within the rolling window"""
+        with self._lock:
+            self._bucket(time.monotonic())
+            return sum(b[1] for b in self._buckets), sum(b[2] for b in self._buckets)
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 1
+        return max(1, math.ceil(self.opened_at + self.open_seconds - time.monotonic()))
+
+    def _trip(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self._buckets.clear()
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds}s")
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self.opened_at = None
+        self._buckets.clear()
+        logger.info(f"Circuit {self.name} closed")
+
+    def before_call(self) -> None:
+        """Fail fast while open; once the cool-down is over, let one caller probe"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN or time.monotonic() < self.opened_at + self.open_seconds:
+                raise CircuitOpen(self.name, self.retry_after())
+            self.state = HALF_OPEN
+
+        # This caller is the only one let through; check health before the real call
+        if self.probe is not None:
+            try:
+                self.probe()
+            except Exception as e:
+                logger.warning(f"Health probe for {self.name} failed: {e}")
+                with self._lock:
+                    self._trip(time.monotonic())
+                raise CircuitOpen(self.name, self.retry_after())
+            with self._lock:
+                self._close()
+
+    def record(self, failed: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._trip(now)
+                else:
+                    self._close()
+                return
+            if self.state == OPEN:
+                return
+
+            bucket = self._bucket(now)
+            bucket[1] += 1
+            bucket[2] += int(failed)
+            calls = sum(b[1] for b in self._buckets)
+            failures = sum(b[2] for b in self._buckets)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._trip(now)
+
+    def _release_trial(self) -> None:
+        """A half-open trial that proved nothing hands the trial to the next caller"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+
+    def call(self, func: Callable, *args, **kwargs):
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.ignore:
+            self._release_trial()
+            raise
+        except Exception:
+            self.record(failed=True)
+            raise
+        self.record(failed=False)
+        return result
+
+    def status(self) -> Dict[str, object]:
+        calls, failures = self.stats()
+        return {
+            'state': self.state,
+            'calls': calls,
+            'failures': failures,
+            'retry_after': self.retry_after() if self.state != CLOSED else None,
+        }
+
+
+def _build_breakers() -> Dict[str, CircuitBreaker]:
+    options = {
+        'window_seconds': getattr(settings, 'HEDERA_BREAKER_WINDOW_SECONDS', 30),
+        'min_calls': getattr(settings, 'HEDERA_BREAKER_MIN_CALLS', 10),
+        'failure_rate': getattr(settings, 'HEDERA_BREAKER_FAILURE_RATE', 0.5),
+        'open_seconds': getattr(settings, 'HEDERA_BREAKER_OPEN_SECONDS', 15),
+        # Submissions refused by admission control say nothing about Hedera's health
+        'ignore': (LedgerBusy,),
+    }
+    return {name: CircuitBreaker(name, **options) for name in OPERATION_CLASSES}
+
+
+breakers = _build_breakers()
+
+
+def set_probe(name: str, probe: Optional[Callable[[], object]]) -> None:
+    breakers[name].probe = probe
+
+
+def guarded(name: str):
+    """Run a HederaService operation through its class's circuit breaker"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return breakers[name].call(method, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def health() -> Dict[str, Dict[str, object]]:
+    return {name: breaker.status() for name, breaker in breakers.items()}
@@ -0,0 +1,57 @@
+"""
+Confirmation order of ledger rows
+A database trigger stamps every row, when it first becomes confirmed, with
+a confirmation number and the id of the transaction that confirmed it
+(migrations 0015 and 0021). Numbers are drawn when the row is written, not
+when its transaction commits, so a reader that takes "everything past the
+last number it saw" steps over a row whose transaction commits late.
+Consumers that follow the ledger instead read below the settled horizon:
+the oldest transaction still in flight. Every row confirmed by an earlier
+transaction has committed and no new one can appear there, so a cursor of
+(transaction, number) moved only past rows actually read never skips one.
+"""
+
+from typing import Optional, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+Position = Tuple[int, int]
+
+START = (0, 0)
+
+# The oldest transaction still open, or failing that the next one after the
+# last to finish. This session's own transaction counts as open too unless
+# it is that next one; either way its rows are visible to it.
+HORIZON_SQL = """
+SELECT COALESCE(
+    (SELECT MIN(xid::text::bigint) FROM pg_snapshot_xip(snapshot) AS xid),
+    pg_snapshot_xmax(snapshot)::text::bigint
+), pg_current_xact_id_if_assigned()::text::bigint
+FROM pg_current_snapshot() AS snapshot
+"""
+
+
+def settled_horizon(using: str = DEFAULT_DB_ALIAS) -> int:
+    """Transaction id below which every confirmation has committed"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(HORIZON_SQL)
+        horizon, own = cursor.fetchone()
+    return horizon + 1 if own == horizon else horizon
+
+
+def settled(queryset, horizon: Optional[int] = None):
+    """Confirmed rows of a ledger queryset that are below the settled horizon"""
+    if horizon is None:
+        horizon = settled_horizon(queryset.db)
+    return queryset.filter(status='confirmed', confirmed_xid__lt=horizon)
+
+
+def settled_after(queryset, position: Position = START):
+    """Settled rows past a position, in confirmation order"""
+    xid, seq = position
+    return (
+        settled(queryset)
+        .filter(Q(confirmed_xid__gt=xid) | Q(confirmed_xid=xid, confirmed_seq__gt=seq))
+        .order_by('confirmed_xid', 'confirmed_seq')
+    )
@@ -0,0 +1,95 @@
+"""
+Per-user dashboard data for AidLedger
+Loads everything user_dashboard renders in a fixed number of queries: the
+profile and its role in one, each recent-activity list with the related
+names joined in, and the per-user counts from a small cache entry that is
+dropped whenever a ledger row of that donor or NGO is written.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import archive
+from .caching import RECENT_LIMIT
+from .models import CustomUser, Donation, Distribution
+
+logger = logging.getLogger(__name__)
+
+USER_AGGREGATES_KEY = 'dashboard:user:{role}:{pk}'
+
+
+def aggregates_timeout() -> int:
+    return getattr(settings, 'USER_AGGREGATES_CACHE_SECONDS', 3600)
+
+
+def load_profile(user) -> Tuple[str, Any]:
+    """
+    (role, Donor or NGO) for a user from a single joined query. Raises
+    CustomUser.DoesNotExist, or the profile model's DoesNotExist when the
+    role has no profile row.
+    """
+    custom_user = CustomUser.objects.select_related('user__donor', 'user__ngo').get(user=user)
+    role = custom_user.user_type
+    if role not in ('donor', 'ngo'):
+        return role, None
+    return role, getattr(custom_user.user, role)
+
+
+def recent_history(queryset, table: str, filters: Dict[str, int], count: int = RECENT_LIMIT) -> list:
+    """An entity's newest count rows, topped up from the cold archive once live ones run out"""
+    rows = list(queryset.filter(**filters).order_by('-timestamp')[:count])
+    if len(rows) < count:
+        rows.extend(archive.entity_history(table, filters, count - len(rows)))
+    return rows
+
+
+def _row_count(model, table: str, column: str, pk: int) -> int:
+    """Live and archived rows referencing an entity"""
+    return model.objects.filter(**{column: pk}).count() + archive.entity_count(table, column, pk)
+
+
+def user_aggregates(role: str, pk: int) -> Dict[str, int]:
+    """Lifetime transaction counts for a donor or NGO, cached until its next ledger write"""
+    def compute():
+        if role == 'donor':
+            return {'donation_count': _row_count(Donation, 'donations', 'donor_id', pk)}
+        return {
+            'donation_count': _row_count(Donation, 'donations', 'ngo_id', pk),
+            'distribution_count': _row_count(Distribution, 'distributions', 'ngo_id', pk),
+        }
+    return cache.get_or_set(USER_AGGREGATES_KEY.format(role=role, pk=pk), compute, aggregates_timeout())
+
+
+def invalidate_user_aggregates(donor_ids: Iterable[int] = (), ngo_ids: Iterable[int] = ()) -> None:
+    keys = [USER_AGGREGATES_KEY.format(role='donor', pk=pk) for pk in set(donor_ids)]
+    keys += [USER_AGGREGATES_KEY.format(role='ngo', pk=pk) for pk in set(ngo_ids)]
+    if keys:
+        cache.delete_many(keys)
+
+
+def load_user_dashboard(user) -> Dict[str, Any]:
+    """Template context for a user's dashboard, minus the wallet balance"""
+    role, profile = load_profile(user)
+    if profile is None:
+        return {'user_type': role}
+
+    context = {
+        'profile': profile,
+        'user_type': role,
+        'aggregates': user_aggregates(role, profile.pk),
+    }
+    if role == 'donor':
+        context['donations'] = recent_history(
+            Donation.objects.select_related('ngo'), 'donations', {'donor_id': profile.pk}
+        )
+    else:
+        context['donations'] = recent_history(
+            Donation.objects.select_related('donor'), 'donations', {'ngo_id': profile.pk}
+        )
+        context['distributions'] = recent_history(
+            Distribution.objects.select_related('recipient'), 'distributions', {'ngo_id': profile.pk}
+        )
+    return context
@@ -0,0 +1,102 @@
+"""
+Request-scoped identity map for Donor, NGO and Recipient
+Each request gets a map, held in a context variable by middleware, of the
+entities already fetched, keyed by model and primary key. Serializer
+validation and the view then share one instance per row, and prefetch()
+resolves any number of ids of one model with a single IN query. Misses are
+remembered too. Outside a request scope every lookup goes to the database.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional
+
+from django.utils.decorators import sync_and_async_middleware
+
+_identity_map = ContextVar('entity_identity_map', default=None)
+
+
+class IdentityMap:
+    """Fetched instances by model and pk; None marks ids known not to exist"""
+
+    def __init__(self):
+        self._rows = {}
+
+    def _missing(self, model, ids: Iterable[int]):
+        rows = self._rows.setdefault(model, {})
+        return rows, {pk for pk in ids if pk not in rows}
+
+    def _store(self, rows, missing, found) -> None:
+        for pk in missing:
+            rows[pk] = found.get(pk)
+
+    def prefetch(self, model, ids: Iterable[int]) -> Dict[int, object]:
+        """Instances for ids, fetching the ones not yet seen in one query"""
+        ids = set(ids)
+        rows, missing = self._missing(model, ids)
+        if missing:
+            self._store(rows, missing, model.objects.in_bulk(missing))
+        return {pk: rows[pk] for pk in ids if rows[pk] is not None}
+
+    async def aprefetch(self, model, ids: Iterable[int]) -> Dict[int, object]:
+        ids = set(ids)
+        rows, missing = self._missing(model, ids)
+        if missing:
+            self._store(rows, missing, await model.objects.ain_bulk(missing))
+        return {pk: rows[pk] for pk in ids if rows[pk] is not None}
+
+
+def current() -> IdentityMap:
+    """The request's map, or a throwaway one outside a request scope"""
+    return _identity_map.get() or IdentityMap()
+
+
+@contextmanager
+def scope():
+    """Share one map for the duration of the block (reusing an enclosing one)"""
+    if _identity_map.get() is not None:
+        yield _identity_map.get()
+        return
+    token = _identity_map.set(IdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+def prefetch(model, ids: Iterable[int]) -> Dict[int, object]:
+    return current().prefetch(model, ids)
+
+
+def get(model, pk: int) -> Optional[object]:
+    return current().prefetch(model, [pk]).get(pk)
+
+
+def require(model, pk: int):
+    """Like model.objects.get(pk=pk), served from the map when already fetched"""
+    instance = get(model, pk)
+    if instance is None:
+        raise model.DoesNotExist(f"{model.__name__} matching query does not exist.")
+    return instance
+
+
+async def arequire(model, pk: int):
+    instance = (await current().aprefetch(model, [pk])).get(pk)
+    if instance is None:
+        raise model.DoesNotExist(f"{model.__name__} matching query does not exist.")
+    return instance
+
+
+@sync_and_async_middleware
+def identity_map_middleware(get_response):
+    """Give every request its own identity map"""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            with scope():
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with scope():
+                return get_response(request)
+    return middleware
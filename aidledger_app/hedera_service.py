@@ -6,19 +6,58 @@ Updated for hedera-sdk-py 2.50.0
 
 import json
 import logging
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from hedera import (
     Client, AccountId, PrivateKey, TopicCreateTransaction, 
     TopicMessageSubmitTransaction, TokenCreateTransaction, 
     TokenType, TokenSupplyType, TokenMintTransaction,
     TransferTransaction, TokenId, AccountBalanceQuery,
-    TopicInfoQuery, Hbar, TopicId  # Add TopicId here
+    TopicInfoQuery, Hbar, TopicId,  # Add TopicId here
+    AccountCreateTransaction, TokenAssociateTransaction
+)
+from jnius import autoclass
+
+from . import idempotency
+from .admission import admitted
+from .circuit import (
+    BALANCE_QUERY, HCS_SUBMIT, MIRROR_READ, TOKEN_TRANSFER, CircuitOpen, guarded, set_probe
 )
 
 logger = logging.getLogger(__name__)
 
+ArrayList = autoclass('java.util.ArrayList')
+
+# Fungible token balance adjustments the network accepts in one CryptoTransfer,
+# the sender's debit included
+MAX_TOKEN_TRANSFERS = 10
+
+
+def pack_transfers(transfers: List[Tuple[str, int]], per_transaction: int) -> List[List[int]]:
+    """
+    Group transfer indexes into transactions of at most per_transaction
+    recipients, never repeating an account within one transaction
+    """
+    groups = []
+    last_group = {}  # account -> latest group it appears in
+    first_open = 0   # every group before this one is full
+    for index, (to_wallet, _) in enumerate(transfers):
+        position = max(first_open, last_group.get(to_wallet, -1) + 1)
+        while position < len(groups) and len(groups[position]) >= per_transaction:
+            position += 1
+        if position == len(groups):
+            groups.append([])
+        groups[position].append(index)
+        last_group[to_wallet] = position
+        while first_open < len(groups) and len(groups[first_open]) >= per_transaction:
+            first_open += 1
+    return groups
+
 
 class HederaService:
     """Service class for Hedera Hashgraph operations"""
@@ -28,6 +67,13 @@ class HederaService:
         self.client = self._initialize_client()
         self.topic_id = None
         self.token_id = None
+        self.mirror_url = self.config.get('MIRROR_NODE_URL', 'https://testnet.mirrornode.hedera.com').rstrip('/')
+        
+        # Health checks a tripped circuit runs before letting real calls through again
+        set_probe(HCS_SUBMIT, self._probe_network)
+        set_probe(TOKEN_TRANSFER, self._probe_network)
+        set_probe(BALANCE_QUERY, self._probe_network)
+        set_probe(MIRROR_READ, self._probe_mirror)
         
     def _initialize_client(self) -> Client:
         """Initialize Hedera client with testnet configuration"""
@@ -79,20 +125,69 @@ class HederaService:
             logger.error(f"Failed to create AidCoin token: {e}")
             raise
     
-    def log_donation_to_hcs(self, donor_name: str, ngo_name: str, amount: float) -> str:
+    def _probe_network(self) -> None:
+        """Cheap, free query against the consensus nodes: the operator's balance"""
+        AccountBalanceQuery().setAccountId(AccountId.fromString(self.config['OPERATOR_ID'])).execute(self.client)
+    
+    def _probe_mirror(self) -> None:
+        response = requests.get(f"{self.mirror_url}/api/v1/network/nodes", params={'limit': 1}, timeout=5)
+        response.raise_for_status()
+    
+    @guarded(MIRROR_READ)
+    def _mirror_get(self, url: str, params: Optional[Dict[str, Any]] = None) -> requests.Response:
+        """GET from the Mirror Node; 5xx responses count against the circuit"""
+        response = requests.get(url, params=params, timeout=30)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response
+    
+    def _get_token_id(self) -> TokenId:
+        """Resolve the configured AidCoin token"""
+        if not self.token_id:
+            self.token_id = self.config.get('TOKEN_ID')
+            if not self.token_id:
+                raise ValueError("Token ID not configured")
+        
+        # Convert string token_id back to TokenId object if needed
+        if isinstance(self.token_id, str):
+            return TokenId.fromString(self.token_id)
+        return self.token_id
+    
+    def _get_topic_id(self) -> TopicId:
+        """Resolve the configured transparency topic"""
+        if not self.topic_id:
+            self.topic_id = self.config.get('TOPIC_ID')
+            if not self.topic_id:
+                raise ValueError("Topic ID not configured")
+        
+        # Convert string topic_id back to TopicId object if needed
+        if isinstance(self.topic_id, str):
+            return TopicId.fromString(self.topic_id)
+        return self.topic_id
+    
+    @guarded(HCS_SUBMIT)
+    @admitted
+    def _submit_message(self, message_data: Dict[str, Any], wait_for_receipt: bool = True) -> str:
+        """
+        Submit a JSON message to the transparency topic and return its transaction id.
+        With wait_for_receipt=False the call returns once a node has accepted the
+        transaction, leaving consensus to be confirmed by the caller.
+        """
+        message_tx = (TopicMessageSubmitTransaction()
+                     .setTopicId(self._get_topic_id())
+                     .setMessage(json.dumps(message_data))
+                     .execute(self.client))
+        # A node has accepted the message: even if the receipt never arrives, it may reach consensus
+        idempotency.note_submission(message_tx.transactionId.toString())
+        
+        if not wait_for_receipt:
+            return message_tx.transactionId.toString()
+        return message_tx.getReceipt(self.client).transactionId.toString()
+    
+    def log_donation_to_hcs(self, donor_name: str, ngo_name: str, amount: float,
+                            wait_for_receipt: bool = True) -> str:
         """Log donation transaction to HCS topic"""
         try:
-            if not self.topic_id:
-                self.topic_id = self.config.get('TOPIC_ID')
-                if not self.topic_id:
-                    raise ValueError("Topic ID not configured")
-            
-            # Convert string topic_id back to TopicId object if needed
-            if isinstance(self.topic_id, str):
-                topic_id_obj = TopicId.fromString(self.topic_id)
-            else:
-                topic_id_obj = self.topic_id
-            
             message_data = {
                 "type": "donation",
                 "donor": donor_name,
@@ -101,32 +196,17 @@ class HederaService:
                 "timestamp": str(timezone.now())
             }
             
-            message_tx = (TopicMessageSubmitTransaction()
-                         .setTopicId(topic_id_obj)
-                         .setMessage(json.dumps(message_data))
-                         .execute(self.client))
-            
-            txn_hash = message_tx.getReceipt(self.client).transactionId.toString()
+            txn_hash = self._submit_message(message_data, wait_for_receipt)
             logger.info(f"Logged donation to HCS: {txn_hash}")
             return txn_hash
         except Exception as e:
             logger.error(f"Failed to log donation to HCS: {e}")
             raise
     
-    def log_distribution_to_hcs(self, ngo_name: str, recipient_name: str, amount: float) -> str:
+    def log_distribution_to_hcs(self, ngo_name: str, recipient_name: str, amount: float,
+                                wait_for_receipt: bool = True) -> str:
         """Log distribution transaction to HCS topic"""
         try:
-            if not self.topic_id:
-                self.topic_id = self.config.get('TOPIC_ID')
-                if not self.topic_id:
-                    raise ValueError("Topic ID not configured")
-            
-            # Convert string topic_id back to TopicId object if needed
-            if isinstance(self.topic_id, str):
-                topic_id_obj = TopicId.fromString(self.topic_id)
-            else:
-                topic_id_obj = self.topic_id
-            
             message_data = {
                 "type": "distribution",
                 "ngo": ngo_name,
@@ -135,31 +215,75 @@ class HederaService:
                 "timestamp": str(timezone.now())
             }
             
-            message_tx = (TopicMessageSubmitTransaction()
-                         .setTopicId(topic_id_obj)
-                         .setMessage(json.dumps(message_data))
-                         .execute(self.client))
-            
-            txn_hash = message_tx.getReceipt(self.client).transactionId.toString()
+            txn_hash = self._submit_message(message_data, wait_for_receipt)
             logger.info(f"Logged distribution to HCS: {txn_hash}")
             return txn_hash
         except Exception as e:
             logger.error(f"Failed to log distribution to HCS: {e}")
             raise
     
+    def log_donation_batch_to_hcs(self, entries: List[Tuple[int, int, str]]) -> str:
+        """Log a run of donations as one HCS message of [donor_id, ngo_id, amount] triples"""
+        try:
+            message_data = {
+                "type": "donation_batch",
+                "count": len(entries),
+                "amount": str(sum(Decimal(amount) for _, _, amount in entries)),
+                "donations": [[donor_id, ngo_id, str(amount)] for donor_id, ngo_id, amount in entries],
+                "timestamp": str(timezone.now())
+            }
+
+            txn_hash = self._submit_message(message_data)
+            logger.info(f"Logged batch of {len(entries)} donations to HCS: {txn_hash}")
+            return txn_hash
+        except Exception as e:
+            logger.error(f"Failed to log donation batch to HCS: {e}")
+            raise
+
+    def log_distribution_batch_to_hcs(self, ngo_name: str, entries: List[Tuple[int, str]]) -> str:
+        """Log a run of distributions as one HCS message of [recipient_id, amount] pairs"""
+        try:
+            message_data = {
+                "type": "distribution_batch",
+                "ngo": ngo_name,
+                "count": len(entries),
+                "amount": str(sum(Decimal(amount) for _, amount in entries)),
+                "recipients": [[recipient_id, str(amount)] for recipient_id, amount in entries],
+                "timestamp": str(timezone.now())
+            }
+
+            txn_hash = self._submit_message(message_data)
+            logger.info(f"Logged batch of {len(entries)} distributions to HCS: {txn_hash}")
+            return txn_hash
+        except Exception as e:
+            logger.error(f"Failed to log distribution batch to HCS: {e}")
+            raise
+
+    def log_merkle_root_to_hcs(self, epoch_start: str, epoch_end: str, root: str, leaf_count: int) -> str:
+        """Anchor an epoch's Merkle root to the HCS topic"""
+        try:
+            message_data = {
+                "type": "merkle_root",
+                "epoch_start": epoch_start,
+                "epoch_end": epoch_end,
+                "root": root,
+                "leaf_count": leaf_count,
+                "timestamp": str(timezone.now())
+            }
+            
+            txn_hash = self._submit_message(message_data)
+            logger.info(f"Anchored Merkle root {root} to HCS: {txn_hash}")
+            return txn_hash
+        except Exception as e:
+            logger.error(f"Failed to anchor Merkle root to HCS: {e}")
+            raise
+    
+    @guarded(TOKEN_TRANSFER)
+    @admitted
     def transfer_aidcoin(self, from_wallet: str, to_wallet: str, amount: int) -> str:
         """Transfer AidCoin tokens between wallets"""
         try:
-            if not self.token_id:
-                self.token_id = self.config.get('TOKEN_ID')
-                if not self.token_id:
-                    raise ValueError("Token ID not configured")
-            
-            # Convert string token_id back to TokenId object if needed
-            if isinstance(self.token_id, str):
-                token_id_obj = TokenId.fromString(self.token_id)
-            else:
-                token_id_obj = self.token_id
+            token_id_obj = self._get_token_id()
             
             transfer_tx = (TransferTransaction()
                           .addTokenTransfer(
@@ -181,43 +305,150 @@ class HederaService:
             logger.error(f"Failed to transfer AidCoin: {e}")
             raise
     
-    def get_account_balance(self, wallet_id: str) -> Dict[str, Any]:
-        """Get account balance for a wallet"""
+    @guarded(TOKEN_TRANSFER)
+    @admitted
+    def _submit_transfer(self, from_wallet: str, transfers: List[Tuple[str, int]]) -> str:
+        """One TransferTransaction debiting from_wallet once and crediting every recipient"""
+        token_id_obj = self._get_token_id()
+        transfer_tx = TransferTransaction().addTokenTransfer(
+            token_id_obj, AccountId.fromString(from_wallet), -sum(amount for _, amount in transfers)
+        )
+        for to_wallet, amount in transfers:
+            transfer_tx = transfer_tx.addTokenTransfer(token_id_obj, AccountId.fromString(to_wallet), amount)
+        
+        return transfer_tx.execute(self.client).getReceipt(self.client).transactionId.toString()
+    
+    def transfer_aidcoin_batch(self, from_wallet: str, transfers: List[Tuple[str, int]],
+                               max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Pay many recipients from one wallet, packing as many transfers into each
+        TransferTransaction as the network allows and submitting the
+        transactions in parallel. Returns one result per transfer, in order;
+        transfers in a failed transaction are reported failed together.
+        """
+        groups = pack_transfers(transfers, MAX_TOKEN_TRANSFERS - 1)
+        max_workers = max_workers or getattr(settings, 'HEDERA_BATCH_TRANSFER_WORKERS', 4)
+        results = [None] * len(transfers)
+        
+        def submit(group):
+            try:
+                txn_hash = self._submit_transfer(from_wallet, [transfers[index] for index in group])
+                outcome = {"status": "success", "txn_hash": txn_hash}
+            except Exception as e:
+                logger.error(f"Failed batch transfer to {len(group)} recipients: {e}")
+                outcome = {"status": "failed", "error": str(e)}
+            for index in group:
+                to_wallet, amount = transfers[index]
+                results[index] = {"to_wallet": to_wallet, "amount": amount, **outcome}
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups) or 1)) as executor:
+            list(executor.map(submit, groups))
+        
+        succeeded = sum(1 for result in results if result["status"] == "success")
+        logger.info(f"Batch transferred AidCoin to {succeeded}/{len(transfers)} recipients in {len(groups)} transactions")
+        return results
+    
+    def create_token_account(self, initial_balance: float = 1) -> Tuple[str, str]:
+        """
+        Create an account funded by the operator and associate it with AidCoin.
+        Returns (account id, private key); takes two rounds of consensus.
+        """
         try:
-            balance_query = AccountBalanceQuery().setAccountId(AccountId.fromString(wallet_id))
-            balance = balance_query.execute(self.client)
+            private_key = PrivateKey.generateED25519()
+            account_id = (AccountCreateTransaction()
+                          .setKey(private_key.getPublicKey())
+                          .setInitialBalance(Hbar(initial_balance))
+                          .execute(self.client)
+                          .getReceipt(self.client)
+                          .accountId)
             
-            return {
-                "wallet_id": wallet_id,
-                "hbar_balance": balance.hbars.toString(),
-                "token_balances": [
-                    {
-                        "token_id": token.tokenId.toString(),
-                        "balance": token.balance
-                    }
-                    for token in balance.tokens
-                ]
-            }
+            token_ids = ArrayList()
+            token_ids.add(self._get_token_id())
+            (TokenAssociateTransaction()
+             .setAccountId(account_id)
+             .setTokenIds(token_ids)
+             .freezeWith(self.client)
+             .sign(private_key)
+             .execute(self.client)
+             .getReceipt(self.client))
+            
+            logger.info(f"Created token-associated account: {account_id.toString()}")
+            return account_id.toString(), private_key.toString()
+        except Exception as e:
+            logger.error(f"Failed to create account: {e}")
+            raise
+    
+    @guarded(BALANCE_QUERY)
+    def _query_balance(self, wallet_id: str) -> Dict[str, Any]:
+        balance_query = AccountBalanceQuery().setAccountId(AccountId.fromString(wallet_id))
+        balance = balance_query.execute(self.client)
+        
+        return {
+            "wallet_id": wallet_id,
+            "hbar_balance": balance.hbars.toString(),
+            "token_balances": [
+                {
+                    "token_id": token.tokenId.toString(),
+                    "balance": token.balance
+                }
+                for token in balance.tokens
+            ]
+        }
+    
+    def get_account_balance(self, wallet_id: str) -> Dict[str, Any]:
+        """Get account balance for a wallet, falling back to the last known balance during an outage"""
+        cache_key = f"hedera:balance:{wallet_id}"
+        try:
+            balance = self._query_balance(wallet_id)
+            cache.set(cache_key, balance, getattr(settings, 'HEDERA_BALANCE_CACHE_SECONDS', 86400))
+            return balance
         except Exception as e:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.warning(f"Serving cached balance for {wallet_id}: {e}")
+                return {**cached, "stale": True}
             logger.error(f"Failed to get account balance: {e}")
             raise
     
     def verify_transaction(self, txn_hash: str) -> Dict[str, Any]:
         """Verify transaction using Hedera Mirror Node API"""
         try:
-            import requests
-            
             # Using Hedera Mirror Node API
-            mirror_url = f"https://testnet.mirrornode.hedera.com/api/v1/transactions/{txn_hash}"
-            response = requests.get(mirror_url)
+            response = self._mirror_get(f"{self.mirror_url}/api/v1/transactions/{txn_hash}")
             
             if response.status_code == 200:
                 return response.json()
             else:
                 return {"error": "Transaction not found", "status_code": response.status_code}
+        except CircuitOpen as e:
+            return {"error": str(e), "retry_after": e.retry_after}
         except Exception as e:
             logger.error(f"Failed to verify transaction: {e}")
             return {"error": str(e)}
+    
+    def get_topic_messages(self, topic_id: str, after_timestamp: Optional[str] = None,
+                           page_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
+        """Page through a topic's messages on the Mirror Node, oldest first"""
+        url = f"{self.mirror_url}/api/v1/topics/{topic_id}/messages"
+        params = {'limit': page_size, 'order': 'asc'}
+        if after_timestamp:
+            params['timestamp'] = f"gt:{after_timestamp}"
+        
+        try:
+            while url:
+                response = self._mirror_get(url, params)
+                response.raise_for_status()
+                body = response.json()
+                messages = body.get('messages', [])
+                if messages:
+                    yield messages
+                
+                next_link = (body.get('links') or {}).get('next')
+                url = f"{self.mirror_url}{next_link}" if next_link else None
+                params = None  # The next link already carries the query string
+        except Exception as e:
+            logger.error(f"Failed to fetch topic messages for {topic_id}: {e}")
+            raise
 
 
 # Global instance
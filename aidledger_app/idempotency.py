@@ -0,0 +1,280 @@
+"""
+Idempotency-Key support for AidLedger's write endpoints
+The first request with a key claims it and its final response is stored;
+replays of the same request get that response back without touching the
+ledger, and duplicates that arrive while the first is still running wait
+for it instead of racing it. Keys are scoped per endpoint and bound to a
+fingerprint of the request body. A failed request only gives its key back
+if nothing reached HCS; otherwise the failure is kept so a retry cannot
+log the event twice.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Any, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.1
+
+# HCS transaction ids submitted while handling the current keyed request
+_submissions = ContextVar('idempotency_submissions', default=None)
+
+
+class IdempotencyMismatch(Exception):
+    """The key was already used with a different request body"""
+
+
+class IdempotencyInProgress(Exception):
+    """The original request is still running after the wait deadline"""
+
+
+def wait_seconds() -> float:
+    return getattr(settings, 'IDEMPOTENCY_WAIT_SECONDS', 30)
+
+
+def key_ttl() -> timedelta:
+    return timedelta(hours=getattr(settings, 'IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+
+def lease() -> timedelta:
+    """How long a processing claim is honoured; past it the claiming worker is presumed dead"""
+    return timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LEASE_SECONDS', 300))
+
+
+def _expired(record: IdempotencyKey) -> bool:
+    if record.status == 'completed':
+        return record.created_at < timezone.now() - key_ttl()
+    return record.created_at < timezone.now() - lease()
+
+
+def fingerprint(data: Any) -> str:
+    """Stable SHA-256 of a parsed request body"""
+    canonical = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _claim(scope: str, key: str, request_fingerprint: str) -> Tuple[IdempotencyKey, bool]:
+    """Insert the key as processing; (record, True) if this request owns it"""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(scope=scope, key=key, fingerprint=request_fingerprint), True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+    if record is None:
+        # Released by a failed first attempt between our insert and read
+        return _claim(scope, key, request_fingerprint)
+    if _expired(record):
+        if record.status == 'processing':
+            logger.warning(f"Reclaiming {HEADER} {key} abandoned since {record.created_at}")
+        IdempotencyKey.objects.filter(pk=record.pk, status=record.status).delete()
+        return _claim(scope, key, request_fingerprint)
+    return record, False
+
+
+def _check(scope: str, key: str, request_fingerprint: str) -> Tuple[Optional[IdempotencyKey], bool]:
+    """(record, owner) when settled, (None, False) while another request holds the key"""
+    record, owner = _claim(scope, key, request_fingerprint)
+    if owner:
+        return record, True
+    if record.fingerprint != request_fingerprint:
+        raise IdempotencyMismatch(f"{HEADER} {key} was used with a different request")
+    if record.status == 'completed':
+        return record, False
+    return None, False
+
+
+def acquire(scope: str, key: str, request_fingerprint: str) -> Tuple[IdempotencyKey, bool]:
+    """Claim the key, or wait for and return the stored outcome; the flag is True when we own it"""
+    deadline = time.monotonic() + wait_seconds()
+    while True:
+        record, owner = _check(scope, key, request_fingerprint)
+        if record is not None:
+            return record, owner
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress(f"{HEADER} {key} is still being processed")
+        time.sleep(POLL_SECONDS)
+
+
+async def aacquire(scope: str, key: str, request_fingerprint: str) -> Tuple[IdempotencyKey, bool]:
+    """acquire() for async views; waits without holding a thread"""
+    deadline = time.monotonic() + wait_seconds()
+    while True:
+        record, owner = await sync_to_async(_check)(scope, key, request_fingerprint)
+        if record is not None:
+            return record, owner
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress(f"{HEADER} {key} is still being processed")
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def note_submission(txn_hash: str) -> None:
+    """Record that the current request has handed a message to HCS; called by HederaService"""
+    submitted = _submissions.get()
+    if submitted is not None:
+        submitted.append(txn_hash)
+
+
+@contextmanager
+def _tracking_submissions():
+    """Collect note_submission() calls made while the view runs, threads it hands work to included"""
+    token = _submissions.set([])
+    try:
+        yield _submissions.get()
+    finally:
+        _submissions.reset(token)
+
+
+def complete(record: IdempotencyKey, response_status: int, response_body: Any,
+             submitted: List[str] = ()) -> None:
+    """
+    Store the final response. Server errors release the key so the client
+    can retry, unless the request already reached HCS: then the failure is
+    stored with the submitted transaction ids instead.
+    """
+    if response_status >= 500:
+        if not submitted:
+            release(record)
+            return
+        logger.error(f"{HEADER} {record.key} failed after submitting {', '.join(submitted)} to HCS")
+        if isinstance(response_body, dict):
+            response_body = {**response_body, 'submitted_txn_hashes': list(submitted)}
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status='completed',
+        response_status=response_status,
+        response_body=response_body,
+        completed_at=timezone.now()
+    )
+
+
+def fail(record: IdempotencyKey, error: Exception, submitted: List[str]) -> None:
+    """A view raised instead of responding"""
+    complete(record, status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': str(error)}, submitted)
+
+
+def release(record: IdempotencyKey) -> None:
+    IdempotencyKey.objects.filter(pk=record.pk, status='processing').delete()
+
+
+def purge_expired() -> int:
+    """Delete completed keys older than the TTL and abandoned claims past their lease; returns how many"""
+    now = timezone.now()
+    deleted, _ = IdempotencyKey.objects.filter(
+        Q(status='completed', created_at__lt=now - key_ttl())
+        | Q(status='processing', created_at__lt=now - lease())
+    ).delete()
+    return deleted
+
+
+def _error(response_class, message: str, response_status: int):
+    return response_class({'error': message}, status=response_status)
+
+
+def _invalid_key(response_class, key: str):
+    if len(key) > MAX_KEY_LENGTH:
+        return _error(response_class, f"{HEADER} must be at most {MAX_KEY_LENGTH} characters",
+                      status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def _rejection(response_class, error: Exception):
+    if isinstance(error, IdempotencyMismatch):
+        return _error(response_class, str(error), status.HTTP_422_UNPROCESSABLE_ENTITY)
+    response = _error(response_class, str(error), status.HTTP_409_CONFLICT)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _replay(response_class, record: IdempotencyKey):
+    response = response_class(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(scope: str):
+    """
+    Make a POST view honour the Idempotency-Key header. Wraps DRF function
+    views (below @api_view) and async Django views alike; requests without
+    the header are passed straight through.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                key = request.headers.get(HEADER)
+                if not key:
+                    return await view(request, *args, **kwargs)
+                error = _invalid_key(JsonResponse, key)
+                if error:
+                    return error
+
+                try:
+                    body = json.loads(request.body or b'{}')
+                except ValueError:
+                    body = request.body.decode(errors='replace')
+                try:
+                    record, owner = await aacquire(scope, key, fingerprint(body))
+                except (IdempotencyMismatch, IdempotencyInProgress) as e:
+                    return _rejection(JsonResponse, e)
+                if not owner:
+                    return _replay(JsonResponse, record)
+
+                with _tracking_submissions() as submitted:
+                    try:
+                        response = await view(request, *args, **kwargs)
+                    except Exception as e:
+                        await sync_to_async(fail)(record, e, submitted)
+                        raise
+                await sync_to_async(complete)(record, response.status_code, json.loads(response.content), submitted)
+                return response
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view(request, *args, **kwargs)
+            error = _invalid_key(Response, key)
+            if error:
+                return error
+
+            try:
+                record, owner = acquire(scope, key, fingerprint(request.data))
+            except (IdempotencyMismatch, IdempotencyInProgress) as e:
+                return _rejection(Response, e)
+            if not owner:
+                return _replay(Response, record)
+
+            with _tracking_submissions() as submitted:
+                try:
+                    response = view(request, *args, **kwargs)
+                except Exception as e:
+                    fail(record, e, submitted)
+                    raise
+            complete(record, response.status_code, response.data, submitted)
+            return response
+        return wrapper
+    return decorator
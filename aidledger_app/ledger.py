@@ -0,0 +1,289 @@
+"""
+Database side of AidLedger's write path
+Records a donation or distribution once it has been logged to Hedera and
+keeps the denormalized totals and statistics in step, atomically. While
+the HCS circuit is open, events are stored as pending under a placeholder
+hash and submitted later by submit_queued(). Multi-recipient runs are
+stored in bulk and anchored to HCS a chunk at a time.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from .admission import LedgerBusy
+from .circuit import CircuitOpen
+from .hedera_service import hedera_service
+from .models import Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats
+from .signals import donations_bulk_saved, distributions_bulk_saved
+
+logger = logging.getLogger(__name__)
+
+QUEUED_PREFIX = 'queued:'
+BATCH_SEPARATOR = '#'
+
+
+class InsufficientFunds(Exception):
+    """A distribution run asks for more than the NGO has left to give"""
+
+
+def _stats_id() -> int:
+    stats, created = AidLedgerStats.objects.get_or_create(
+        defaults={'total_donations': 0, 'total_distributions': 0}
+    )
+    return stats.pk
+
+
+def queued_txn_hash() -> str:
+    """Placeholder hash for an event waiting to be submitted to HCS"""
+    return f"{QUEUED_PREFIX}{uuid.uuid4().hex}"
+
+
+def _add_donation_totals(donation: Donation) -> None:
+    # Update donor and NGO totals in the database to avoid lost updates
+    Donor.objects.filter(pk=donation.donor_id).update(total_donated=F('total_donated') + donation.amount)
+    NGO.objects.filter(pk=donation.ngo_id).update(total_received=F('total_received') + donation.amount)
+    AidLedgerStats.objects.filter(pk=_stats_id()).update(
+        total_donations=F('total_donations') + donation.amount
+    )
+
+
+def _add_distribution_totals(distribution: Distribution) -> None:
+    NGO.objects.filter(pk=distribution.ngo_id).update(
+        total_distributed=F('total_distributed') + distribution.amount
+    )
+    AidLedgerStats.objects.filter(pk=_stats_id()).update(
+        total_distributions=F('total_distributions') + distribution.amount
+    )
+
+
+def record_donation(donor: Donor, ngo: NGO, amount: Decimal, txn_hash: str,
+                    status: str = 'confirmed') -> Donation:
+    """Store a donation; confirmed ones are added to the donor, NGO and global totals"""
+    with transaction.atomic():
+        donation = Donation.objects.create(
+            donor=donor,
+            ngo=ngo,
+            amount=Decimal(amount),
+            txn_hash=txn_hash,
+            status=status
+        )
+        if status == 'confirmed':
+            _add_donation_totals(donation)
+    return donation
+
+
+def record_distribution(ngo: NGO, recipient: Recipient, amount: Decimal, txn_hash: str,
+                        status: str = 'confirmed') -> Distribution:
+    """Store a distribution; confirmed ones are added to the NGO and global totals"""
+    with transaction.atomic():
+        distribution = Distribution.objects.create(
+            ngo=ngo,
+            recipient=recipient,
+            amount=Decimal(amount),
+            txn_hash=txn_hash,
+            status=status
+        )
+        if status == 'confirmed':
+            _add_distribution_totals(distribution)
+    return distribution
+
+
+def queue_donation(donor: Donor, ngo: NGO, amount: Decimal) -> Donation:
+    """Keep a donation as pending until HCS can be reached again"""
+    return record_donation(donor, ngo, amount, queued_txn_hash(), status='pending')
+
+
+def queue_distribution(ngo: NGO, recipient: Recipient, amount: Decimal) -> Distribution:
+    """Keep a distribution as pending until HCS can be reached again"""
+    return record_distribution(ngo, recipient, amount, queued_txn_hash(), status='pending')
+
+
+def available_funds(ngo: NGO) -> Decimal:
+    """
+    What the NGO has received less everything it has distributed or queued.
+    Distributed amounts come from the NGO's counter, which still holds
+    months archived out of the table; pending rows are never archived.
+    """
+    pending = (Distribution.objects.filter(ngo=ngo, status='pending')
+               .aggregate(total=Sum('amount'))['total'])
+    return ngo.total_received - ngo.total_distributed - (pending or Decimal('0'))
+
+
+def batch_txn_hash(anchor_txn_hash: str, position: int) -> str:
+    """Hash of the event at position within a batch message"""
+    return f"{anchor_txn_hash}{BATCH_SEPARATOR}{position}"
+
+
+def anchor_chunk_size() -> int:
+    return getattr(settings, 'LEDGER_BATCH_ANCHOR_SIZE', 250)
+
+
+def _per_row(amounts: Dict[int, Decimal]) -> Case:
+    return Case(*[When(pk=pk, then=Value(amount)) for pk, amount in amounts.items()],
+                output_field=DecimalField(max_digits=20, decimal_places=2))
+
+
+def _add_donation_batch_totals(donations: List[Donation]) -> None:
+    # One UPDATE per table however many donors and NGOs the chunk spans
+    by_donor, by_ngo = defaultdict(Decimal), defaultdict(Decimal)
+    for donation in donations:
+        by_donor[donation.donor_id] += donation.amount
+        by_ngo[donation.ngo_id] += donation.amount
+    Donor.objects.filter(pk__in=by_donor).update(total_donated=F('total_donated') + _per_row(by_donor))
+    NGO.objects.filter(pk__in=by_ngo).update(total_received=F('total_received') + _per_row(by_ngo))
+    AidLedgerStats.objects.filter(pk=_stats_id()).update(
+        total_donations=F('total_donations') + sum(d.amount for d in donations)
+    )
+
+
+def _add_distribution_batch_totals(distributions: List[Distribution]) -> None:
+    by_ngo = defaultdict(Decimal)
+    for distribution in distributions:
+        by_ngo[distribution.ngo_id] += distribution.amount
+    NGO.objects.filter(pk__in=by_ngo).update(total_distributed=F('total_distributed') + _per_row(by_ngo))
+    AidLedgerStats.objects.filter(pk=_stats_id()).update(
+        total_distributions=F('total_distributions') + sum(d.amount for d in distributions)
+    )
+
+
+def create_pending_donations(runs: List[Tuple[Donor, NGO, Decimal, Dict]]) -> List[Donation]:
+    """Store many donations as pending in one INSERT; extra fields go in each run's dict"""
+    donations = Donation.objects.bulk_create([
+        Donation(donor=donor, ngo=ngo, amount=Decimal(amount), txn_hash=queued_txn_hash(),
+                 status='pending', **extra)
+        for donor, ngo, amount, extra in runs
+    ])
+    donations_bulk_saved.send(sender=Donation, donations=donations)
+    return donations
+
+
+def reserve_distribution_batch(ngo: NGO, items: List[Tuple[Recipient, Decimal]]) -> List[Distribution]:
+    """
+    Check the NGO's funds once and store the whole run as pending. The NGO
+    row is locked so concurrent runs cannot both spend the same balance.
+    """
+    total = sum((Decimal(amount) for _, amount in items), Decimal('0'))
+    with transaction.atomic():
+        ngo = NGO.objects.select_for_update().get(pk=ngo.pk)
+        available = available_funds(ngo)
+        if total > available:
+            raise InsufficientFunds(f"{ngo.name} has {available} available; the batch needs {total}")
+        distributions = Distribution.objects.bulk_create([
+            Distribution(ngo=ngo, recipient=recipient, amount=Decimal(amount),
+                         txn_hash=queued_txn_hash(), status='pending')
+            for recipient, amount in items
+        ])
+        distributions_bulk_saved.send(sender=Distribution, distributions=distributions)
+    return distributions
+
+
+def _confirm_chunk(model, events: list, anchor_txn_hash: str, add_totals, signal, name: str) -> None:
+    for position, event in enumerate(events):
+        event.txn_hash = batch_txn_hash(anchor_txn_hash, position)
+        event.status = 'confirmed'
+    with transaction.atomic():
+        model.objects.bulk_update(events, ['txn_hash', 'status'])
+        add_totals(events)
+        signal.send(sender=model, **{name: events})
+
+
+def _anchor_batch(model, events: list, log_chunk, add_totals, signal, name: str) -> List[str]:
+    """
+    Log pending events to HCS, one message per chunk, confirming each chunk
+    as it lands. Chunks that cannot be submitted stay queued for
+    submit_queued(), which sends them one message each.
+    """
+    anchors = []
+    size = anchor_chunk_size()
+    for start in range(0, len(events), size):
+        chunk = events[start:start + size]
+        try:
+            anchor_txn_hash = log_chunk(chunk)
+        except (CircuitOpen, LedgerBusy) as e:
+            logger.warning(f"Left {len(events) - start} batch {name} queued: {e}")
+            break
+        except Exception as e:
+            logger.error(f"Failed to anchor {len(chunk)} batch {name}, left queued: {e}")
+            continue
+        _confirm_chunk(model, chunk, anchor_txn_hash, add_totals, signal, name)
+        anchors.append(anchor_txn_hash)
+    return anchors
+
+
+def anchor_donation_batch(donations: List[Donation]) -> List[str]:
+    """Anchor pending donations, possibly from many donors to many NGOs"""
+    return _anchor_batch(
+        Donation, donations,
+        lambda chunk: hedera_service.log_donation_batch_to_hcs(
+            [(d.donor_id, d.ngo_id, d.amount) for d in chunk]
+        ),
+        _add_donation_batch_totals, donations_bulk_saved, 'donations'
+    )
+
+
+def anchor_distribution_batch(ngo: NGO, distributions: List[Distribution]) -> List[str]:
+    """Anchor one NGO's reserved distributions"""
+    return _anchor_batch(
+        Distribution, distributions,
+        lambda chunk: hedera_service.log_distribution_batch_to_hcs(
+            ngo.name, [(d.recipient_id, d.amount) for d in chunk]
+        ),
+        _add_distribution_batch_totals, distributions_bulk_saved, 'distributions'
+    )
+
+
+def _submit_one(model, related, pk: int, submit, add_totals) -> bool:
+    """Submit one queued event under a row lock; False if another worker has it"""
+    with transaction.atomic():
+        event = (model.objects.select_for_update(skip_locked=True, of=('self',))
+                 .select_related(*related)
+                 .filter(pk=pk, status='pending', txn_hash__startswith=QUEUED_PREFIX)
+                 .first())
+        if event is None:
+            return False
+        event.txn_hash = submit(event)
+        event.status = 'confirmed'
+        event.save(update_fields=['txn_hash', 'status'])
+        add_totals(event)
+    return True
+
+
+def _submit_donation(donation: Donation) -> str:
+    return hedera_service.log_donation_to_hcs(donation.donor.name, donation.ngo.name, float(donation.amount))
+
+
+def _submit_distribution(distribution: Distribution) -> str:
+    return hedera_service.log_distribution_to_hcs(
+        distribution.ngo.name, distribution.recipient.name, float(distribution.amount)
+    )
+
+
+def submit_queued(batch_size: int = 100) -> int:
+    """
+    Submit events queued during an outage to HCS, oldest first, and confirm
+    them; stops early while the ledger is still unavailable or busy
+    """
+    submitted = 0
+    for model, related, submit, add_totals in (
+        (Donation, ('donor', 'ngo'), _submit_donation, _add_donation_totals),
+        (Distribution, ('ngo', 'recipient'), _submit_distribution, _add_distribution_totals),
+    ):
+        pending = list(model.objects.filter(
+            status='pending', txn_hash__startswith=QUEUED_PREFIX
+        ).order_by('id').values_list('id', flat=True)[:batch_size])
+        for pk in pending:
+            try:
+                submitted += _submit_one(model, related, pk, submit, add_totals)
+            except (CircuitOpen, LedgerBusy) as e:
+                logger.warning(f"Stopped submitting queued events: {e}")
+                return submitted
+            except Exception as e:
+                logger.error(f"Failed to submit queued {model.__name__} {pk}: {e}")
+    return submitted
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.allocation import allocate_pending
+
+
+class Command(BaseCommand):
+    help = 'Trace unallocated distributions back to the donations that funded them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔗 Tracing fund flows...')
+        processed = allocate_pending(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Allocated {processed} distributions')
+        )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.partitions import archive_old_partitions
+
+
+class Command(BaseCommand):
+    help = 'Detach old monthly ledger partitions into indexed Parquet segments that the API still reads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-months', type=int, default=None,
+                            help='Archive months that ended this long ago (default: ARCHIVE_AFTER_MONTHS)')
+        parser.add_argument('--dir', default=None, help='Archive directory (default: LEDGER_ARCHIVE_DIR)')
+        parser.add_argument('--force', action='store_true',
+                            help='Archive months that still hold pending or unallocated rows')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🗄️ Archiving old ledger partitions...')
+        archived = archive_old_partitions(options['older_than_months'], options['dir'], options['force'])
+        for archive in archived:
+            self.stdout.write(f'  {archive} -> {archive.path}')
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Archived {len(archived)} partitions')
+        )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.merkle import build_epochs
+
+
+class Command(BaseCommand):
+    help = 'Seal closed ledger epochs into Merkle trees and anchor their roots to HCS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-anchor', action='store_true', help='Build trees without submitting roots')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🌳 Building Merkle epochs...')
+        epochs = build_epochs(anchor=not options['no_anchor'])
+        for epoch in epochs:
+            self.stdout.write(f'  {epoch.epoch_start:%Y-%m-%d %H:%M} {epoch.leaf_count} events root={epoch.root}')
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Sealed {len(epochs)} epochs')
+        )
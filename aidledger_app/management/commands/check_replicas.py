@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from aidledger_app import replicas
+
+
+class Command(BaseCommand):
+    help = 'Measure replication lag and take lagging or unreachable replicas out of rotation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mark-lagging', metavar='ALIAS', help='Take a replica out of rotation by hand')
+        parser.add_argument('--clear', metavar='ALIAS', help='Put a marked replica back into rotation')
+        parser.add_argument('--seconds', type=int, default=None,
+                            help='How long a manual mark lasts (default: REPLICA_MARK_SECONDS)')
+
+    def handle(self, *args, **options):
+        for alias in filter(None, [options['mark_lagging'], options['clear']]):
+            if alias not in replicas.replica_aliases():
+                raise CommandError(f'Unknown replica {alias}')
+        if options['mark_lagging']:
+            replicas.mark_replica(options['mark_lagging'], 'lagging', options['seconds'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Marked {options['mark_lagging']} as lagging"))
+            return
+        if options['clear']:
+            replicas.clear_mark(options['clear'])
+            self.stdout.write(self.style.SUCCESS(f"✅ {options['clear']} is back in rotation"))
+            return
+
+        self.stdout.write('🩺 Checking read replicas...')
+        report = replicas.check_replicas()
+        for alias, result in report.items():
+            style = self.style.SUCCESS if result['state'] == 'ok' else self.style.WARNING
+            lag = 'n/a' if result['lag'] is None else f"{result['lag']:.1f}s"
+            self.stdout.write(style(f"{alias}: {result['state']} (lag {lag})"))
+        self.stdout.write(self.style.SUCCESS(f'✅ Checked {len(report)} replicas'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.partitions import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create monthly Donation and Distribution partitions ahead of time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=None,
+                            help='Months past the current one to cover (default: PARTITION_MONTHS_AHEAD)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🗂️ Creating upcoming ledger partitions...')
+        created = ensure_partitions(options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'  {name}')
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Created {len(created)} partitions')
+        )
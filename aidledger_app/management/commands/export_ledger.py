@@ -0,0 +1,34 @@
+import os
+
+from django.core.management.base import BaseCommand
+from aidledger_app.export import DEFAULT_ROW_GROUP_SIZE, FILE_FORMATS, TABLE_NAMES, write_table
+
+
+class Command(BaseCommand):
+    help = 'Export the ledger and entity tables to compressed columnar files (Parquet or Arrow)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', help='Directory to write <table>.<format> files into')
+        parser.add_argument('--tables', default=','.join(TABLE_NAMES),
+                            help=f"Comma-separated subset of: {', '.join(TABLE_NAMES)}")
+        parser.add_argument('--format', dest='file_format', choices=FILE_FORMATS, default='parquet')
+        parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+        parser.add_argument('--compression', default='zstd')
+
+    def handle(self, *args, **options):
+        tables = [table.strip() for table in options['tables'].split(',') if table.strip()]
+        unknown = set(tables) - set(TABLE_NAMES)
+        if unknown:
+            self.stdout.write(self.style.ERROR(f"❌ Unknown tables: {', '.join(sorted(unknown))}"))
+            return
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for table in tables:
+            path = os.path.join(options['output_dir'], f"{table}.{options['file_format']}")
+            self.stdout.write(f'📦 Exporting {table} to {path}...')
+            with open(path, 'wb') as sink:
+                rows = write_table(
+                    table, sink, options['file_format'],
+                    options['row_group_size'], options['compression']
+                )
+            self.stdout.write(self.style.SUCCESS(f'✅ {rows} rows'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = ('Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_TTL_HOURS '
+            'and processing claims older than IDEMPOTENCY_LEASE_SECONDS')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🧹 Purging expired idempotency keys...')
+        deleted = purge_expired()
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Deleted {deleted} idempotency keys')
+        )
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand
+from aidledger_app.reconciliation import ingest_topic, reconcile
+
+
+class Command(BaseCommand):
+    help = 'Ingest new HCS topic messages from the Mirror Node and reconcile them with the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topic', help='Topic id (defaults to TOPIC_ID)')
+        parser.add_argument('--full', action='store_true', help='Reconcile everything, not just new messages')
+        parser.add_argument('--skip-ingest', action='store_true', help='Reconcile already-ingested messages only')
+        parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+
+    def handle(self, *args, **options):
+        if not options['skip_ingest']:
+            self.stdout.write('📥 Ingesting topic messages from the Mirror Node...')
+            ingested = ingest_topic(options['topic'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Ingested {ingested} messages'))
+
+        self.stdout.write('🔍 Reconciling ledger against the database...')
+        report = reconcile(options['topic'], full=options['full'])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+            return
+
+        self.stdout.write(f"Checked {report['messages_checked']} messages")
+        for section in ['missing_on_ledger', 'missing_in_db', 'mismatched']:
+            for event_type, entries in report[section].items():
+                style = self.style.WARNING if entries else self.style.SUCCESS
+                self.stdout.write(style(f'{section} ({event_type}): {len(entries)}'))
+        style = self.style.WARNING if report['duplicates'] else self.style.SUCCESS
+        self.stdout.write(style(f"duplicates: {len(report['duplicates'])}"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.accounts import available_count, refill
+
+
+class Command(BaseCommand):
+    help = 'Create token-associated Hedera accounts ahead of registration when the pool runs low'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--low-water', type=int, default=None)
+        parser.add_argument('--target', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'🏦 Account pool has {available_count()} available accounts...')
+        created = refill(options['low_water'], options['target'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Created {created} accounts ({available_count()} available)')
+        )
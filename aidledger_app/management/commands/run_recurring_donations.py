@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.recurring import run_due
+
+
+class Command(BaseCommand):
+    help = 'Charge due recurring donations; safe to run from several workers at once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Most runs to charge in this pass (default: RECURRING_MAX_PER_PASS)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔁 Charging due recurring donations...')
+        charged = run_due(limit=options['limit'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Charged {charged} recurring donations')
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.reverify import run_unfinished
+
+
+class Command(BaseCommand):
+    help = ('Run admin re-verification jobs left pending or abandoned by a restart '
+            '(running longer than REVERIFY_LEASE_SECONDS), and delete delivered reports')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔎 Running unfinished re-verification jobs...')
+        ran = run_unfinished()
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Ran {ran} re-verification jobs')
+        )
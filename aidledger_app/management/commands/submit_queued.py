@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.ledger import submit_queued
+
+
+class Command(BaseCommand):
+    help = 'Submit donations and distributions queued during a Hedera outage to HCS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        self.stdout.write('📤 Submitting queued transactions to HCS...')
+        submitted = submit_queued(options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Submitted {submitted} queued transactions')
+        )
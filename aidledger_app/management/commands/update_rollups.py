@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from aidledger_app.analytics import update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Fold new confirmed donations and distributions into the analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event-type', choices=['donation', 'distribution'])
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write('📈 Catching up analytics rollups...')
+        processed = update_rollups(options['event_type'], options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ Folded {processed} events into the rollups')
+        )
@@ -0,0 +1,243 @@
+"""
+Merkle-root audit proofs for AidLedger
+Groups confirmed donations and distributions into fixed epochs by when
+they were confirmed, builds a Merkle tree per epoch, anchors only the root
+to HCS and serves O(log n) inclusion proofs that can be checked offline
+against the anchored root. An event confirmed late (queued during an
+outage, or part of a batch), or whose transaction commits after its epoch
+was sealed, lands in the next epoch sealed rather than in one already
+anchored.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .confirmations import settled, settled_horizon
+from .models import Donation, Distribution, MerkleEpoch, MerkleLeaf
+from .hedera_service import hedera_service
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 32
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+DONATION_FIELDS = ['txn_hash', 'amount', 'timestamp', 'donor__wallet_id', 'ngo__wallet_id']
+DISTRIBUTION_FIELDS = ['txn_hash', 'amount', 'timestamp', 'ngo__wallet_id', 'recipient__wallet_id']
+
+
+def epoch_length() -> timedelta:
+    return timedelta(minutes=getattr(settings, 'MERKLE_EPOCH_MINUTES', 60))
+
+
+def settle_delay() -> timedelta:
+    """How long an epoch must be closed before it is sealed, so events stamped near its end make it in"""
+    return timedelta(minutes=getattr(settings, 'MERKLE_SETTLE_MINUTES', 5))
+
+
+def _donation_event(row: Dict[str, Any]) -> Dict[str, str]:
+    return _event('donation', row, row['donor__wallet_id'], row['ngo__wallet_id'])
+
+
+def _distribution_event(row: Dict[str, Any]) -> Dict[str, str]:
+    return _event('distribution', row, row['ngo__wallet_id'], row['recipient__wallet_id'])
+
+
+def _event(event_type: str, row: Dict[str, Any], source: str, target: str) -> Dict[str, str]:
+    return {
+        'type': event_type,
+        'txn_hash': row['txn_hash'],
+        'amount': f"{Decimal(row['amount']):.2f}",
+        'from': source,
+        'to': target,
+        'timestamp': row['timestamp'].astimezone(dt_timezone.utc).isoformat(),
+    }
+
+
+def leaf_hash(event: Dict[str, str]) -> bytes:
+    """Hash the canonical JSON form of a ledger event"""
+    canonical = json.dumps(event, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(LEAF_PREFIX + canonical).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def level_sizes(leaf_count: int) -> List[int]:
+    """Node count of each level, leaves first; an odd last node is carried up"""
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def build_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        previous = levels[-1]
+        levels.append([
+            node_hash(previous[i], previous[i + 1]) if i + 1 < len(previous) else previous[i]
+            for i in range(0, len(previous), 2)
+        ])
+    return levels
+
+
+def inclusion_proof(levels: bytes, leaf_count: int, position: int) -> List[Dict[str, str]]:
+    """Read the sibling path for one leaf straight out of the packed levels"""
+    proof = []
+    offset, index = 0, position
+    for size in level_sizes(leaf_count)[:-1]:
+        sibling = index ^ 1
+        if sibling < size:
+            start = (offset + sibling) * HASH_SIZE
+            proof.append({
+                'side': 'left' if sibling < index else 'right',
+                'hash': bytes(levels[start:start + HASH_SIZE]).hex(),
+            })
+        offset += size
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """Recompute the root from a leaf hash and its proof (all hex encoded)"""
+    current = bytes.fromhex(leaf)
+    for step in proof:
+        sibling = bytes.fromhex(step['hash'])
+        current = node_hash(sibling, current) if step['side'] == 'left' else node_hash(current, sibling)
+    return current.hex() == root
+
+
+def _unsealed(model, horizon: int, last: Optional[MerkleEpoch]):
+    """
+    Settled events in no sealed epoch yet. An epoch holds what was settled
+    and confirmed before its end, less what older epochs hold; ends and
+    horizons only grow, so the last epoch's pair covers every older one.
+    """
+    events = settled(model.objects, horizon)
+    if last is not None:
+        events = events.exclude(confirmed_at__lt=last.epoch_end, confirmed_xid__lt=last.settled_xid)
+    return events
+
+
+def epoch_events(end: datetime, horizon: int, last: Optional[MerkleEpoch] = None) -> List[Dict[str, str]]:
+    """Unsealed events confirmed before end, in canonical leaf order"""
+    events = [
+        _donation_event(row)
+        for row in _unsealed(Donation, horizon, last).filter(confirmed_at__lt=end).values(*DONATION_FIELDS)
+    ] + [
+        _distribution_event(row)
+        for row in _unsealed(Distribution, horizon, last).filter(confirmed_at__lt=end).values(*DISTRIBUTION_FIELDS)
+    ]
+    events.sort(key=lambda event: (event['timestamp'], event['txn_hash']))
+    return events
+
+
+def event_for_txn(txn_hash: str) -> Optional[Dict[str, str]]:
+    """Current canonical form of a transaction, for recomputing its leaf"""
+    row = Donation.objects.filter(txn_hash=txn_hash).values(*DONATION_FIELDS).first()
+    if row:
+        return _donation_event(row)
+    row = Distribution.objects.filter(txn_hash=txn_hash).values(*DISTRIBUTION_FIELDS).first()
+    if row:
+        return _distribution_event(row)
+    return None
+
+
+def _next_event_time(horizon: int, last: Optional[MerkleEpoch]) -> Optional[datetime]:
+    candidates = []
+    for model in (Donation, Distribution):
+        earliest = _unsealed(model, horizon, last).aggregate(earliest=Min('confirmed_at'))['earliest']
+        if earliest is not None:
+            candidates.append(earliest)
+    return min(candidates) if candidates else None
+
+
+def _epoch_start(timestamp: datetime) -> datetime:
+    length = int(epoch_length().total_seconds())
+    seconds = int(timestamp.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % length, tz=dt_timezone.utc)
+
+
+def seal_epoch(start: datetime, horizon: int, last: Optional[MerkleEpoch] = None) -> Optional[MerkleEpoch]:
+    """Build and store the tree for the epoch beginning at start, which must follow last"""
+    end = start + epoch_length()
+    events = epoch_events(end, horizon, last)
+    if not events:
+        return None
+
+    levels = build_levels([leaf_hash(event) for event in events])
+    with transaction.atomic():
+        epoch = MerkleEpoch.objects.create(
+            epoch_start=start,
+            epoch_end=end,
+            leaf_count=len(events),
+            root=levels[-1][0].hex(),
+            levels=b''.join(node for level in levels for node in level),
+            settled_xid=horizon,
+        )
+        MerkleLeaf.objects.bulk_create([
+            MerkleLeaf(epoch=epoch, txn_hash=event['txn_hash'], position=position)
+            for position, event in enumerate(events)
+        ], batch_size=1000)
+
+    logger.info(f"Sealed Merkle epoch {start.isoformat()} with {len(events)} events")
+    return epoch
+
+
+def anchor_pending() -> int:
+    """Submit roots of sealed but unanchored epochs to HCS, oldest first"""
+    anchored = 0
+    for epoch in MerkleEpoch.objects.filter(anchor_txn_hash='').order_by('epoch_start').defer('levels'):
+        try:
+            epoch.anchor_txn_hash = hedera_service.log_merkle_root_to_hcs(
+                epoch.epoch_start.isoformat(), epoch.epoch_end.isoformat(),
+                epoch.root, epoch.leaf_count
+            )
+        except Exception as e:
+            logger.error(f"Failed to anchor epoch {epoch.epoch_start.isoformat()}: {e}")
+            break
+        epoch.save(update_fields=['anchor_txn_hash'])
+        anchored += 1
+    return anchored
+
+
+def build_epochs(until: Optional[datetime] = None, anchor: bool = True) -> List[MerkleEpoch]:
+    """
+    Seal every closed epoch since the last one, skipping empty stretches,
+    then anchor any roots not yet on HCS. Only events below the settled
+    horizon are sealed; the rest wait for a later run.
+    """
+    until = until or timezone.now() - settle_delay()
+    horizon = settled_horizon()
+    last = MerkleEpoch.objects.order_by('-epoch_end').defer('levels').first()
+    sealed = []
+
+    while True:
+        next_event = _next_event_time(horizon, last)
+        if next_event is None:
+            break
+        start = _epoch_start(next_event)
+        if last is not None:
+            start = max(start, last.epoch_end)
+        if start + epoch_length() > until:
+            break
+        epoch = seal_epoch(start, horizon, last)
+        if epoch is None:
+            break
+        sealed.append(epoch)
+        last = epoch
+
+    if anchor:
+        anchor_pending()
+    return sealed
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0002_donor_total_donated_donor_user_ngo_total_received_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=20, unique=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily'), ('month', 'Monthly')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('event_type', models.CharField(choices=[('donation', 'Donation'), ('distribution', 'Distribution')], max_length=20)),
+                ('region', models.CharField(max_length=100)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('event_count', models.IntegerField(default=0)),
+                ('min_amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('max_amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('ngo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='aidledger_app.ngo')),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'indexes': [models.Index(fields=['event_type', 'granularity', 'region', 'bucket_start'], name='aidledger_a_event_t_c5c8da_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='analyticsrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'event_type', 'bucket_start', 'ngo'), name='unique_rollup_bucket'),
+        ),
+    ]
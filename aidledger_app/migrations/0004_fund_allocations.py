@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0003_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FundAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='distribution',
+            name='allocated',
+            field=models.BooleanField(db_index=True, default=False, help_text='Whether this distribution has been traced back to donations'),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='allocated_amount',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Portion of this donation attributed to distributions', max_digits=20),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['ngo', 'timestamp'], name='aidledger_a_ngo_id_9ea1d3_idx'),
+        ),
+        migrations.AddField(
+            model_name='fundallocation',
+            name='distribution',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='aidledger_app.distribution'),
+        ),
+        migrations.AddField(
+            model_name='fundallocation',
+            name='donation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='aidledger_app.donation'),
+        ),
+        migrations.AddField(
+            model_name='fundallocation',
+            name='donor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='aidledger_app.donor'),
+        ),
+        migrations.AddField(
+            model_name='fundallocation',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='aidledger_app.recipient'),
+        ),
+        migrations.AddIndex(
+            model_name='fundallocation',
+            index=models.Index(fields=['donor', 'recipient'], name='aidledger_a_donor_i_6a075f_idx'),
+        ),
+    ]
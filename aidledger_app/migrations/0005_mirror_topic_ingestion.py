@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0004_fund_allocations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MirrorCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic_id', models.CharField(max_length=50, unique=True)),
+                ('last_consensus_timestamp', models.CharField(blank=True, max_length=30)),
+                ('last_reconciled_message_id', models.BigIntegerField(default=0)),
+                ('last_reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TopicMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic_id', models.CharField(max_length=50)),
+                ('sequence_number', models.BigIntegerField()),
+                ('consensus_timestamp', models.CharField(help_text='Seconds.nanoseconds since epoch', max_length=30)),
+                ('txn_hash', models.CharField(db_index=True, help_text='Hedera transaction id of the submission', max_length=100)),
+                ('event_type', models.CharField(db_index=True, max_length=20)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True)),
+                ('payload', models.JSONField(default=dict)),
+                ('ingested_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['topic_id', 'sequence_number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='topicmessage',
+            constraint=models.UniqueConstraint(fields=('topic_id', 'sequence_number'), name='unique_topic_sequence'),
+        ),
+    ]
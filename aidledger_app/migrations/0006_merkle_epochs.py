@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0005_mirror_topic_ingestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerkleEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('epoch_start', models.DateTimeField(unique=True)),
+                ('epoch_end', models.DateTimeField()),
+                ('leaf_count', models.IntegerField()),
+                ('root', models.CharField(help_text='Hex-encoded SHA-256 Merkle root', max_length=64)),
+                ('levels', models.BinaryField(help_text='Concatenated 32-byte node hashes, leaves first')),
+                ('anchor_txn_hash', models.CharField(blank=True, help_text='HCS transaction anchoring the root', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-epoch_start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MerkleLeaf',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('txn_hash', models.CharField(max_length=100, unique=True)),
+                ('position', models.IntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['timestamp'], name='aidledger_a_timesta_ef2d1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['timestamp'], name='aidledger_a_timesta_5c8ee5_idx'),
+        ),
+        migrations.AddField(
+            model_name='merkleleaf',
+            name='epoch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaves', to='aidledger_app.merkleepoch'),
+        ),
+    ]
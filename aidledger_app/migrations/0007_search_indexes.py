@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:29
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0006_merkle_epochs'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['txn_hash'], name='distribution_txn_hash_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['txn_hash'], name='donation_txn_hash_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='donor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='donor_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='donor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email'], name='donor_email_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='donor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['wallet_id'], name='donor_wallet_id_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='ngo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='ngo_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='ngo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['region'], name='ngo_region_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='ngo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['wallet_id'], name='ngo_wallet_id_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='ngo',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', 'region', 'description', config='simple'), name='ngo_search_vector'),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='recipient_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['location'], name='recipient_location_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['wallet_id'], name='recipient_wallet_id_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0010_account_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringDonation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=20)),
+                ('interval', models.CharField(choices=[('weekly', 'Weekly'), ('monthly', 'Monthly')], default='monthly', max_length=10)),
+                ('next_run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, help_text='Schedule run this donation pays for', null=True),
+        ),
+        migrations.AddField(
+            model_name='recurringdonation',
+            name='donor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_donations', to='aidledger_app.donor'),
+        ),
+        migrations.AddField(
+            model_name='recurringdonation',
+            name='ngo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_donations', to='aidledger_app.ngo'),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='schedule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='donations', to='aidledger_app.recurringdonation'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringdonation',
+            index=models.Index(condition=models.Q(('active', True)), fields=['next_run_at'], name='recurring_donation_due'),
+        ),
+        migrations.AddConstraint(
+            model_name='donation',
+            constraint=models.UniqueConstraint(fields=('schedule', 'scheduled_for'), name='donation_one_per_schedule_run'),
+        ),
+    ]
@@ -0,0 +1,157 @@
+# Generated by Django 4.2.7 on 2026-10-19 05:56
+
+import re
+from datetime import date
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+LEDGER_TABLES = ['aidledger_app_donation', 'aidledger_app_distribution']
+PARTITION_KEY = '"timestamp"'
+MONTHS_AHEAD = 3
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _months(first, last):
+    """First days of every month from first's to last's, inclusive"""
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        yield month
+        month = _next_month(month)
+
+
+def _unique_columns(definition, partitioned):
+    """UNIQUE (a, b) with the partition key added, or removed when going back"""
+    columns = [c.strip() for c in re.match(r'UNIQUE \((.*)\)', definition).group(1).split(',')]
+    columns = [c for c in columns if c not in (PARTITION_KEY, 'timestamp')]
+    if partitioned:
+        columns.append(PARTITION_KEY)
+    return f"UNIQUE ({', '.join(columns)})"
+
+
+def _rebuild(cursor, table, partitioned):
+    """
+    Swap a table for a copy that is (or, going back, is not) range partitioned
+    by month. Indexes and constraints are read from the catalog and recreated
+    on the copy under their original names, so Django's state still matches.
+    """
+    old = f'{table}_old'
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')", [table]
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+        [table]
+    )
+    constraint_names = {name for name, _, _ in constraints}
+    indexes = [(name, sql) for name, sql in cursor.fetchall() if name not in constraint_names]
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    for name, _, _ in constraints:
+        cursor.execute(f'ALTER TABLE {old} DROP CONSTRAINT "{name}"')
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1, MIN({PARTITION_KEY}) FROM {old}')
+    next_id, first = cursor.fetchone()
+
+    if partitioned:
+        # Identity columns cannot be used on partitioned tables before PostgreSQL 17
+        cursor.execute(f'ALTER TABLE {old} ALTER COLUMN id DROP IDENTITY')
+        cursor.execute(f'CREATE SEQUENCE {table}_id_seq START WITH {next_id}')
+        cursor.execute(
+            f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({PARTITION_KEY})'
+        )
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+        cursor.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+
+        last = date.today()
+        for _ in range(MONTHS_AHEAD):
+            last = _next_month(last)
+        for month in _months(first.date() if first else date.today(), last):
+            cursor.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{_next_month(month)} 00:00:00+00')"
+            )
+        cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    else:
+        cursor.execute(f'ALTER TABLE {old} ALTER COLUMN id DROP DEFAULT')
+        cursor.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH {next_id})'
+        )
+
+    cursor.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    cursor.execute(f'DROP TABLE {old}')
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            definition = f'PRIMARY KEY (id, {PARTITION_KEY})' if partitioned else 'PRIMARY KEY (id)'
+        elif kind == 'u':
+            definition = _unique_columns(definition, partitioned)
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+    for name, sql in indexes:
+        cursor.execute(sql.replace(' ON ONLY ', ' ON '))
+
+
+def partition_ledger_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in LEDGER_TABLES:
+            _rebuild(cursor, table, partitioned=True)
+
+
+def unpartition_ledger_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in LEDGER_TABLES:
+            _rebuild(cursor, table, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0011_recurring_donations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(choices=[('donations', 'Donations'), ('distributions', 'Distributions')], max_length=20)),
+                ('month', models.DateField(help_text='First day of the archived month')),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.IntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['table', 'month'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='fundallocation',
+            name='distribution',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='aidledger_app.distribution'),
+        ),
+        migrations.AlterField(
+            model_name='fundallocation',
+            name='donation',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='aidledger_app.donation'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedpartition',
+            constraint=models.UniqueConstraint(fields=('table', 'month'), name='unique_archived_partition'),
+        ),
+        migrations.RunPython(partition_ledger_tables, unpartition_ledger_tables),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:05
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0012_partition_ledger_tables'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ngo',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('name', models.TextField())), name='text_pattern_ops'), name='ngo_name_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('name', models.TextField())), name='text_pattern_ops'), name='recipient_name_prefix'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0013_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['status', 'timestamp'], name='aidledger_a_status_563a3d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['status', 'timestamp'], name='aidledger_a_status_3f2b61_idx'),
+        ),
+    ]
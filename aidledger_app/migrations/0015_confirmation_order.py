@@ -0,0 +1,132 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:27
+
+from django.db import migrations, models
+
+
+LEDGER_TABLES = [('donation', 'aidledger_app_donation'), ('distribution', 'aidledger_app_distribution')]
+SEQUENCE = 'aidledger_confirmation_seq'
+
+# Rows get the next confirmation number the first time they are written as
+# confirmed, whichever code path does it; the stamp never changes afterwards.
+# An explicit confirmed_at on that first write is kept (imports, fixtures).
+STAMP_FUNCTION = f"""
+CREATE FUNCTION aidledger_stamp_confirmation() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status <> 'confirmed' THEN
+        NEW.confirmed_seq := NULL;
+        NEW.confirmed_at := NULL;
+    ELSIF TG_OP = 'UPDATE' AND OLD.confirmed_seq IS NOT NULL THEN
+        NEW.confirmed_seq := OLD.confirmed_seq;
+        NEW.confirmed_at := OLD.confirmed_at;
+    ELSE
+        NEW.confirmed_seq := nextval('{SEQUENCE}');
+        NEW.confirmed_at := COALESCE(NEW.confirmed_at, clock_timestamp());
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def stamp_confirmations(apps, schema_editor):
+    """
+    Number the rows already confirmed in id order, move the rollup
+    checkpoints from ids to confirmation numbers, then install the trigger
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE}')
+        offset = 0
+        for event_type, table in LEDGER_TABLES:
+            cursor.execute(
+                f"UPDATE {table} SET confirmed_seq = numbered.seq, confirmed_at = {table}.timestamp "
+                f"FROM (SELECT id, %s + ROW_NUMBER() OVER (ORDER BY id) AS seq FROM {table} "
+                f"WHERE status = 'confirmed') numbered WHERE {table}.id = numbered.id",
+                [offset]
+            )
+            offset += cursor.rowcount
+            # The checkpoint held the last folded id; every confirmed row up to it was folded
+            cursor.execute(
+                f"UPDATE aidledger_app_analyticscheckpoint SET last_confirmed_seq = COALESCE("
+                f"(SELECT MAX(confirmed_seq) FROM {table} WHERE id <= last_confirmed_seq), 0) "
+                f"WHERE event_type = %s",
+                [event_type]
+            )
+        if offset:
+            cursor.execute(f"SELECT setval('{SEQUENCE}', %s)", [offset])
+
+        cursor.execute(STAMP_FUNCTION)
+        for _, table in LEDGER_TABLES:
+            cursor.execute(
+                f'CREATE TRIGGER {table}_confirmation BEFORE INSERT OR UPDATE ON {table} '
+                f'FOR EACH ROW EXECUTE FUNCTION aidledger_stamp_confirmation()'
+            )
+
+
+def unstamp_confirmations(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for event_type, table in LEDGER_TABLES:
+            cursor.execute(f'DROP TRIGGER {table}_confirmation ON {table}')
+            cursor.execute(
+                f"UPDATE aidledger_app_analyticscheckpoint SET last_confirmed_seq = COALESCE("
+                f"(SELECT MAX(id) FROM {table} WHERE confirmed_seq <= last_confirmed_seq), 0) "
+                f"WHERE event_type = %s",
+                [event_type]
+            )
+        cursor.execute('DROP FUNCTION aidledger_stamp_confirmation()')
+        cursor.execute(f'DROP SEQUENCE {SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0014_ledger_status_indexes'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='analyticscheckpoint',
+            old_name='last_event_id',
+            new_name='last_confirmed_seq',
+        ),
+        migrations.AddField(
+            model_name='distribution',
+            name='confirmed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='distribution',
+            name='confirmed_seq',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Position in the order rows were confirmed', null=True),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='confirmed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='confirmed_seq',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Position in the order rows were confirmed', null=True),
+        ),
+        migrations.RunPython(stamp_confirmations, unstamp_confirmations),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['confirmed_seq'], name='aidledger_a_confirm_eaecac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['confirmed_at'], name='aidledger_a_confirm_dcefb8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['confirmed_seq'], name='aidledger_a_confirm_8dffb7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['confirmed_at'], name='aidledger_a_confirm_aa1b47_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:32
+
+from django.db import migrations, models
+from django.db.models.functions import ExtractDay
+
+
+def anchor_schedules(apps, schema_editor):
+    """Anchor existing schedules on the day of their next run"""
+    RecurringDonation = apps.get_model('aidledger_app', 'RecurringDonation')
+    RecurringDonation.objects.filter(anchor_day__isnull=True).update(anchor_day=ExtractDay('next_run_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0015_confirmation_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recurringdonation',
+            name='anchor_day',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Day of the month monthly runs fall on; short months clamp to their last day', null=True),
+        ),
+        migrations.RunPython(anchor_schedules, migrations.RunPython.noop),
+    ]
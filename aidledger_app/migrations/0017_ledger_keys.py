@@ -0,0 +1,152 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:34
+
+from django.db import migrations, models
+
+
+# (key table value, ledger table, columns whose changes move the keys)
+LEDGER_TABLES = [
+    ('donations', 'aidledger_app_donation', 'txn_hash, schedule_id, scheduled_for'),
+    ('distributions', 'aidledger_app_distribution', 'txn_hash'),
+]
+
+# Distributions have no schedule columns, hence reading them through jsonb.
+# A duplicate key fails the statement that wrote the ledger row.
+GUARD_FUNCTION = """
+CREATE FUNCTION aidledger_guard_ledger_key() RETURNS trigger AS $$
+DECLARE
+    row_values jsonb := to_jsonb(NEW);
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO aidledger_app_ledgerkey ("table", row_id, txn_hash, schedule_id, scheduled_for)
+        VALUES (TG_ARGV[0], NEW.id, NEW.txn_hash,
+                (row_values ->> 'schedule_id')::bigint, (row_values ->> 'scheduled_for')::timestamptz);
+    ELSE
+        UPDATE aidledger_app_ledgerkey
+        SET txn_hash = NEW.txn_hash,
+            schedule_id = (row_values ->> 'schedule_id')::bigint,
+            scheduled_for = (row_values ->> 'scheduled_for')::timestamptz
+        WHERE "table" = TG_ARGV[0] AND row_id = NEW.id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _txn_hash_index(schema_editor, table):
+    # The name Django gives the index of a db_index=True txn_hash column
+    return schema_editor._create_index_name(table, ['txn_hash'])
+
+
+def drop_partition_keyed_uniques(apps, schema_editor):
+    """
+    Drop the unique constraints 0012 had to widen with timestamp, which no
+    longer guard anything, and give txn_hash the plain index it now declares
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE aidledger_app_donation DROP CONSTRAINT donation_one_per_schedule_run')
+        for _, table, _ in LEDGER_TABLES:
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {table}_txn_hash_key')
+            cursor.execute(f'CREATE INDEX "{_txn_hash_index(schema_editor, table)}" ON {table} (txn_hash)')
+
+
+def restore_partition_keyed_uniques(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for _, table, _ in LEDGER_TABLES:
+            cursor.execute(f'DROP INDEX "{_txn_hash_index(schema_editor, table)}"')
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_txn_hash_key UNIQUE (txn_hash, "timestamp")')
+        cursor.execute(
+            'ALTER TABLE aidledger_app_donation ADD CONSTRAINT donation_one_per_schedule_run '
+            'UNIQUE (schedule_id, scheduled_for, "timestamp")'
+        )
+
+
+def guard_ledger_keys(apps, schema_editor):
+    """
+    Take the keys of every existing ledger row, then have a trigger take
+    them for each row written from now on. Fails if duplicates slipped in
+    while only the partition-keyed constraints were in place.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO aidledger_app_ledgerkey ("table", row_id, txn_hash, schedule_id, scheduled_for) '
+            "SELECT 'donations', id, txn_hash, schedule_id, scheduled_for FROM aidledger_app_donation "
+            "UNION ALL SELECT 'distributions', id, txn_hash, NULL, NULL FROM aidledger_app_distribution"
+        )
+        cursor.execute(GUARD_FUNCTION)
+        for key_table, table, columns in LEDGER_TABLES:
+            cursor.execute(
+                f'CREATE TRIGGER {table}_ledger_key AFTER INSERT OR UPDATE OF {columns} ON {table} '
+                f"FOR EACH ROW EXECUTE FUNCTION aidledger_guard_ledger_key('{key_table}')"
+            )
+
+
+def unguard_ledger_keys(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for _, table, _ in LEDGER_TABLES:
+            cursor.execute(f'DROP TRIGGER {table}_ledger_key ON {table}')
+        cursor.execute('DROP FUNCTION aidledger_guard_ledger_key()')
+        cursor.execute('DELETE FROM aidledger_app_ledgerkey')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0016_recurring_anchor_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(choices=[('donations', 'Donations'), ('distributions', 'Distributions')], max_length=20)),
+                ('row_id', models.BigIntegerField()),
+                ('txn_hash', models.CharField(max_length=100)),
+                ('schedule_id', models.BigIntegerField(blank=True, null=True)),
+                ('scheduled_for', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name='donation',
+                    name='donation_one_per_schedule_run',
+                ),
+                migrations.AlterField(
+                    model_name='distribution',
+                    name='txn_hash',
+                    field=models.CharField(db_index=True, help_text='Hedera transaction hash', max_length=100),
+                ),
+                migrations.AlterField(
+                    model_name='donation',
+                    name='txn_hash',
+                    field=models.CharField(db_index=True, help_text='Hedera transaction hash', max_length=100),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(drop_partition_keyed_uniques, restore_partition_keyed_uniques),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerkey',
+            constraint=models.UniqueConstraint(fields=('table', 'row_id'), name='ledger_key_row'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerkey',
+            constraint=models.UniqueConstraint(fields=('table', 'txn_hash'), name='ledger_key_txn_hash'),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerkey',
+            constraint=models.UniqueConstraint(fields=('schedule_id', 'scheduled_for'), name='ledger_key_schedule_run'),
+        ),
+        migrations.RunPython(guard_ledger_keys, unguard_ledger_keys),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0017_ledger_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReplicaMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alias', models.CharField(max_length=100, unique=True)),
+                ('reason', models.CharField(max_length=20)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
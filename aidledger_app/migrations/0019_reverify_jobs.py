@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('aidledger_app', '0018_replica_marks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReverifyJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100)),
+                ('rows', models.JSONField(help_text='[txn_hash, status] of each row to check')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done')], default='pending', max_length=20)),
+                ('report', models.JSONField(blank=True, null=True)),
+                ('reported', models.BooleanField(default=False, help_text='Whether the report was shown to the admin')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reverify_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:39
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0019_reverify_jobs'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ngo',
+            name='ngo_name_prefix',
+        ),
+        migrations.RemoveIndex(
+            model_name='recipient',
+            name='recipient_name_prefix',
+        ),
+        migrations.AddIndex(
+            model_name='ngo',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('name', models.TextField())), 'C'), name='ngo_name_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='recipient',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper(django.db.models.functions.comparison.Cast('name', models.TextField())), 'C'), name='recipient_name_prefix'),
+        ),
+    ]
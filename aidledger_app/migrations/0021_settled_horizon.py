@@ -0,0 +1,113 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:51
+
+from django.db import migrations, models
+
+
+LEDGER_TABLES = ['aidledger_app_donation', 'aidledger_app_distribution']
+SEQUENCE = 'aidledger_confirmation_seq'
+
+# As in 0015, plus the id of the transaction that confirmed the row.
+# Confirmation numbers are drawn when a row is written, not when its
+# transaction commits, so on their own they do not tell a reader whether a
+# lower number may still appear; the transaction id does (confirmations.py).
+STAMP_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION aidledger_stamp_confirmation() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status <> 'confirmed' THEN
+        NEW.confirmed_seq := NULL;
+        NEW.confirmed_xid := NULL;
+        NEW.confirmed_at := NULL;
+    ELSIF TG_OP = 'UPDATE' AND OLD.confirmed_seq IS NOT NULL THEN
+        NEW.confirmed_seq := OLD.confirmed_seq;
+        NEW.confirmed_xid := OLD.confirmed_xid;
+        NEW.confirmed_at := OLD.confirmed_at;
+    ELSE
+        NEW.confirmed_seq := nextval('{SEQUENCE}');
+        NEW.confirmed_xid := pg_current_xact_id()::text::bigint;
+        NEW.confirmed_at := COALESCE(NEW.confirmed_at, clock_timestamp());
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_STAMP_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION aidledger_stamp_confirmation() RETURNS trigger AS $$
+BEGIN
+    IF NEW.status <> 'confirmed' THEN
+        NEW.confirmed_seq := NULL;
+        NEW.confirmed_at := NULL;
+    ELSIF TG_OP = 'UPDATE' AND OLD.confirmed_seq IS NOT NULL THEN
+        NEW.confirmed_seq := OLD.confirmed_seq;
+        NEW.confirmed_at := OLD.confirmed_at;
+    ELSE
+        NEW.confirmed_seq := nextval('{SEQUENCE}');
+        NEW.confirmed_at := COALESCE(NEW.confirmed_at, clock_timestamp());
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def stamp_transactions(apps, schema_editor):
+    """
+    Rows confirmed before this migration all committed long ago: give them
+    transaction 0, below any horizon, and count them into the sealed epochs
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in LEDGER_TABLES:
+            cursor.execute(f"UPDATE {table} SET confirmed_xid = 0 WHERE confirmed_seq IS NOT NULL")
+        cursor.execute("UPDATE aidledger_app_merkleepoch SET settled_xid = 1")
+        cursor.execute(STAMP_FUNCTION)
+
+
+def unstamp_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(PREVIOUS_STAMP_FUNCTION)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0020_name_prefix_collation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='distribution',
+            name='aidledger_a_confirm_eaecac_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='donation',
+            name='aidledger_a_confirm_8dffb7_idx',
+        ),
+        migrations.AddField(
+            model_name='distribution',
+            name='confirmed_xid',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Database transaction that confirmed the row', null=True),
+        ),
+        migrations.AddField(
+            model_name='donation',
+            name='confirmed_xid',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Database transaction that confirmed the row', null=True),
+        ),
+        migrations.AddField(
+            model_name='merkleepoch',
+            name='settled_xid',
+            field=models.BigIntegerField(default=0, help_text='Settled horizon when sealed; earlier events confirmed below it are in this or an older epoch'),
+        ),
+        migrations.RunPython(stamp_transactions, unstamp_transactions),
+        migrations.AddIndex(
+            model_name='distribution',
+            index=models.Index(fields=['confirmed_xid', 'confirmed_seq'], name='aidledger_a_confirm_6a415d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donation',
+            index=models.Index(fields=['confirmed_xid', 'confirmed_seq'], name='aidledger_a_confirm_630237_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0021_settled_horizon'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analyticscheckpoint',
+            name='last_confirmed_xid',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0022_rollup_checkpoint_xid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mirrorcheckpoint',
+            name='last_reconciled_xid',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
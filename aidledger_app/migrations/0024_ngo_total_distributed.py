@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:56
+
+from django.db import migrations, models
+
+
+# Live confirmed rows, plus archived months from the monthly rollups, which
+# outlive the partitions they were folded from
+BACKFILL = """
+UPDATE aidledger_app_ngo SET total_distributed = COALESCE((
+    SELECT SUM(amount) FROM aidledger_app_distribution
+    WHERE ngo_id = aidledger_app_ngo.id AND status = 'confirmed'
+), 0) + COALESCE((
+    SELECT SUM(total_amount) FROM aidledger_app_analyticsrollup
+    WHERE ngo_id = aidledger_app_ngo.id AND event_type = 'distribution' AND granularity = 'month'
+      AND (bucket_start AT TIME ZONE 'UTC')::date IN (
+          SELECT month FROM aidledger_app_archivedpartition WHERE "table" = 'distributions'
+      )
+), 0)
+"""
+
+
+def backfill_total_distributed(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(BACKFILL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aidledger_app', '0023_reconciled_xid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ngo',
+            name='total_distributed',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=20),
+        ),
+        migrations.RunPython(backfill_total_distributed, migrations.RunPython.noop),
+    ]
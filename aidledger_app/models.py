@@ -1,8 +1,20 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db.models.functions import Cast, Collate, Upper
 from django.utils import timezone
 
 
+def name_prefix_key():
+    """
+    UPPER(name::text) COLLATE "C": under the C collation one btree index on it
+    serves both a case-insensitive prefix match and the alphabetical order
+    """
+    return Collate(Upper(Cast('name', models.TextField())), 'C')
+
+
 class CustomUser(models.Model):
     """Extended user model for authentication"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -32,6 +44,11 @@ class Donor(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['name'], name='donor_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['email'], name='donor_email_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['wallet_id'], name='donor_wallet_id_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
 
 class NGO(models.Model):
@@ -42,6 +59,7 @@ class NGO(models.Model):
     wallet_id = models.CharField(max_length=50, unique=True, help_text="Hedera wallet address")
     description = models.TextField(blank=True)
     total_received = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_distributed = models.DecimalField(max_digits=20, decimal_places=2, default=0)
     created_at = models.DateTimeField(default=timezone.now)
     
     def __str__(self):
@@ -49,6 +67,17 @@ class NGO(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['name'], name='ngo_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['region'], name='ngo_region_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['wallet_id'], name='ngo_wallet_id_trgm', opclasses=['gin_trgm_ops']),
+            # Typeahead: prefix match and ordering on name_prefix_key()
+            models.Index(name_prefix_key(), name='ngo_name_prefix'),
+            GinIndex(
+                SearchVector('name', 'region', 'description', config='simple'),
+                name='ngo_search_vector'
+            ),
+        ]
 
 
 class Recipient(models.Model):
@@ -63,34 +92,71 @@ class Recipient(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            GinIndex(fields=['name'], name='recipient_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['location'], name='recipient_location_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['wallet_id'], name='recipient_wallet_id_trgm', opclasses=['gin_trgm_ops']),
+            models.Index(name_prefix_key(), name='recipient_name_prefix'),
+        ]
 
 
 class Donation(models.Model):
-    """Model representing a donation from donor to NGO"""
+    """
+    Model representing a donation from donor to NGO. The table is range
+    partitioned by month on timestamp (see partitions.py), so its unique keys
+    are enforced through LedgerKey rather than on the table itself.
+    """
     donor = models.ForeignKey(Donor, on_delete=models.CASCADE, related_name='donations')
     ngo = models.ForeignKey(NGO, on_delete=models.CASCADE, related_name='received_donations')
     amount = models.DecimalField(max_digits=20, decimal_places=2)
-    txn_hash = models.CharField(max_length=100, unique=True, help_text="Hedera transaction hash")
+    txn_hash = models.CharField(max_length=100, db_index=True, help_text="Hedera transaction hash")
     timestamp = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=20, choices=[
         ('pending', 'Pending'),
         ('confirmed', 'Confirmed'),
         ('failed', 'Failed')
     ], default='pending')
+    allocated_amount = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0,
+        help_text="Portion of this donation attributed to distributions"
+    )
+    schedule = models.ForeignKey(
+        'RecurringDonation', on_delete=models.SET_NULL, null=True, blank=True, related_name='donations'
+    )
+    scheduled_for = models.DateTimeField(null=True, blank=True, help_text="Schedule run this donation pays for")
+    # Stamped by a database trigger when the row first becomes confirmed
+    # (migrations 0015 and 0021), so consumers that follow the ledger also
+    # see rows confirmed long after they were inserted; see confirmations.py
+    confirmed_seq = models.BigIntegerField(null=True, blank=True, editable=False,
+                                           help_text="Position in the order rows were confirmed")
+    confirmed_xid = models.BigIntegerField(null=True, blank=True, editable=False,
+                                           help_text="Database transaction that confirmed the row")
+    confirmed_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     def __str__(self):
         return f"Donation: {self.donor.name} → {self.ngo.name} ({self.amount} AID)"
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['ngo', 'timestamp']),
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['status', 'timestamp']),
+            models.Index(fields=['confirmed_xid', 'confirmed_seq']),
+            models.Index(fields=['confirmed_at']),
+            GinIndex(fields=['txn_hash'], name='donation_txn_hash_trgm', opclasses=['gin_trgm_ops']),
+        ]
 
 
 class Distribution(models.Model):
-    """Model representing aid distribution from NGO to recipient"""
+    """
+    Model representing aid distribution from NGO to recipient. Partitioned
+    by month like Donation.
+    """
     ngo = models.ForeignKey(NGO, on_delete=models.CASCADE, related_name='distributions')
     recipient = models.ForeignKey(Recipient, on_delete=models.CASCADE, related_name='received_distributions')
     amount = models.DecimalField(max_digits=20, decimal_places=2)
-    txn_hash = models.CharField(max_length=100, unique=True, help_text="Hedera transaction hash")
+    txn_hash = models.CharField(max_length=100, db_index=True, help_text="Hedera transaction hash")
     timestamp = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=20, choices=[
         ('pending', 'Pending'),
@@ -98,11 +164,83 @@ class Distribution(models.Model):
         ('failed', 'Failed')
     ], default='pending')
     
+    allocated = models.BooleanField(
+        default=False, db_index=True,
+        help_text="Whether this distribution has been traced back to donations"
+    )
+    # Stamped by the same trigger as Donation's
+    confirmed_seq = models.BigIntegerField(null=True, blank=True, editable=False,
+                                           help_text="Position in the order rows were confirmed")
+    confirmed_xid = models.BigIntegerField(null=True, blank=True, editable=False,
+                                           help_text="Database transaction that confirmed the row")
+    confirmed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     def __str__(self):
         return f"Distribution: {self.ngo.name} → {self.recipient.name} ({self.amount} AID)"
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp']),
+            models.Index(fields=['status', 'timestamp']),
+            models.Index(fields=['confirmed_xid', 'confirmed_seq']),
+            models.Index(fields=['confirmed_at']),
+            GinIndex(fields=['txn_hash'], name='distribution_txn_hash_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+
+class LedgerKey(models.Model):
+    """
+    Unique keys of the partitioned ledger tables, which can only enforce
+    uniqueness together with their partition key: each row's txn_hash and
+    the schedule run a recurring donation pays for. A database trigger
+    (migration 0017) writes the row's keys here in the same statement as the
+    row, so a duplicate fails that statement. Keys outlive the rows they
+    were taken for, which keeps archived months' hashes reserved.
+    """
+    TABLE_CHOICES = [
+        ('donations', 'Donations'),
+        ('distributions', 'Distributions'),
+    ]
+    
+    table = models.CharField(max_length=20, choices=TABLE_CHOICES)
+    row_id = models.BigIntegerField()
+    txn_hash = models.CharField(max_length=100)
+    schedule_id = models.BigIntegerField(null=True, blank=True)
+    scheduled_for = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.table} {self.row_id}: {self.txn_hash}"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['table', 'row_id'], name='ledger_key_row'),
+            models.UniqueConstraint(fields=['table', 'txn_hash'], name='ledger_key_txn_hash'),
+            # A schedule run is charged at most once, however often it is claimed
+            models.UniqueConstraint(fields=['schedule_id', 'scheduled_for'], name='ledger_key_schedule_run'),
+        ]
+
+
+class FundAllocation(models.Model):
+    """Edge attributing part of a distribution to the donation that funded it"""
+    # No database FK: partitioned tables are only unique on (id, timestamp),
+    # and allocations outlive the partitions their events get archived from
+    donation = models.ForeignKey(Donation, on_delete=models.CASCADE, related_name='allocations',
+                                 db_constraint=False)
+    distribution = models.ForeignKey(Distribution, on_delete=models.CASCADE, related_name='allocations',
+                                     db_constraint=False)
+    donor = models.ForeignKey(Donor, on_delete=models.CASCADE, related_name='allocations')
+    recipient = models.ForeignKey(Recipient, on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=20, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Allocation: donation #{self.donation_id} → distribution #{self.distribution_id} ({self.amount} AID)"
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['donor', 'recipient']),
+        ]
 
 
 class AidLedgerStats(models.Model):
@@ -119,4 +257,259 @@ class AidLedgerStats(models.Model):
     
     class Meta:
         verbose_name = "AidLedger Statistics"
-        verbose_name_plural = "AidLedger Statistics"
\ No newline at end of file
+        verbose_name_plural = "AidLedger Statistics"
+
+
+class AnalyticsRollup(models.Model):
+    """Pre-aggregated donation/distribution totals per time bucket and NGO"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+        ('month', 'Monthly')
+    ]
+    EVENT_TYPE_CHOICES = [
+        ('donation', 'Donation'),
+        ('distribution', 'Distribution')
+    ]
+
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES)
+    ngo = models.ForeignKey(NGO, on_delete=models.CASCADE, related_name='rollups')
+    region = models.CharField(max_length=100)
+    total_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    event_count = models.IntegerField(default=0)
+    min_amount = models.DecimalField(max_digits=20, decimal_places=2)
+    max_amount = models.DecimalField(max_digits=20, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.event_type} {self.granularity} {self.bucket_start:%Y-%m-%d %H:%M} - {self.ngo_id}"
+
+    class Meta:
+        ordering = ['bucket_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'event_type', 'bucket_start', 'ngo'],
+                name='unique_rollup_bucket'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['event_type', 'granularity', 'region', 'bucket_start']),
+        ]
+
+
+class AnalyticsCheckpoint(models.Model):
+    """High-water mark, in confirmation order, of the last event folded into the rollups"""
+    event_type = models.CharField(max_length=20, unique=True)
+    last_confirmed_xid = models.BigIntegerField(default=0)
+    last_confirmed_seq = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.event_type} rollups up to confirmation #{self.last_confirmed_seq}"
+
+
+class TopicMessage(models.Model):
+    """Local copy of a message read back from the HCS transparency topic"""
+    topic_id = models.CharField(max_length=50)
+    sequence_number = models.BigIntegerField()
+    consensus_timestamp = models.CharField(max_length=30, help_text="Seconds.nanoseconds since epoch")
+    txn_hash = models.CharField(max_length=100, db_index=True, help_text="Hedera transaction id of the submission")
+    event_type = models.CharField(max_length=20, db_index=True)
+    amount = models.DecimalField(max_digits=20, decimal_places=2, null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    ingested_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.topic_id} #{self.sequence_number} ({self.event_type})"
+    
+    class Meta:
+        ordering = ['topic_id', 'sequence_number']
+        constraints = [
+            models.UniqueConstraint(fields=['topic_id', 'sequence_number'], name='unique_topic_sequence')
+        ]
+
+
+class MirrorCheckpoint(models.Model):
+    """Ingestion and reconciliation progress for one HCS topic"""
+    topic_id = models.CharField(max_length=50, unique=True)
+    last_consensus_timestamp = models.CharField(max_length=30, blank=True)
+    last_reconciled_message_id = models.BigIntegerField(default=0)
+    last_reconciled_at = models.DateTimeField(null=True, blank=True)
+    last_reconciled_xid = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.topic_id} @ {self.last_consensus_timestamp or 'start'}"
+
+
+class MerkleEpoch(models.Model):
+    """Merkle tree over one epoch of confirmed ledger events, anchored to HCS"""
+    epoch_start = models.DateTimeField(unique=True)
+    epoch_end = models.DateTimeField()
+    leaf_count = models.IntegerField()
+    root = models.CharField(max_length=64, help_text="Hex-encoded SHA-256 Merkle root")
+    levels = models.BinaryField(help_text="Concatenated 32-byte node hashes, leaves first")
+    anchor_txn_hash = models.CharField(max_length=100, blank=True, help_text="HCS transaction anchoring the root")
+    settled_xid = models.BigIntegerField(
+        default=0, help_text="Settled horizon when sealed; earlier events confirmed below it are in this or an older epoch"
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Epoch {self.epoch_start:%Y-%m-%d %H:%M} ({self.leaf_count} events)"
+    
+    class Meta:
+        ordering = ['-epoch_start']
+
+
+class MerkleLeaf(models.Model):
+    """Position of a transaction within its epoch's Merkle tree"""
+    epoch = models.ForeignKey(MerkleEpoch, on_delete=models.CASCADE, related_name='leaves')
+    txn_hash = models.CharField(max_length=100, unique=True)
+    position = models.IntegerField()
+    
+    def __str__(self):
+        return f"{self.txn_hash} @ {self.epoch_id}:{self.position}"
+
+
+class ResourceVersion(models.Model):
+    """Monotonic change counter per API resource, bumped on every write"""
+    resource = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.resource} v{self.version}"
+
+
+class ReplicaMark(models.Model):
+    """A read replica taken out of rotation until expires_at, seen by every process"""
+    alias = models.CharField(max_length=100, unique=True)
+    reason = models.CharField(max_length=20)
+    expires_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.alias} {self.reason} until {self.expires_at}"
+
+
+class ReverifyJob(models.Model):
+    """An admin's Mirror Node re-verification of ledger rows, and its report once run"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reverify_jobs')
+    label = models.CharField(max_length=100)
+    rows = models.JSONField(help_text="[txn_hash, status] of each row to check")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    report = models.JSONField(null=True, blank=True)
+    reported = models.BooleanField(default=False, help_text="Whether the report was shown to the admin")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"Re-verify job {self.pk}: {len(self.rows)} {self.label} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """Outcome of a write request made with an Idempotency-Key header"""
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+    
+    scope = models.CharField(max_length=50, help_text="Endpoint the key was used on")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 of the request body")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status})"
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key')
+        ]
+
+
+class PooledAccount(models.Model):
+    """Pre-created, token-associated Hedera account waiting to be handed to a new user"""
+    account_id = models.CharField(max_length=50, unique=True)
+    encrypted_key = models.TextField(help_text="Fernet-encrypted private key")
+    created_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.account_id} ({'claimed' if self.claimed_at else 'available'})"
+    
+    class Meta:
+        indexes = [
+            # Checkout only ever scans unclaimed accounts
+            models.Index(fields=['id'], condition=models.Q(claimed_at__isnull=True), name='pooled_account_available'),
+        ]
+
+
+class RecurringDonation(models.Model):
+    """A donor's standing pledge to an NGO, charged by the recurring donation scheduler"""
+    INTERVAL_CHOICES = [
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+    
+    donor = models.ForeignKey(Donor, on_delete=models.CASCADE, related_name='recurring_donations')
+    ngo = models.ForeignKey(NGO, on_delete=models.CASCADE, related_name='recurring_donations')
+    amount = models.DecimalField(max_digits=20, decimal_places=2)
+    interval = models.CharField(max_length=10, choices=INTERVAL_CHOICES, default='monthly')
+    next_run_at = models.DateTimeField(default=timezone.now)
+    anchor_day = models.PositiveSmallIntegerField(
+        null=True, blank=True, help_text="Day of the month monthly runs fall on; short months clamp to their last day"
+    )
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.donor.name} → {self.ngo.name}: {self.amount} AID {self.interval}"
+    
+    def save(self, *args, **kwargs):
+        if self.anchor_day is None:
+            self.anchor_day = self.next_run_at.day
+        super().save(*args, **kwargs)
+    
+    class Meta:
+        indexes = [
+            # The scheduler only ever scans active schedules in due order
+            models.Index(fields=['next_run_at'], condition=models.Q(active=True), name='recurring_donation_due'),
+        ]
+
+
+class ArchivedPartition(models.Model):
+    """A month of donations or distributions detached from the database into a compressed file"""
+    TABLE_CHOICES = [
+        ('donations', 'Donations'),
+        ('distributions', 'Distributions'),
+    ]
+    
+    table = models.CharField(max_length=20, choices=TABLE_CHOICES)
+    month = models.DateField(help_text="First day of the archived month")
+    path = models.CharField(max_length=500)
+    row_count = models.IntegerField()
+    sha256 = models.CharField(max_length=64)
+    archived_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"{self.table} {self.month:%Y-%m} ({self.row_count} rows)"
+    
+    class Meta:
+        ordering = ['table', 'month']
+        constraints = [
+            models.UniqueConstraint(fields=['table', 'month'], name='unique_archived_partition')
+        ]
@@ -0,0 +1,224 @@
+"""
+Monthly partitions of the Donation and Distribution tables
+Both tables are range partitioned by timestamp, one partition per calendar
+month (UTC) plus a default partition that catches anything outside them.
+Partitions are created ahead of time so inserts never land in the default,
+and closed months can be detached into indexed Parquet segments (see
+archive.py) that stay queryable, read-only, through the API.
+"""
+
+import hashlib
+import logging
+import os
+from datetime import date, datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from . import archive, caching, export
+from .models import ArchivedPartition, Donation, Distribution
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = {
+    'donations': Donation,
+    'distributions': Distribution,
+}
+
+
+def months_ahead() -> int:
+    return getattr(settings, 'PARTITION_MONTHS_AHEAD', 3)
+
+
+def archive_after_months() -> int:
+    return getattr(settings, 'ARCHIVE_AFTER_MONTHS', 24)
+
+
+def archive_dir() -> Path:
+    return Path(getattr(settings, 'LEDGER_ARCHIVE_DIR', settings.BASE_DIR / 'archive'))
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date):
+    start = datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+    following = add_months(month, 1)
+    return start, datetime(following.year, following.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(model, month: date) -> str:
+    return f"{model._meta.db_table}_p{month:%Y%m}"
+
+
+def list_partitions(model) -> List[Dict[str, Any]]:
+    """Attached partitions with their bounds and estimated row counts"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [model._meta.db_table]
+        )
+        return [{'name': name, 'bounds': bounds, 'estimated_rows': max(rows, 0)}
+                for name, bounds, rows in cursor.fetchall()]
+
+
+def create_partition(model, month: date) -> bool:
+    """
+    Add the partition for a month; False if it already exists. Rows for
+    that month that fell into the default partition are moved into it.
+    """
+    table = model._meta.db_table
+    name = partition_name(model, month)
+    start, end = month_bounds(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+        cursor.execute(f'CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {table}_default WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved',
+            [start, end]
+        )
+        # Attaching builds the partition's copies of the parent's indexes and foreign keys
+        cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [start, end])
+    logger.info(f"Created partition {name}")
+    return True
+
+
+def ensure_partitions(ahead: Optional[int] = None, today: Optional[date] = None) -> List[str]:
+    """Create any missing partitions from this month to ahead months out; returns the new ones"""
+    ahead = months_ahead() if ahead is None else ahead
+    this_month = (today or date.today()).replace(day=1)
+    created = []
+    for model in PARTITIONED_TABLES.values():
+        for offset in range(ahead + 1):
+            month = add_months(this_month, offset)
+            if create_partition(model, month):
+                created.append(partition_name(model, month))
+    return created
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _blocking_rows(table: str, start: datetime, end: datetime) -> int:
+    """Rows the rest of the app may still update: pending ones and those with funds left to trace"""
+    rows = PARTITIONED_TABLES[table].objects.filter(timestamp__gte=start, timestamp__lt=end)
+    if table == 'donations':
+        unsettled = Q(status='pending') | Q(status='confirmed', allocated_amount__lt=F('amount'))
+    else:
+        unsettled = Q(status='pending') | Q(status='confirmed', allocated=False)
+    return rows.filter(unsettled).count()
+
+
+def archive_partition(table: str, month: date, directory: Optional[Path] = None,
+                      force: bool = False) -> ArchivedPartition:
+    """
+    Write a month's partition to an indexed, zstd-compressed Parquet segment,
+    then detach and drop it. Writes to the month are blocked while it is archived.
+    Refuses months with rows still in play unless force is set.
+    """
+    model = PARTITIONED_TABLES[table]
+    name = partition_name(model, month)
+    start, end = month_bounds(month)
+    directory = Path(directory or archive_dir()) / table
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{month:%Y-%m}.parquet"
+    partial = path.with_suffix('.parquet.partial')
+    indexes = archive.index_paths(path)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [name])
+            if cursor.fetchone()[0] is None:
+                raise ValueError(f"No partition {name}")
+            cursor.execute(f'LOCK TABLE {name} IN SHARE MODE')
+
+        blocking = _blocking_rows(table, start, end)
+        if blocking and not force:
+            raise ValueError(f"{name} has {blocking} rows that are pending or not fully allocated")
+
+        try:
+            with open(partial, 'wb') as sink:
+                rows = export.write_table(
+                    table, sink, 'parquet', row_group_size=archive.SEGMENT_ROW_GROUP_SIZE,
+                    queryset=model.objects.filter(timestamp__gte=start, timestamp__lt=end).order_by('timestamp', 'id')
+                )
+                sink.flush()
+                os.fsync(sink.fileno())
+            archive.build_indexes(table, partial, target=path)
+
+            with connection.cursor() as cursor:
+                # Deferred foreign key checks queued in this transaction would block the drop
+                cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+                cursor.execute(f'ALTER TABLE {model._meta.db_table} DETACH PARTITION {name}')
+                cursor.execute(f'DROP TABLE {name}')
+            archived = ArchivedPartition.objects.create(
+                table=table, month=month, path=str(path), row_count=rows, sha256=_sha256(partial)
+            )
+            os.replace(partial, path)
+        except Exception:
+            for leftover in (partial, *indexes):
+                leftover.unlink(missing_ok=True)
+            raise
+
+    # Cached list pages may still hold rows from the dropped partition
+    caching.bump_version(model._meta.model_name)
+    logger.info(f"Archived {rows} rows of {name} to {path}")
+    return archived
+
+
+def archive_old_partitions(older_than: Optional[int] = None, directory: Optional[Path] = None,
+                           force: bool = False, today: Optional[date] = None) -> List[ArchivedPartition]:
+    """Archive every monthly partition that ended more than older_than months ago"""
+    older_than = archive_after_months() if older_than is None else older_than
+    cutoff = add_months((today or date.today()).replace(day=1), -older_than)
+    archived = []
+    for table, model in PARTITIONED_TABLES.items():
+        prefix = f"{model._meta.db_table}_p"
+        for partition in list_partitions(model):
+            if not partition['name'].startswith(prefix):
+                continue
+            stamp = partition['name'][len(prefix):]
+            month = date(int(stamp[:4]), int(stamp[4:]), 1)
+            if month >= cutoff:
+                continue
+            try:
+                archived.append(archive_partition(table, month, directory, force))
+            except ValueError as e:
+                logger.warning(f"Skipped archiving {partition['name']}: {e}")
+    return archived
+
+
+def read_archive(archive: ArchivedPartition, filters: Optional[Dict[str, Any]] = None,
+                 offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """Rows of an archived month matching column equality filters, memory-mapped from its file"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    data = pq.read_table(archive.path, memory_map=True)
+    for column, value in (filters or {}).items():
+        values = data[column]
+        if pa.types.is_dictionary(values.type):
+            values = pc.cast(values, values.type.value_type)
+        data = data.filter(pc.equal(values, value))
+    page = data.slice(offset, limit)
+    rows = page.to_pylist()
+    for row in rows:
+        row['amount'] = str(row['amount'])
+        row['timestamp'] = row['timestamp'].isoformat()
+    return {'count': data.num_rows, 'results': rows}
@@ -0,0 +1,219 @@
+"""
+Ledger-to-database reconciliation for AidLedger
+Ingests the HCS transparency topic from the Mirror Node into TopicMessage
+rows, then checks them against Donation/Distribution with set-based queries.
+A batch message anchors many rows, stored as "<txn id>#<position>".
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, F, Func, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .confirmations import settled, settled_horizon
+from .ledger import BATCH_SEPARATOR
+from .models import Donation, Distribution, TopicMessage, MirrorCheckpoint
+from .hedera_service import hedera_service
+
+logger = logging.getLogger(__name__)
+
+EVENT_MODELS = {
+    'donation': Donation,
+    'distribution': Distribution,
+}
+
+# Topic message types recorded as rows of each model
+MESSAGE_TYPES = {
+    'donation': ['donation', 'donation_batch'],
+    'distribution': ['distribution', 'distribution_batch'],
+}
+
+
+class AnchorHash(Func):
+    """The submission a row was logged in: txn_hash up to any batch position suffix"""
+    function = 'split_part'
+    output_field = CharField()
+
+    def __init__(self, expression):
+        super().__init__(expression, Value(BATCH_SEPARATOR), Value(1))
+
+
+def _anchored(model):
+    return model.objects.annotate(anchor=AnchorHash('txn_hash'))
+
+
+def consensus_to_datetime(consensus_timestamp: str) -> datetime:
+    """Convert a Mirror Node 'seconds.nanos' timestamp to an aware datetime"""
+    seconds, _, nanos = consensus_timestamp.partition('.')
+    return datetime.fromtimestamp(int(seconds), tz=dt_timezone.utc) + timedelta(
+        microseconds=int((nanos or '0').ljust(9, '0')[:6])
+    )
+
+
+def parse_message(topic_id: str, message: Dict[str, Any]) -> TopicMessage:
+    """Build a TopicMessage from a raw Mirror Node message"""
+    try:
+        payload = json.loads(base64.b64decode(message.get('message', '')))
+        if not isinstance(payload, dict):
+            payload = {}
+    except ValueError:
+        payload = {}
+
+    try:
+        amount = Decimal(str(payload['amount'])).quantize(Decimal('0.01'))
+    except (KeyError, InvalidOperation):
+        amount = None
+
+    # The submitting transaction id is what the DB stores as txn_hash
+    initial_id = (message.get('chunk_info') or {}).get('initial_transaction_id') or {}
+    if initial_id.get('account_id') and initial_id.get('transaction_valid_start'):
+        txn_hash = f"{initial_id['account_id']}@{initial_id['transaction_valid_start']}"
+    else:
+        txn_hash = ''
+
+    return TopicMessage(
+        topic_id=topic_id,
+        sequence_number=message['sequence_number'],
+        consensus_timestamp=message['consensus_timestamp'],
+        txn_hash=txn_hash,
+        event_type=payload.get('type', 'unknown'),
+        amount=amount,
+        payload=payload,
+    )
+
+
+def ingest_topic(topic_id: Optional[str] = None, page_size: int = 100) -> int:
+    """Store topic messages newer than the checkpoint; returns how many were read"""
+    topic_id = topic_id or settings.HEDERA_CONFIG['TOPIC_ID']
+    checkpoint, created = MirrorCheckpoint.objects.get_or_create(topic_id=topic_id)
+    ingested = 0
+
+    for page in hedera_service.get_topic_messages(
+        topic_id, checkpoint.last_consensus_timestamp or None, page_size
+    ):
+        with transaction.atomic():
+            TopicMessage.objects.bulk_create(
+                [parse_message(topic_id, message) for message in page],
+                ignore_conflicts=True
+            )
+            checkpoint.last_consensus_timestamp = page[-1]['consensus_timestamp']
+            checkpoint.save()
+        ingested += len(page)
+
+    logger.info(f"Ingested {ingested} messages from topic {topic_id}")
+    return ingested
+
+
+def reconcile(topic_id: Optional[str] = None, full: bool = False,
+              grace: timedelta = timedelta(minutes=5)) -> Dict[str, Any]:
+    """
+    Compare ingested topic messages with confirmed DB rows and report events
+    missing on either side, duplicated on the topic, or disagreeing on amount.
+    Incremental runs only look at messages added and rows confirmed since
+    the last run. DB rows confirmed after the ingested consensus time (less
+    a grace period), or whose transaction is still committing, are left for
+    a later run, since the topic may simply not have been read yet.
+    """
+    topic_id = topic_id or settings.HEDERA_CONFIG['TOPIC_ID']
+    checkpoint, created = MirrorCheckpoint.objects.get_or_create(topic_id=topic_id)
+    horizon = settled_horizon()
+
+    topic_messages = TopicMessage.objects.filter(topic_id=topic_id)
+    new_messages = topic_messages
+    if not full:
+        new_messages = new_messages.filter(id__gt=checkpoint.last_reconciled_message_id)
+    last_message_id = new_messages.aggregate(last=Max('id'))['last']
+
+    cutoff = None
+    if checkpoint.last_consensus_timestamp:
+        cutoff = consensus_to_datetime(checkpoint.last_consensus_timestamp) - grace
+
+    report = {
+        'topic_id': topic_id,
+        'messages_checked': new_messages.count(),
+        'missing_on_ledger': {},
+        'missing_in_db': {},
+        'mismatched': {},
+        'duplicates': [],
+    }
+
+    for event_type, model in EVENT_MODELS.items():
+        # Confirmed rows whose submission never reached the topic
+        missing_on_ledger = []
+        if cutoff is not None:
+            rows = settled(_anchored(model), horizon).filter(confirmed_at__lte=cutoff)
+            if not full and checkpoint.last_reconciled_at:
+                # Both bounds only grow, so the last run's pair covers every run before it
+                rows = rows.exclude(
+                    confirmed_at__lte=checkpoint.last_reconciled_at,
+                    confirmed_xid__lt=checkpoint.last_reconciled_xid,
+                )
+            missing_on_ledger = list(
+                rows.exclude(anchor__in=topic_messages.values('txn_hash'))
+                .values_list('txn_hash', flat=True)
+            )
+        report['missing_on_ledger'][event_type] = missing_on_ledger
+
+        typed_messages = new_messages.filter(event_type__in=MESSAGE_TYPES[event_type])
+
+        # Topic messages with no matching row
+        report['missing_in_db'][event_type] = list(
+            typed_messages.exclude(txn_hash__in=_anchored(model).values('anchor'))
+            .values('sequence_number', 'txn_hash', 'amount')
+        )
+
+        # Rows present on both sides that disagree; a batch is compared on its total
+        matched = _anchored(model).filter(anchor=OuterRef('txn_hash'))
+        report['mismatched'][event_type] = list(
+            typed_messages
+            .annotate(
+                db_amount=Subquery(
+                    matched.values('anchor').annotate(total=Sum('amount')).values('total')[:1]
+                ),
+                db_status=Coalesce(
+                    Subquery(matched.exclude(status='confirmed').values('status')[:1]),
+                    Subquery(matched.values('status')[:1]),
+                ),
+            )
+            .filter(db_status__isnull=False)
+            .filter(
+                Q(amount__isnull=True) | ~Q(amount=F('db_amount')) | ~Q(db_status='confirmed')
+            )
+            .values('sequence_number', 'txn_hash', 'amount', 'db_amount', 'db_status')
+        )
+
+    # The same submission recorded more than once on the topic
+    report['duplicates'] = list(
+        topic_messages
+        .filter(txn_hash__in=new_messages.exclude(txn_hash='').values('txn_hash'))
+        .values('txn_hash')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by('txn_hash')
+    )
+
+    if last_message_id is not None:
+        checkpoint.last_reconciled_message_id = last_message_id
+    if cutoff is not None:
+        checkpoint.last_reconciled_at = cutoff
+        checkpoint.last_reconciled_xid = horizon
+    checkpoint.save()
+
+    problems = (
+        sum(len(v) for v in report['missing_on_ledger'].values())
+        + sum(len(v) for v in report['missing_in_db'].values())
+        + sum(len(v) for v in report['mismatched'].values())
+        + len(report['duplicates'])
+    )
+    if problems:
+        logger.warning(f"Reconciliation of topic {topic_id} found {problems} discrepancies")
+    else:
+        logger.info(f"Reconciliation of topic {topic_id} found no discrepancies")
+    return report
@@ -0,0 +1,116 @@
+"""
+Recurring donation scheduler for AidLedger
+Due schedules are found through a partial index on next_run_at and claimed
+in chunks with FOR UPDATE SKIP LOCKED, so any number of workers can run the
+scheduler side by side. Each claimed run becomes a pending donation in the
+same transaction that advances the schedule, and the chunk is then anchored
+to HCS through the bulk donation path. A run is charged at most once: the
+(schedule, scheduled_for) pair is a unique LedgerKey.
+"""
+
+import calendar
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import ledger
+from .models import Donation, RecurringDonation
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_size() -> int:
+    return getattr(settings, 'RECURRING_CHUNK_SIZE', 250)
+
+
+def max_per_pass() -> int:
+    return getattr(settings, 'RECURRING_MAX_PER_PASS', 5000)
+
+
+def max_catch_up() -> int:
+    return getattr(settings, 'RECURRING_MAX_CATCH_UP', 3)
+
+
+def advance(when: datetime, interval: str, anchor_day: Optional[int] = None) -> datetime:
+    """
+    The run after when: a week later, or the anchor day (when's day by
+    default) of next month, clamped to that month's length. Clamping starts
+    from the anchor every time, so a short month never moves later runs.
+    """
+    if interval == 'weekly':
+        return when + timedelta(weeks=1)
+    year, month = divmod(when.year * 12 + when.month, 12)
+    month += 1
+    day = anchor_day or when.day
+    return when.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def _next_run(schedule: RecurringDonation, when: datetime) -> datetime:
+    return advance(when, schedule.interval, schedule.anchor_day)
+
+
+def _skip_missed(schedule: RecurringDonation, now: datetime) -> int:
+    """Move a schedule that fell far behind up to its oldest run still worth charging"""
+    missed = [schedule.next_run_at]
+    while _next_run(schedule, missed[-1]) <= now:
+        missed.append(_next_run(schedule, missed[-1]))
+    skipped = max(0, len(missed) - max_catch_up())
+    schedule.next_run_at = missed[skipped]
+    return skipped
+
+
+def _claim_chunk(now: datetime, size: int) -> Tuple[int, List[Donation]]:
+    """Charge the next run of up to size due schedules no other worker holds; (claimed, donations)"""
+    with transaction.atomic():
+        schedules = list(
+            RecurringDonation.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('donor', 'ngo')
+            .filter(active=True, next_run_at__lte=now)
+            .order_by('next_run_at')[:size]
+        )
+        if not schedules:
+            return 0, []
+
+        runs = []
+        for schedule in schedules:
+            skipped = _skip_missed(schedule, now)
+            if skipped:
+                logger.warning(f"Skipped {skipped} missed runs of recurring donation {schedule.pk}")
+            runs.append((schedule, schedule.next_run_at))
+            schedule.last_run_at = schedule.next_run_at
+            schedule.next_run_at = _next_run(schedule, schedule.next_run_at)
+
+        # A run can only be charged twice if its schedule was moved back by hand
+        charged = set(Donation.objects.filter(
+            schedule__in=schedules, scheduled_for__in=[when for _, when in runs]
+        ).values_list('schedule_id', 'scheduled_for'))
+        donations = ledger.create_pending_donations([
+            (schedule.donor, schedule.ngo, schedule.amount, {'schedule': schedule, 'scheduled_for': when})
+            for schedule, when in runs if (schedule.pk, when) not in charged
+        ])
+        RecurringDonation.objects.bulk_update(schedules, ['next_run_at', 'last_run_at'])
+    return len(schedules), donations
+
+
+def run_due(now: Optional[datetime] = None, limit: Optional[int] = None) -> int:
+    """
+    Charge due runs, oldest first, until none are left or limit runs have
+    been charged; returns how many were charged. After downtime the backlog
+    is worked off over several passes instead of all at once.
+    """
+    now = now or timezone.now()
+    limit = max_per_pass() if limit is None else limit
+    charged = 0
+    while charged < limit:
+        claimed, donations = _claim_chunk(now, min(chunk_size(), limit - charged))
+        if not claimed:
+            break
+        ledger.anchor_donation_batch(donations)
+        charged += len(donations)
+
+    logger.info(f"Charged {charged} recurring donations")
+    return charged
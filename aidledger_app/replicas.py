@@ -0,0 +1,201 @@
+"""
+Read-replica routing for AidLedger
+Views wrapped in @replica_reads send their queries to a healthy streaming
+replica; every other view, and every write, uses the primary. A client that
+has just written is pinned to the primary for a short window by a cookie,
+so it always reads its own writes. Replicas found lagging or unreachable
+are marked in the primary database, where every web worker and the
+check_replicas command see the same marks, and skipped until the mark
+expires; check_replicas() measures lag and is run periodically by a command.
+"""
+
+import asyncio
+import functools
+import logging
+import math
+import random
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, OperationalError, connections
+from django.utils import timezone
+from django.utils.decorators import sync_and_async_middleware
+
+from .models import ReplicaMark
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'aidledger_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+# Replica chosen for the current request's reads; None means the primary
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def replica_aliases() -> List[str]:
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def read_your_writes_seconds() -> float:
+    return getattr(settings, 'REPLICA_READ_YOUR_WRITES_SECONDS', 5)
+
+
+def max_lag_seconds() -> float:
+    return getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 10)
+
+
+def mark_seconds() -> int:
+    return getattr(settings, 'REPLICA_MARK_SECONDS', 30)
+
+
+def mark_replica(alias: str, reason: str, seconds: Optional[int] = None) -> None:
+    """Take a replica out of rotation, in every process, until the mark expires"""
+    expires_at = timezone.now() + timedelta(seconds=seconds or mark_seconds())
+    ReplicaMark.objects.update_or_create(alias=alias, defaults={'reason': reason, 'expires_at': expires_at})
+    logger.warning(f"Replica {alias} marked {reason}")
+
+
+def clear_mark(alias: str) -> None:
+    ReplicaMark.objects.filter(alias=alias).delete()
+
+
+def marks() -> Dict[str, str]:
+    """Reason each replica is out of rotation, keyed by alias"""
+    aliases = replica_aliases()
+    if not aliases:
+        return {}
+    # Always from the primary: a lagging replica would report stale marks
+    return dict(
+        ReplicaMark.objects.using(DEFAULT_DB_ALIAS)
+        .filter(alias__in=aliases, expires_at__gt=timezone.now())
+        .values_list('alias', 'reason')
+    )
+
+
+def choose_replica() -> Optional[str]:
+    """A replica in rotation, or None to read from the primary"""
+    marked = marks()
+    healthy = [alias for alias in replica_aliases() if alias not in marked]
+    return random.choice(healthy) if healthy else None
+
+
+def measure_lag(alias: str) -> Optional[float]:
+    """Seconds the replica's replay is behind; None if it is not in recovery"""
+    with connections[alias].cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return None if lag is None else float(lag)
+
+
+def check_replicas() -> Dict[str, Dict[str, object]]:
+    """Measure every replica and mark those lagging or unreachable"""
+    report = {}
+    for alias in replica_aliases():
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError as e:
+            logger.error(f"Replica {alias} is unreachable: {e}")
+            mark_replica(alias, 'unreachable')
+            report[alias] = {'state': 'unreachable', 'lag': None}
+            continue
+        finally:
+            # A failed connection must not be reused by the next check
+            connections[alias].close_if_unusable_or_obsolete()
+
+        if lag is None:
+            mark_replica(alias, 'not_replica')
+            state = 'not_replica'
+        elif lag > max_lag_seconds():
+            mark_replica(alias, 'lagging')
+            state = 'lagging'
+        else:
+            clear_mark(alias)
+            state = 'ok'
+        report[alias] = {'state': state, 'lag': lag}
+    return report
+
+
+def pinned(request) -> bool:
+    """True while the client is within its read-your-writes window"""
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _pin(request, response):
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        window = read_your_writes_seconds()
+        response.set_cookie(
+            PIN_COOKIE, f"{time.time() + window:.3f}",
+            max_age=math.ceil(window), httponly=True, samesite='Lax'
+        )
+    return response
+
+
+@sync_and_async_middleware
+def primary_pinning_middleware(get_response):
+    """Pin a client to the primary for a few seconds after each successful write"""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            return _pin(request, await get_response(request))
+    else:
+        def middleware(request):
+            return _pin(request, get_response(request))
+    return middleware
+
+
+def replica_reads(view):
+    """
+    Route a read-only view's queries to a replica. Pinned clients and
+    non-GET requests stay on the primary; if the replica fails mid-request
+    it is marked and the view is run again on the primary.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = None
+        if request.method in SAFE_METHODS and not pinned(request):
+            alias = choose_replica()
+        if alias is None:
+            return view(request, *args, **kwargs)
+
+        token = _read_alias.set(alias)
+        try:
+            return view(request, *args, **kwargs)
+        except OperationalError as e:
+            logger.error(f"Read from replica {alias} failed, retrying on the primary: {e}")
+            mark_replica(alias, 'unreachable')
+        finally:
+            _read_alias.reset(token)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Reads go where @replica_reads pointed them; writes and migrations to the primary"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
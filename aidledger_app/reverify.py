@@ -0,0 +1,176 @@
+"""
+Background re-verification of ledger rows against the Mirror Node
+Started from the admin: the selected rows are saved as a ReverifyJob and
+their transactions looked up concurrently through the pooled async Mirror
+Node client, on a worker thread, so the admin request returns at once. Rows
+anchored by the same batch message share one lookup. The report is stored
+on the job for the admin who started it. Jobs a restart left unfinished are
+picked up by the run_reverify_jobs command.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import async_ledger
+from .ledger import BATCH_SEPARATOR, QUEUED_PREFIX
+from .models import ReverifyJob
+
+logger = logging.getLogger(__name__)
+
+MISMATCH_SAMPLE = 20
+REPORT_RETENTION = timedelta(days=1)
+
+
+def concurrency() -> int:
+    return getattr(settings, 'REVERIFY_CONCURRENCY', 20)
+
+
+def max_rows() -> int:
+    return getattr(settings, 'REVERIFY_MAX_ROWS', 10000)
+
+
+def lease() -> timedelta:
+    """How long a running job is honoured; past it the worker running it is presumed dead"""
+    return timedelta(seconds=getattr(settings, 'REVERIFY_LEASE_SECONDS', 600))
+
+
+def anchor_of(txn_hash: str) -> str:
+    return txn_hash.split(BATCH_SEPARATOR, 1)[0]
+
+
+def _outcome(result: Dict[str, Any]) -> str:
+    """'success', 'failed', 'missing' or 'error' for a Mirror Node lookup"""
+    if 'error' in result:
+        return 'missing' if result.get('status_code') == 404 else 'error'
+    transactions = result.get('transactions') or []
+    if not transactions:
+        return 'missing'
+    return 'success' if transactions[0].get('result') == 'SUCCESS' else 'failed'
+
+
+async def check_anchors(anchors: List[str]) -> Dict[str, str]:
+    """Outcome for each anchor transaction, at most concurrency() lookups in flight"""
+    semaphore = asyncio.Semaphore(concurrency())
+
+    async def check(anchor):
+        async with semaphore:
+            return anchor, _outcome(await async_ledger.verify_transaction(anchor))
+
+    try:
+        return dict(await asyncio.gather(*(check(anchor) for anchor in anchors)))
+    finally:
+        await async_ledger.get_client().aclose()
+
+
+def compare(rows: List[Tuple[str, str]], outcomes: Dict[str, str]) -> Dict[str, Any]:
+    """Tally rows against their anchors' outcomes; a mismatch is a status the network disagrees with"""
+    report = {'rows': len(rows), 'verified': 0, 'queued': 0, 'unreachable': 0, 'mismatched': 0, 'sample': []}
+    for txn_hash, status in rows:
+        if txn_hash.startswith(QUEUED_PREFIX):
+            report['queued'] += 1
+            continue
+        outcome = outcomes[anchor_of(txn_hash)]
+        if outcome == 'error':
+            report['unreachable'] += 1
+        elif (outcome == 'success') == (status == 'confirmed'):
+            report['verified'] += 1
+        else:
+            report['mismatched'] += 1
+            if len(report['sample']) < MISMATCH_SAMPLE:
+                report['sample'].append(f"{txn_hash} ({status}, network: {outcome})")
+    return report
+
+
+def _claim(job_id: int) -> Optional[ReverifyJob]:
+    """Take a pending job, or one whose worker outlived its lease; None if another worker holds it"""
+    now = timezone.now()
+    claimed = ReverifyJob.objects.filter(
+        Q(status='pending') | Q(status='running', started_at__lt=now - lease()), pk=job_id
+    ).update(status='running', started_at=now)
+    return ReverifyJob.objects.get(pk=job_id) if claimed else None
+
+
+def run_job(job_id: int) -> Optional[Dict[str, Any]]:
+    """Verify a job's rows and store its report; None if the job was not claimed"""
+    job = _claim(job_id)
+    if job is None:
+        return None
+
+    rows = [tuple(row) for row in job.rows]
+    anchors = sorted({anchor_of(txn_hash) for txn_hash, _ in rows if not txn_hash.startswith(QUEUED_PREFIX)})
+    try:
+        outcomes = asyncio.run(check_anchors(anchors)) if anchors else {}
+        report = compare(rows, outcomes)
+    except Exception as e:
+        logger.error(f"Re-verification job {job.pk} failed: {e}")
+        report = {'rows': len(rows), 'error': str(e)}
+    report.update({'job': job.pk, 'label': job.label})
+
+    ReverifyJob.objects.filter(pk=job.pk).update(status='done', report=report, finished_at=timezone.now())
+    logger.info(f"Re-verification job {job.pk} finished: {report}")
+    return report
+
+
+def _run_in_background(job_id: int) -> None:
+    try:
+        run_job(job_id)
+    finally:
+        # The thread's connection would otherwise stay open until the process exits
+        connection.close()
+
+
+def _launch(job_id: int) -> None:
+    threading.Thread(
+        target=_run_in_background, args=(job_id,), name=f"reverify-{job_id}", daemon=True
+    ).start()
+
+
+def start(queryset, user_id: int) -> Tuple[int, int, bool]:
+    """Queue a job for a queryset's rows and run it once saved; (job id, rows taken, whether it was truncated)"""
+    limit = max_rows()
+    rows = list(queryset.order_by().values_list('txn_hash', 'status')[:limit + 1])
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+
+    job = ReverifyJob.objects.create(
+        user_id=user_id, label=queryset.model._meta.verbose_name_plural, rows=[list(row) for row in rows]
+    )
+    transaction.on_commit(lambda: _launch(job.pk))
+    return job.pk, len(rows), truncated
+
+
+def run_unfinished() -> int:
+    """
+    Run jobs that are still pending or whose worker died, oldest first, and
+    delete reports delivered over a day ago; returns the jobs run
+    """
+    now = timezone.now()
+    ReverifyJob.objects.filter(reported=True, finished_at__lt=now - REPORT_RETENTION).delete()
+
+    unfinished = (
+        ReverifyJob.objects
+        .filter(Q(status='pending') | Q(status='running', started_at__lt=now - lease()))
+        .order_by('created_at')
+        .values_list('pk', flat=True)
+    )
+    return sum(run_job(job_id) is not None for job_id in list(unfinished))
+
+
+def pop_reports(user_id: int) -> List[Dict[str, Any]]:
+    """Finished reports for an admin, each handed out once"""
+    with transaction.atomic():
+        jobs = list(
+            ReverifyJob.objects.select_for_update(skip_locked=True)
+            .filter(user_id=user_id, status='done', reported=False)
+            .order_by('finished_at')
+        )
+        ReverifyJob.objects.filter(pk__in=[job.pk for job in jobs]).update(reported=True)
+    return [job.report for job in jobs]
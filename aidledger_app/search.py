@@ -0,0 +1,127 @@
+"""
+Indexed search for AidLedger
+Fuzzy name matching through pg_trgm word similarity, substring matching on
+wallet ids and txn hashes through the same trigram GIN indexes, and NGO
+full-text through a tsvector expression index. Shared by the public API
+and the Django admin. Typeahead uses name prefix matches served by btree
+text_pattern_ops indexes on UPPER(name).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.contrib.postgres.search import SearchQuery, SearchVector, TrigramWordSimilarity
+from django.db.models import Case, F, FloatField, Q, QuerySet, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Donor, NGO, Recipient, Donation, Distribution, name_prefix_key
+
+MIN_QUERY_LENGTH = 3
+DEFAULT_LIMIT = 20
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 25
+
+# Typo-tolerant fields are matched with `%>` (word similarity); exact fields
+# with LIKE '%term%'. Every column listed here has a gin_trgm_ops index.
+SEARCH_FIELDS = {
+    Donor: {'fuzzy': ['name', 'email'], 'exact': ['wallet_id']},
+    NGO: {'fuzzy': ['name', 'region'], 'exact': ['wallet_id']},
+    Recipient: {'fuzzy': ['name', 'location'], 'exact': ['wallet_id']},
+    Donation: {'fuzzy': ['donor__name', 'ngo__name'], 'exact': ['txn_hash']},
+    Distribution: {'fuzzy': ['ngo__name', 'recipient__name'], 'exact': ['txn_hash']},
+}
+
+SEARCH_TYPES = {
+    'donor': Donor,
+    'ngo': NGO,
+    'recipient': Recipient,
+    'donation': Donation,
+    'distribution': Distribution,
+}
+
+# Typeahead kind -> (model, field shown next to the name)
+SUGGEST_TYPES = {
+    'ngo': (NGO, 'region'),
+    'recipient': (Recipient, 'location'),
+}
+
+# Must match the ngo_search_vector index expression exactly
+NGO_SEARCH_VECTOR = SearchVector('name', 'region', 'description', config='simple')
+
+
+def _match(model, term: str) -> Q:
+    config = SEARCH_FIELDS[model]
+    condition = Q()
+    for field in config['fuzzy']:
+        condition |= Q(**{f'{field}__trigram_word_similar': term})
+    for field in config['exact']:
+        condition |= Q(**{f'{field}__contains': term})
+    if model is NGO:
+        condition |= Q(search_document=SearchQuery(term, config='simple', search_type='websearch'))
+    return condition
+
+
+def _rank(model, term: str):
+    config = SEARCH_FIELDS[model]
+    parts = [TrigramWordSimilarity(term, field) for field in config['fuzzy']]
+    parts += [
+        Case(When(**{f'{field}__contains': term}, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+        for field in config['exact']
+    ]
+    return parts[0] if len(parts) == 1 else Greatest(*parts)
+
+
+def filter_queryset(queryset: QuerySet, term: str) -> QuerySet:
+    """Restrict a queryset to index-backed matches for term, best first"""
+    model = queryset.model
+    if model is NGO:
+        queryset = queryset.annotate(search_document=NGO_SEARCH_VECTOR)
+    return (queryset
+            .filter(_match(model, term))
+            .annotate(search_rank=_rank(model, term))
+            .order_by('-search_rank', '-pk'))
+
+
+def _describe(kind: str, obj) -> Dict[str, Any]:
+    if kind == 'donor':
+        return {'label': obj.name, 'detail': obj.email, 'reference': obj.wallet_id}
+    if kind == 'ngo':
+        return {'label': obj.name, 'detail': obj.region, 'reference': obj.wallet_id}
+    if kind == 'recipient':
+        return {'label': obj.name, 'detail': obj.location, 'reference': obj.wallet_id}
+    if kind == 'donation':
+        return {'label': f"{obj.donor.name} → {obj.ngo.name}", 'detail': f"{obj.amount} AID",
+                'reference': obj.txn_hash}
+    return {'label': f"{obj.ngo.name} → {obj.recipient.name}", 'detail': f"{obj.amount} AID",
+            'reference': obj.txn_hash}
+
+
+def search(term: str, types: Optional[Iterable[str]] = None, limit: int = DEFAULT_LIMIT) -> List[Dict[str, Any]]:
+    """Search entities and transactions, merged and ranked by similarity"""
+    results = []
+    for kind in (types or SEARCH_TYPES):
+        queryset = SEARCH_TYPES[kind].objects.all()
+        if kind == 'donation':
+            queryset = queryset.select_related('donor', 'ngo')
+        elif kind == 'distribution':
+            queryset = queryset.select_related('ngo', 'recipient')
+
+        for obj in filter_queryset(queryset, term)[:limit]:
+            results.append({'type': kind, 'id': obj.pk, 'rank': obj.search_rank, **_describe(kind, obj)})
+
+    results.sort(key=lambda result: result['rank'], reverse=True)
+    return results[:limit]
+
+
+def suggest(kind: str, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Dict[str, Any]]:
+    """
+    Entities whose name starts with prefix, ignoring case, alphabetically; at
+    most limit. Matching and ordering on the same key lets the name prefix
+    index return the first limit rows without sorting every match.
+    """
+    model, detail = SUGGEST_TYPES[kind]
+    return list(
+        model.objects.alias(name_key=name_prefix_key())
+        .filter(name_key__startswith=prefix.upper())
+        .order_by('name_key', 'pk')
+        .values('id', 'name', detail=F(detail))[:limit]
+    )
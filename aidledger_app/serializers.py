@@ -1,5 +1,11 @@
+from decimal import Decimal
+
+from django.conf import settings
 from rest_framework import serializers
-from .models import Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats
+from . import entities
+from .models import (
+    Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats, RecurringDonation, ArchivedPartition
+)
 
 
 class DonorSerializer(serializers.ModelSerializer):
@@ -49,6 +55,26 @@ class DistributionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'txn_hash', 'timestamp', 'status']
 
 
+class RecurringDonationSerializer(serializers.ModelSerializer):
+    donor_name = serializers.CharField(source='donor.name', read_only=True)
+    ngo_name = serializers.CharField(source='ngo.name', read_only=True)
+    amount = serializers.DecimalField(max_digits=20, decimal_places=2, min_value=Decimal('0.01'))
+    
+    class Meta:
+        model = RecurringDonation
+        fields = [
+            'id', 'donor', 'ngo', 'donor_name', 'ngo_name', 'amount', 'interval',
+            'next_run_at', 'anchor_day', 'last_run_at', 'active', 'created_at'
+        ]
+        read_only_fields = ['id', 'anchor_day', 'last_run_at', 'created_at']
+
+
+class ArchivedPartitionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedPartition
+        fields = ['table', 'month', 'row_count', 'sha256', 'archived_at']
+
+
 class AidLedgerStatsSerializer(serializers.ModelSerializer):
     class Meta:
         model = AidLedgerStats
@@ -59,41 +85,130 @@ class AidLedgerStatsSerializer(serializers.ModelSerializer):
         read_only_fields = ['last_updated']
 
 
-class DonationCreateSerializer(serializers.Serializer):
+class AnalyticsBucketSerializer(serializers.Serializer):
+    bucket_start = serializers.DateTimeField()
+    total_amount = serializers.DecimalField(max_digits=20, decimal_places=2)
+    event_count = serializers.IntegerField()
+    min_amount = serializers.DecimalField(max_digits=20, decimal_places=2)
+    max_amount = serializers.DecimalField(max_digits=20, decimal_places=2)
+
+
+class RecipientImpactSerializer(serializers.Serializer):
+    recipient_id = serializers.IntegerField()
+    recipient_name = serializers.CharField()
+    location = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=20, decimal_places=2)
+    distributions = serializers.IntegerField()
+
+
+class DonorImpactSerializer(serializers.Serializer):
+    donor_id = serializers.IntegerField()
+    donor_name = serializers.CharField()
+    total_donated = serializers.DecimalField(max_digits=20, decimal_places=2)
+    traced_amount = serializers.DecimalField(max_digits=20, decimal_places=2)
+    recipients = RecipientImpactSerializer(many=True)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    label = serializers.CharField()
+    detail = serializers.CharField()
+    reference = serializers.CharField()
+    rank = serializers.FloatField()
+
+
+class EntityPrefetchListSerializer(serializers.ListSerializer):
+    """With many=True, look every referenced entity up in one IN query per model before validating items"""
+    
+    def to_internal_value(self, data):
+        with entities.scope():
+            if isinstance(data, list):
+                for field, model in self.child.entity_fields.items():
+                    ids = set()
+                    for item in data:
+                        try:
+                            ids.add(int(item[field]))
+                        except (KeyError, TypeError, ValueError):
+                            pass
+                    entities.prefetch(model, ids)
+            return super().to_internal_value(data)
+
+
+class EntityLookupMixin:
+    """Validate entity ids through the request's identity map, so the view reuses the instances"""
+    entity_fields = {}
+    
+    def _validate_entity(self, field, value):
+        model = self.entity_fields[field]
+        if entities.get(model, value) is None:
+            raise serializers.ValidationError(f"{model.__name__} not found")
+        return value
+
+
+class DonationCreateSerializer(EntityLookupMixin, serializers.Serializer):
     donor_id = serializers.IntegerField()
     ngo_id = serializers.IntegerField()
     amount = serializers.DecimalField(max_digits=20, decimal_places=2)
     
+    entity_fields = {'donor_id': Donor, 'ngo_id': NGO}
+    
+    class Meta:
+        list_serializer_class = EntityPrefetchListSerializer
+    
     def validate_donor_id(self, value):
-        try:
-            Donor.objects.get(id=value)
-        except Donor.DoesNotExist:
-            raise serializers.ValidationError("Donor not found")
-        return value
+        return self._validate_entity('donor_id', value)
     
     def validate_ngo_id(self, value):
-        try:
-            NGO.objects.get(id=value)
-        except NGO.DoesNotExist:
-            raise serializers.ValidationError("NGO not found")
-        return value
+        return self._validate_entity('ngo_id', value)
 
 
-class DistributionCreateSerializer(serializers.Serializer):
+class DistributionCreateSerializer(EntityLookupMixin, serializers.Serializer):
     ngo_id = serializers.IntegerField()
     recipient_id = serializers.IntegerField()
     amount = serializers.DecimalField(max_digits=20, decimal_places=2)
     
+    entity_fields = {'ngo_id': NGO, 'recipient_id': Recipient}
+    
+    class Meta:
+        list_serializer_class = EntityPrefetchListSerializer
+    
     def validate_ngo_id(self, value):
-        try:
-            NGO.objects.get(id=value)
-        except NGO.DoesNotExist:
-            raise serializers.ValidationError("NGO not found")
-        return value
+        return self._validate_entity('ngo_id', value)
     
     def validate_recipient_id(self, value):
-        try:
-            Recipient.objects.get(id=value)
-        except Recipient.DoesNotExist:
-            raise serializers.ValidationError("Recipient not found")
+        return self._validate_entity('recipient_id', value)
+
+
+class DistributionItemSerializer(serializers.Serializer):
+    recipient_id = serializers.IntegerField()
+    amount = serializers.DecimalField(max_digits=20, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class DistributionBatchSerializer(serializers.Serializer):
+    ngo_id = serializers.IntegerField()
+    distributions = DistributionItemSerializer(many=True, allow_empty=False)
+    
+    def validate_distributions(self, value):
+        limit = getattr(settings, 'DISTRIBUTION_BATCH_LIMIT', 5000)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} distributions per batch")
         return value
+    
+    def validate(self, data):
+        """Look the NGO and every recipient up in one query each"""
+        ngo = entities.get(NGO, data['ngo_id'])
+        if ngo is None:
+            raise serializers.ValidationError({'ngo_id': "NGO not found"})
+        
+        recipient_ids = {item['recipient_id'] for item in data['distributions']}
+        recipients = entities.prefetch(Recipient, recipient_ids)
+        missing = sorted(recipient_ids - recipients.keys())
+        if missing:
+            raise serializers.ValidationError({'distributions': f"Recipients not found: {missing}"})
+        
+        data['ngo'] = ngo
+        data['items'] = [
+            (recipients[item['recipient_id']], item['amount']) for item in data['distributions']
+        ]
+        return data
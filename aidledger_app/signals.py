@@ -0,0 +1,136 @@
+"""
+Model signal handlers for AidLedger
+Keep derived tables in step with confirmed ledger events. The work runs after
+the write commits and is only ever derived state, so a failing hook is logged
+and left to the background commands instead of failing the request that
+already recorded the event on the ledger.
+"""
+
+from functools import partial, update_wrapper
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats
+from . import analytics, allocation, caching, dashboard, streaming, wallets
+
+
+def after_commit(func, *args, **kwargs):
+    """Run func(*args, **kwargs) once the current transaction commits, logging any error"""
+    callback = update_wrapper(partial(func, *args, **kwargs), func)
+    transaction.on_commit(callback, robust=True)
+
+
+# Sent by the batch write paths, whose bulk_create/bulk_update skip post_save
+donations_bulk_saved = Signal()
+distributions_bulk_saved = Signal()
+
+
+@receiver(post_save, sender=Donation)
+def donation_saved(sender, instance, **kwargs):
+    """Fold newly confirmed donations into the rollups and push them live once committed"""
+    if instance.status == 'confirmed':
+        after_commit(analytics.update_rollups, 'donation')
+        after_commit(caching.invalidate_dashboard, 'donation')
+        after_commit(streaming.publish_donation, instance)
+
+
+@receiver(post_save, sender=Distribution)
+def distribution_saved(sender, instance, **kwargs):
+    """Fold newly confirmed distributions into the rollups, trace their funding and push them live"""
+    if instance.status == 'confirmed' and not instance.allocated:
+        after_commit(analytics.update_rollups, 'distribution')
+        after_commit(allocation.allocate_pending)
+        after_commit(caching.invalidate_dashboard, 'distribution')
+        after_commit(streaming.publish_distribution, instance)
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+def donation_written(sender, instance, created=True, **kwargs):
+    """New or removed donations change their donor's and NGO's dashboard counts"""
+    if created:
+        after_commit(
+            dashboard.invalidate_user_aggregates, donor_ids=[instance.donor_id], ngo_ids=[instance.ngo_id]
+        )
+
+
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def distribution_written(sender, instance, created=True, **kwargs):
+    """New or removed distributions change their NGO's dashboard counts"""
+    if created:
+        after_commit(dashboard.invalidate_user_aggregates, ngo_ids=[instance.ngo_id])
+
+
+@receiver(donations_bulk_saved)
+def donations_bulk_saved_handler(sender, donations, **kwargs):
+    """Batch counterpart of donation_saved and resource_changed"""
+    after_commit(caching.bump_version, 'donation')
+    after_commit(
+        dashboard.invalidate_user_aggregates,
+        donor_ids=[d.donor_id for d in donations], ngo_ids=[d.ngo_id for d in donations]
+    )
+    confirmed = [d for d in donations if d.status == 'confirmed']
+    if confirmed:
+        after_commit(analytics.update_rollups, 'donation')
+        after_commit(caching.invalidate_dashboard, 'donation')
+        after_commit(streaming.publish_donations, confirmed)
+
+
+@receiver(distributions_bulk_saved)
+def distributions_bulk_saved_handler(sender, distributions, **kwargs):
+    """Batch counterpart of distribution_saved and resource_changed"""
+    after_commit(caching.bump_version, 'distribution')
+    after_commit(dashboard.invalidate_user_aggregates, ngo_ids=[d.ngo_id for d in distributions])
+    confirmed = [d for d in distributions if d.status == 'confirmed' and not d.allocated]
+    if confirmed:
+        after_commit(analytics.update_rollups, 'distribution')
+        after_commit(allocation.allocate_pending)
+        after_commit(caching.invalidate_dashboard, 'distribution')
+        after_commit(streaming.publish_distributions, confirmed)
+
+
+@receiver(post_save, sender=AidLedgerStats)
+def stats_saved(sender, instance, **kwargs):
+    """Refresh the cached dashboard stats"""
+    after_commit(caching.invalidate_dashboard, 'stats')
+
+
+@receiver(post_save, sender=Donor)
+@receiver(post_save, sender=NGO)
+@receiver(post_save, sender=Recipient)
+def entity_saved(sender, instance, created, **kwargs):
+    """Renames show up in the cached recent-activity lists"""
+    if not created:
+        after_commit(caching.invalidate_dashboard, 'entity')
+
+
+@receiver(post_save, sender=Donor)
+@receiver(post_save, sender=NGO)
+@receiver(post_save, sender=Recipient)
+@receiver(post_delete, sender=Donor)
+@receiver(post_delete, sender=NGO)
+@receiver(post_delete, sender=Recipient)
+def entity_written(sender, instance, **kwargs):
+    """Every worker drops its wallet index once the write is visible"""
+    after_commit(wallets.bump_version)
+
+
+RESOURCE_NAMES = {
+    Donor: 'donor',
+    NGO: 'ngo',
+    Recipient: 'recipient',
+    Donation: 'donation',
+    Distribution: 'distribution',
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def resource_changed(sender, **kwargs):
+    """Bump the change counter behind the list endpoints' ETags"""
+    resource = RESOURCE_NAMES.get(sender)
+    if resource:
+        after_commit(caching.bump_version, resource)
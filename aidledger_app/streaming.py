@@ -0,0 +1,318 @@
+"""
+Live transaction stream for AidLedger
+A single in-process broadcaster fans confirmed donations and distributions
+out to every Server-Sent Events and WebSocket subscriber. Events committed
+in this process are pushed from the post-commit signal; one shared poller
+per process reads every event below the settled horizon (confirmations.py)
+in confirmation order. Event ids are "<transaction>-<confirmation #>"
+cursors that only the poller's reads move, so a client resumes with
+Last-Event-ID by replaying what it has not seen, including rows whose
+transactions committed late. A locally pushed event may be replayed once.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+
+from .confirmations import START, Position, settled_after
+from .models import Donation, Distribution
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 1000
+REPLAY_LIMIT = 1000
+RECENT_KEYS = 2048
+
+
+def poll_interval() -> float:
+    return getattr(settings, 'STREAM_POLL_SECONDS', 2)
+
+
+def heartbeat_interval() -> float:
+    return getattr(settings, 'STREAM_HEARTBEAT_SECONDS', 15)
+
+
+def supported(request) -> bool:
+    """Streams are endless, so only an ASGI server can hold one without pinning a worker thread"""
+    return isinstance(request, ASGIRequest)
+
+
+def parse_cursor(value: Optional[str]) -> Optional[Position]:
+    """'812-37' -> (812, 37); None for a missing or malformed cursor"""
+    try:
+        xid, seq = (value or '').split('-')
+        return int(xid), int(seq)
+    except ValueError:
+        return None
+
+
+def format_cursor(cursor: Position) -> str:
+    return f"{cursor[0]}-{cursor[1]}"
+
+
+def _event_rows(event_type: str, after: Position, limit: int) -> List[Tuple[Position, Dict[str, Any]]]:
+    if event_type == 'donation':
+        queryset = Donation.objects.annotate(source=F('donor__name'), target=F('ngo__name'))
+    else:
+        queryset = Distribution.objects.annotate(source=F('ngo__name'), target=F('recipient__name'))
+    rows = settled_after(queryset, after).values(
+        'id', 'confirmed_xid', 'confirmed_seq', 'amount', 'txn_hash', 'timestamp', 'source', 'target'
+    )[:limit]
+    return [((row['confirmed_xid'], row['confirmed_seq']), {
+        'type': event_type,
+        'id': row['id'],
+        'from': row['source'],
+        'to': row['target'],
+        'amount': str(row['amount']),
+        'txn_hash': row['txn_hash'],
+        'timestamp': row['timestamp'].isoformat(),
+    }) for row in rows]
+
+
+def events_after(cursor: Position, limit: int = REPLAY_LIMIT) -> List[Tuple[Position, Dict[str, Any]]]:
+    """
+    Settled events past a cursor as (position, event) pairs, in confirmation
+    order and at most limit of them, so the last position is a safe cursor
+    """
+    events = _event_rows('donation', cursor, limit) + _event_rows('distribution', cursor, limit)
+    events.sort(key=lambda pair: pair[0])
+    return events[:limit]
+
+
+def latest_cursor() -> Position:
+    """Cursor at the settled head of the ledger, for clients that only want new events"""
+    heads = [
+        settled_after(model.objects).reverse().values_list('confirmed_xid', 'confirmed_seq').first()
+        for model in (Donation, Distribution)
+    ]
+    return max([head for head in heads if head], default=START)
+
+
+class Subscription:
+    """One client's view of the stream: a bounded queue plus its own cursor"""
+
+    def __init__(self, cursor: Position):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.cursor = cursor
+        self.overflowed = False
+        self._seen = set()
+        self._seen_order = deque()
+
+    def offer(self, position: Optional[Position], event: Dict[str, Any]) -> None:
+        """Called on the subscriber's loop; slow clients are cut off and resume by cursor"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait((position, event))
+        except asyncio.QueueFull:
+            self.overflowed = True
+            logger.warning("Dropping slow transaction stream subscriber")
+
+    def accept(self, position: Optional[Position], event: Dict[str, Any]) -> bool:
+        """
+        Whether the event is new to this client. Only settled events, which
+        carry their position, advance the cursor; a local push does not.
+        """
+        if position is not None:
+            if position <= self.cursor:
+                return False
+            self.cursor = position
+        key = (event['type'], event['id'])
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        self._seen_order.append(key)
+        if len(self._seen_order) > RECENT_KEYS:
+            self._seen.discard(self._seen_order.popleft())
+        return True
+
+
+class Broadcaster:
+    """Process-wide fan-out of ledger events to stream subscribers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._poller = None
+
+    def publish(self, event: Dict[str, Any], position: Optional[Position] = None) -> None:
+        """
+        Deliver an event to every subscriber; safe to call from any thread.
+        The poller passes the position it read the event at, local commits
+        none, so an event pushed locally is delivered again by the poller
+        to move cursors past it.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, position, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._poller is None or self._poller.done() or self._poller.get_loop().is_closed():
+                self._poller = subscription.loop.create_task(self._poll())
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    async def _poll(self):
+        """
+        Read settled events past the last one read, one query pair per
+        interval, and fan them out with their positions
+        """
+        try:
+            marks = await sync_to_async(latest_cursor)()
+            while True:
+                await asyncio.sleep(poll_interval())
+                with self._lock:
+                    if not self._subscribers:
+                        self._poller = None
+                        return
+                for position, event in await sync_to_async(events_after)(marks):
+                    marks = position
+                    self.publish(event, position)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Transaction stream poller failed: {e}")
+            with self._lock:
+                self._poller = None
+
+
+broadcaster = Broadcaster()
+
+
+def publish_donations(donations: Iterable[Donation]) -> None:
+    if not broadcaster.has_subscribers:
+        return
+    for donation in donations:
+        broadcaster.publish({
+            'type': 'donation',
+            'id': donation.pk,
+            'from': donation.donor.name,
+            'to': donation.ngo.name,
+            'amount': str(donation.amount),
+            'txn_hash': donation.txn_hash,
+            'timestamp': donation.timestamp.isoformat(),
+        })
+
+
+def publish_distributions(distributions: Iterable[Distribution]) -> None:
+    if not broadcaster.has_subscribers:
+        return
+    for distribution in distributions:
+        broadcaster.publish({
+            'type': 'distribution',
+            'id': distribution.pk,
+            'from': distribution.ngo.name,
+            'to': distribution.recipient.name,
+            'amount': str(distribution.amount),
+            'txn_hash': distribution.txn_hash,
+            'timestamp': distribution.timestamp.isoformat(),
+        })
+
+
+def publish_donation(donation: Donation) -> None:
+    publish_donations([donation])
+
+
+def publish_distribution(distribution: Distribution) -> None:
+    publish_distributions([distribution])
+
+
+async def subscribe(last_event_id: Optional[str] = None) -> AsyncIterator[Tuple[Optional[str], Optional[Dict[str, Any]]]]:
+    """
+    Yield (event id, event) pairs: first the backlog after last_event_id, then
+    live events. (event id, None) moves the client's cursor past an event it
+    was already sent, and (None, None) is yielded when the stream has been
+    idle for a heartbeat interval, so transports can send a keep-alive.
+    """
+    cursor = parse_cursor(last_event_id)
+    subscription = Subscription(cursor or START)
+    # Subscribe before reading the backlog so nothing committed in between is lost
+    broadcaster.subscribe(subscription)
+    try:
+        if cursor is None:
+            subscription.cursor = await sync_to_async(latest_cursor)()
+        else:
+            for position, event in await sync_to_async(events_after)(cursor):
+                if subscription.accept(position, event):
+                    yield format_cursor(subscription.cursor), event
+
+        while not subscription.overflowed:
+            try:
+                position, event = await asyncio.wait_for(subscription.queue.get(), heartbeat_interval())
+            except asyncio.TimeoutError:
+                yield None, None
+                continue
+            if subscription.accept(position, event):
+                yield format_cursor(subscription.cursor), event
+            elif position is not None and position == subscription.cursor:
+                yield format_cursor(subscription.cursor), None
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def sse_message(event_id: Optional[str], event: Optional[Dict[str, Any]]) -> str:
+    if event is None:
+        # An id with no data updates the browser's Last-Event-ID without firing an event
+        return f"id: {event_id}\n\n" if event_id else ": keep-alive\n\n"
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def sse_stream(last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+    """Server-Sent Events framing of subscribe()"""
+    yield f"retry: {int(poll_interval() * 1000)}\n\n"
+    async for event_id, event in subscribe(last_event_id):
+        yield sse_message(event_id, event)
+
+
+async def websocket_transactions(scope, receive, send):
+    """
+    ASGI WebSocket handler for /ws/transactions/; sends the same events as
+    the SSE stream as JSON text frames, with the cursor under "event_id"
+    """
+    from urllib.parse import parse_qs
+
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    await send({'type': 'websocket.accept'})
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    last_event_id = (query.get('last_event_id') or [None])[0]
+
+    async def forward():
+        async for event_id, event in subscribe(last_event_id):
+            if event is not None:
+                await send({'type': 'websocket.send', 'text': json.dumps({'event_id': event_id, **event})})
+        # A subscriber that fell too far behind is closed and resumes from its cursor
+        await send({'type': 'websocket.close', 'code': 1013})
+
+    forwarder = asyncio.ensure_future(forward())
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+    finally:
+        forwarder.cancel()
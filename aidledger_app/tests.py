@@ -1,8 +1,46 @@
-from django.test import TestCase
-from django.urls import reverse
+import asyncio
+import base64
+import io
+import json
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Donor, NGO, Recipient, Donation, Distribution
+from .models import (
+    CustomUser, Donor, NGO, Recipient, Donation, Distribution, AnalyticsRollup, FundAllocation,
+    TopicMessage, MirrorCheckpoint, IdempotencyKey, PooledAccount, RecurringDonation, ReplicaMark,
+    ReverifyJob
+)
+from .serializers import DonationCreateSerializer
+from .analytics import update_rollups
+from .allocation import allocate_pending
+from .reconciliation import parse_message, reconcile
+from .merkle import build_epochs, leaf_hash, verify_proof
+from .export import write_table
+from .async_ledger import mirror_transaction_id
+from . import streaming
+from .admission import AdmissionController, LedgerBusy
+from .circuit import CircuitBreaker, CircuitOpen
+from .ledger import InsufficientFunds, available_funds, queue_donation, reserve_distribution_batch, submit_queued
+from . import (
+    accounts, archive, async_ledger, caching, dashboard, entities, idempotency, partitions, recurring, replicas,
+    reverify, search, wallets
+)
+from .admin import EstimatedCountPaginator, estimated_count
+from .hedera_service import hedera_service, pack_transfers
 
 
 class AidLedgerAPITestCase(APITestCase):
@@ -123,3 +161,1633 @@ class AidLedgerModelTestCase(TestCase):
         )
         self.assertEqual(distribution.amount, 500.00)
         self.assertEqual(distribution.status, 'pending')
+
+
+class AnalyticsRollupTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        for index, amount in enumerate([100, 250, 50]):
+            Donation.objects.create(
+                donor=self.donor,
+                ngo=self.ngo,
+                amount=amount,
+                txn_hash=f"rollup_hash_{index}",
+                timestamp=datetime(2024, 3, 5, 10 + index, 30, tzinfo=dt_timezone.utc),
+                status='confirmed'
+            )
+    
+    def test_update_rollups_is_incremental(self):
+        """Test rollups fold each event exactly once"""
+        self.assertEqual(update_rollups(), 3)
+        self.assertEqual(update_rollups(), 0)
+        
+        daily = AnalyticsRollup.objects.get(granularity='day', event_type='donation')
+        self.assertEqual(daily.total_amount, 400)
+        self.assertEqual(daily.event_count, 3)
+        self.assertEqual(daily.min_amount, 50)
+        self.assertEqual(daily.max_amount, 250)
+        self.assertEqual(AnalyticsRollup.objects.filter(granularity='hour').count(), 3)
+    
+    def test_timeseries_endpoint(self):
+        """Test the timeseries endpoint reads from the rollups"""
+        update_rollups()
+        response = self.client.get(
+            '/api/analytics/timeseries/', {'event_type': 'donation', 'granularity': 'month'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['event_count'], 3)
+        
+        response = self.client.get('/api/analytics/timeseries/', {'granularity': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        for start in ('2024-02-30', '2024-02-30T10:00:00', 'yesterday'):
+            response = self.client.get('/api/analytics/timeseries/', {'start': start})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FundAllocationTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        self.recipient = Recipient.objects.create(
+            name="Test Recipient",
+            location="Test Location",
+            wallet_id="0.0.3234567"
+        )
+        
+        self.first_donor = Donor.objects.create(
+            name="First Donor",
+            email="first@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.second_donor = Donor.objects.create(
+            name="Second Donor",
+            email="second@example.com",
+            wallet_id="0.0.1234568"
+        )
+        
+        for index, (donor, amount) in enumerate([(self.first_donor, 100), (self.second_donor, 300)]):
+            Donation.objects.create(
+                donor=donor,
+                ngo=self.ngo,
+                amount=amount,
+                txn_hash=f"alloc_donation_{index}",
+                timestamp=datetime(2024, 1, 1 + index, tzinfo=dt_timezone.utc),
+                status='confirmed'
+            )
+    
+    def test_fifo_allocation(self):
+        """Test distributions draw from the oldest donations first"""
+        Distribution.objects.create(
+            ngo=self.ngo,
+            recipient=self.recipient,
+            amount=150,
+            txn_hash="alloc_distribution_0",
+            timestamp=datetime(2024, 2, 1, tzinfo=dt_timezone.utc),
+            status='confirmed'
+        )
+        self.assertEqual(allocate_pending(), 1)
+        self.assertEqual(allocate_pending(), 0)
+        
+        shares = dict(FundAllocation.objects.values_list('donor__name', 'amount'))
+        self.assertEqual(shares, {'First Donor': 100, 'Second Donor': 50})
+    
+    def test_batch_locks_ngos_in_pk_order(self):
+        """Test a batch takes all of its NGO locks up front, lowest pk first"""
+        other_ngo = NGO.objects.create(name="Other NGO", region="Test Region", wallet_id="0.0.2234568")
+        # Newest NGO's distribution comes first in id order
+        for index, ngo in enumerate([other_ngo, self.ngo]):
+            Distribution.objects.create(
+                ngo=ngo,
+                recipient=self.recipient,
+                amount=10,
+                txn_hash=f"alloc_order_{index}",
+                timestamp=datetime(2024, 2, 1, tzinfo=dt_timezone.utc),
+                status='confirmed'
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(allocate_pending(), 2)
+        ngo_locks = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "aidledger_app_ngo"' in query['sql'] and 'FOR UPDATE' in query['sql']
+        ]
+        self.assertEqual(len(ngo_locks), 1)
+        self.assertIn('ORDER BY "aidledger_app_ngo"."id" ASC', ngo_locks[0])
+
+    def test_failing_hook_does_not_fail_committed_write(self):
+        """Test an error in an after-commit hook is logged, not raised to the writer"""
+        def unavailable():
+            raise OperationalError("allocation unavailable")
+
+        with patch('aidledger_app.allocation.allocate_pending', unavailable):
+            with self.assertLogs('django', 'ERROR') as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    Distribution.objects.create(
+                        ngo=self.ngo,
+                        recipient=self.recipient,
+                        amount=50,
+                        txn_hash="alloc_distribution_hook",
+                        timestamp=datetime(2024, 2, 1, tzinfo=dt_timezone.utc),
+                        status='confirmed'
+                    )
+        self.assertIn('unavailable', logs.output[0])
+        self.assertFalse(FundAllocation.objects.exists())
+
+        # The background pass picks the distribution up later
+        self.assertEqual(allocate_pending(), 1)
+
+    def test_donor_impact_endpoint(self):
+        """Test the impact endpoint reports recipients reached"""
+        Distribution.objects.create(
+            ngo=self.ngo,
+            recipient=self.recipient,
+            amount=50,
+            txn_hash="alloc_distribution_1",
+            timestamp=datetime(2024, 2, 1, tzinfo=dt_timezone.utc),
+            status='confirmed'
+        )
+        allocate_pending()
+        
+        response = self.client.get(f'/api/donors/{self.first_donor.id}/impact/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['recipients']), 1)
+        self.assertEqual(response.data['recipients'][0]['recipient_name'], "Test Recipient")
+        
+        response = self.client.get(f'/api/donors/{self.second_donor.id}/impact/')
+        self.assertEqual(response.data['recipients'], [])
+
+
+class LedgerReconciliationTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        self.checkpoint = MirrorCheckpoint.objects.create(
+            topic_id="0.0.9000",
+            last_consensus_timestamp="1893456000.000000000"
+        )
+    
+    def _message(self, sequence_number, valid_start, amount):
+        payload = {"type": "donation", "donor": "Test Donor", "ngo": "Test NGO", "amount": amount}
+        return {
+            "sequence_number": sequence_number,
+            "consensus_timestamp": f"{valid_start}.000000001",
+            "message": base64.b64encode(json.dumps(payload).encode()).decode(),
+            "chunk_info": {
+                "initial_transaction_id": {
+                    "account_id": "0.0.2",
+                    "transaction_valid_start": f"{valid_start}.000000000"
+                }
+            }
+        }
+    
+    def test_reconcile_reports_discrepancies(self):
+        """Test missing, mismatched and duplicate events are reported"""
+        for index, amount in enumerate([100, 200, 300]):
+            Donation.objects.create(
+                donor=self.donor,
+                ngo=self.ngo,
+                amount=amount,
+                txn_hash=f"0.0.2@170000000{index}.000000000",
+                timestamp=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+                status='confirmed'
+            )
+        
+        messages = [
+            self._message(1, "1700000000", 100),
+            self._message(2, "1700000001", 250),
+            self._message(3, "1700000001", 250),
+            self._message(4, "1700000009", 50),
+        ]
+        TopicMessage.objects.bulk_create([parse_message("0.0.9000", m) for m in messages])
+        
+        report = reconcile("0.0.9000")
+        self.assertEqual(report['missing_on_ledger']['donation'], ["0.0.2@1700000002.000000000"])
+        self.assertEqual(len(report['missing_in_db']['donation']), 1)
+        self.assertEqual(len(report['mismatched']['donation']), 2)
+        self.assertEqual(report['duplicates'][0]['txn_hash'], "0.0.2@1700000001.000000000")
+        
+        # An incremental run with nothing new has nothing to report
+        report = reconcile("0.0.9000")
+        self.assertEqual(report['messages_checked'], 0)
+        self.assertEqual(report['missing_on_ledger']['donation'], [])
+
+
+class MerkleProofTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        for index in range(5):
+            Donation.objects.create(
+                donor=self.donor,
+                ngo=self.ngo,
+                amount=10 + index,
+                txn_hash=f"merkle_hash_{index}",
+                timestamp=datetime(2024, 6, 1, 12, index, tzinfo=dt_timezone.utc),
+                confirmed_at=datetime(2024, 6, 1, 12, index, tzinfo=dt_timezone.utc),
+                status='confirmed'
+            )
+    
+    def test_proofs_verify_against_root(self):
+        """Test every leaf's proof recomputes the sealed root"""
+        epochs = build_epochs(anchor=False)
+        self.assertEqual(len(epochs), 1)
+        self.assertEqual(epochs[0].leaf_count, 5)
+        self.assertEqual(build_epochs(anchor=False), [])
+        
+        for index in range(5):
+            response = self.client.get(f'/api/proof/merkle_hash_{index}/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            leaf = leaf_hash(response.data['event']).hex()
+            self.assertEqual(leaf, response.data['leaf_hash'])
+            self.assertTrue(verify_proof(leaf, response.data['proof'], response.data['epoch']['root']))
+    
+    def test_tampered_event_fails_verification(self):
+        """Test a modified amount no longer verifies"""
+        build_epochs(anchor=False)
+        response = self.client.get('/api/proof/merkle_hash_2/')
+        event = dict(response.data['event'], amount='999.00')
+        self.assertFalse(
+            verify_proof(leaf_hash(event).hex(), response.data['proof'], response.data['epoch']['root'])
+        )
+        
+        response = self.client.get('/api/proof/unknown_hash/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SearchTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Alice Johnson",
+            email="alice@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Global Relief Foundation",
+            region="Africa",
+            wallet_id="0.0.2234567",
+            description="Clean water programmes"
+        )
+        
+        Donation.objects.create(
+            donor=self.donor,
+            ngo=self.ngo,
+            amount=100,
+            txn_hash="0.0.2@1700000000.123456789",
+            status='confirmed'
+        )
+    
+    def test_search_is_typo_tolerant(self):
+        """Test a misspelled name still finds the NGO first"""
+        response = self.client.get('/api/search/', {'q': 'Releif'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['type'], 'ngo')
+        self.assertEqual(response.data['results'][0]['id'], self.ngo.id)
+    
+    def test_search_by_txn_hash_and_type(self):
+        """Test transaction hashes are matched by substring"""
+        response = self.client.get('/api/search/', {'q': '1700000000.1234', 'type': 'donation'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['type'] for r in response.data['results']], ['donation'])
+        
+        response = self.client.get('/api/search/', {'q': 'ab'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DashboardCacheTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+    
+    def test_dashboard_conditional_get(self):
+        """Test repeat visits get a 304 until a new event is confirmed"""
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(
+                donor=self.donor,
+                ngo=self.ngo,
+                amount=75,
+                txn_hash="dashboard_hash_1",
+                status='confirmed'
+            )
+        
+        response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Test Donor → Test NGO")
+    
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_dashboard_not_refilled_from_replica(self):
+        """Test fragments dropped by a write are rebuilt from the primary, never a lagging replica"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Donation.objects.create(
+                donor=self.donor, ngo=self.ngo, amount=75, txn_hash="dashboard_hash_2", status='confirmed'
+            )
+        
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Test Donor → Test NGO")
+    
+    def test_dashboard_query_count(self):
+        """Test a warm dashboard renders without touching the database"""
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+
+class ConditionalListTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+    
+    def test_list_etag_changes_only_on_write(self):
+        """Test list endpoints answer 304 until the resource is written"""
+        response = self.client.get('/api/ngos/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        response = self.client.get('/api/ngos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/ngos/', {
+                'name': 'New NGO',
+                'region': 'New Region',
+                'wallet_id': '0.0.2234568'
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        response = self.client.get('/api/ngos/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 2)
+    
+    def test_cached_page_skips_serialization(self):
+        """Test a repeat poll costs a single version lookup"""
+        self.client.get('/api/ngos/')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/ngos/')
+        self.assertEqual(len(response.data), 1)
+
+
+class LedgerExportTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        for index in range(5):
+            Donation.objects.create(
+                donor=self.donor,
+                ngo=self.ngo,
+                amount=10 + index,
+                txn_hash=f"export_hash_{index}",
+                status='confirmed'
+            )
+    
+    def test_parquet_export_row_groups(self):
+        """Test donations are written in row groups and read back column-wise"""
+        import pyarrow.parquet as pq
+        
+        sink = io.BytesIO()
+        self.assertEqual(write_table('donations', sink, row_group_size=2), 5)
+        sink.seek(0)
+        parquet = pq.ParquetFile(sink)
+        self.assertEqual(parquet.num_row_groups, 3)
+        amounts = parquet.read(columns=['amount']).column('amount').to_pylist()
+        self.assertEqual(sorted(amounts), [10, 11, 12, 13, 14])
+    
+    def test_export_endpoint_requires_admin(self):
+        """Test only staff can download exports"""
+        response = self.client.get('/api/export/donations/')
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+        
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+        response = self.client.get('/api/export/donations/', {'file_format': 'arrow'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('donations.arrow', response['Content-Disposition'])
+
+
+class AsyncLedgerTestCase(TestCase):
+    def setUp(self):
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="donor@test.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+    
+    def test_mirror_transaction_id(self):
+        """Test SDK transaction ids are converted to the Mirror Node format"""
+        self.assertEqual(
+            mirror_transaction_id("0.0.2@1700000000.123456789"),
+            "0.0.2-1700000000-123456789"
+        )
+        self.assertEqual(mirror_transaction_id("0.0.2-1700000000-123456789"), "0.0.2-1700000000-123456789")
+    
+    async def test_async_donation_awaits_ledger(self):
+        """Test the async endpoint records the donation after consensus"""
+        data = {'donor_id': self.donor.id, 'ngo_id': self.ngo.id, 'amount': '50.00'}
+        with patch('aidledger_app.async_ledger.log_donation', new=AsyncMock(return_value='0.0.2@1.5')) as log:
+            response = await self.async_client.post(
+                '/api/async/donate/', json.dumps(data), content_type='application/json'
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['txn_hash'], '0.0.2@1.5')
+        log.assert_awaited_once_with("Test Donor", "Test NGO", 50.0)
+        donor = await Donor.objects.aget(pk=self.donor.pk)
+        self.assertEqual(donor.total_donated, 50)
+
+
+@override_settings(STREAM_POLL_SECONDS=60, STREAM_HEARTBEAT_SECONDS=5)
+class TransactionStreamTestCase(TestCase):
+    def setUp(self):
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="donor@test.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        self.recipient = Recipient.objects.create(
+            name="Test Recipient",
+            location="Test Location",
+            wallet_id="0.0.3234567"
+        )
+        
+        self.donations = [
+            Donation.objects.create(
+                donor=self.donor,
+                ngo=self.ngo,
+                amount=10 + index,
+                txn_hash=f"stream_hash_{index}",
+                status='confirmed'
+            )
+            for index in range(2)
+        ]
+        
+        self.distribution = Distribution.objects.create(
+            ngo=self.ngo,
+            recipient=self.recipient,
+            amount=5,
+            txn_hash="stream_distribution_hash",
+            status='confirmed'
+        )
+        # Cursors follow the confirmation order the database assigned
+        for row in self.donations + [self.distribution]:
+            row.refresh_from_db(fields=['confirmed_xid', 'confirmed_seq'])
+    
+    async def test_resume_from_last_event_id(self):
+        """Test a reconnecting client only receives events after its cursor"""
+        first = self.donations[0]
+        stream = streaming.subscribe(streaming.format_cursor((first.confirmed_xid, first.confirmed_seq)))
+        try:
+            received = [await stream.__anext__(), await stream.__anext__()]
+        finally:
+            await stream.aclose()
+        
+        self.assertEqual(
+            {(event['type'], event['id']) for _, event in received},
+            {('donation', self.donations[1].id), ('distribution', self.distribution.id)}
+        )
+        self.assertEqual(
+            received[-1][0],
+            streaming.format_cursor((self.distribution.confirmed_xid, self.distribution.confirmed_seq))
+        )
+    
+    async def test_live_events_are_pushed(self):
+        """Test events published after connecting reach the subscriber"""
+        stream = streaming.subscribe()
+        try:
+            next_event = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.1)
+            donation = await Donation.objects.select_related('donor', 'ngo').aget(pk=self.donations[1].pk)
+            await sync_to_async(streaming.publish_donation)(donation)
+            event_id, event = await asyncio.wait_for(next_event, 5)
+        finally:
+            await stream.aclose()
+        
+        self.assertEqual(event['txn_hash'], "stream_hash_1")
+        self.assertEqual(event['from'], "Test Donor")
+        # A local push leaves the cursor where the poller last read
+        self.assertEqual(
+            streaming.parse_cursor(event_id), (self.distribution.confirmed_xid, self.distribution.confirmed_seq)
+        )
+    
+    @override_settings(STREAM_POLL_SECONDS=0.05)
+    async def test_local_publish_does_not_skip_lower_ids_from_other_workers(self):
+        """Test the poller still delivers a lower id committed elsewhere after a higher one was pushed locally"""
+        stream = streaming.subscribe()
+        try:
+            first = asyncio.ensure_future(stream.__anext__())
+            await asyncio.sleep(0.1)
+            streaming.broadcaster.publish({
+                'type': 'donation', 'id': self.donations[1].id + 1000,
+                'from': "Test Donor", 'to': "Test NGO",
+                'amount': '1', 'txn_hash': "local_hash", 'timestamp': datetime.now(dt_timezone.utc).isoformat()
+            })
+            self.assertEqual((await asyncio.wait_for(first, 5))[1]['txn_hash'], "local_hash")
+            
+            donation = await Donation.objects.acreate(
+                donor=self.donor, ngo=self.ngo, amount=1, txn_hash="other_worker_hash", status='confirmed'
+            )
+            event = None
+            while event is None:
+                _, event = await asyncio.wait_for(stream.__anext__(), 5)
+        finally:
+            await stream.aclose()
+        
+        self.assertEqual(event['id'], donation.id)
+    
+    def test_wsgi_requests_are_not_streamed(self):
+        """Test WSGI gets 204 instead of an endless stream, and the dashboard opens no EventSource"""
+        response = self.client.get('/api/stream/transactions/')
+        self.assertEqual(response.status_code, 204)
+        self.assertNotContains(self.client.get('/'), 'EventSource(')
+
+
+class IdempotencyKeyTestCase(APITestCase):
+    def setUp(self):
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="donor@test.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        self.data = {'donor_id': self.donor.id, 'ngo_id': self.ngo.id, 'amount': '25.00'}
+    
+    @patch('aidledger_app.views.hedera_service')
+    def test_retry_replays_stored_response(self, hedera):
+        """Test a retried donation is not logged or counted twice"""
+        hedera.log_donation_to_hcs.return_value = "0.0.2@1700000000.1"
+        
+        first = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        second = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-1')
+        
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(hedera.log_donation_to_hcs.call_count, 1)
+        self.assertEqual(Donation.objects.count(), 1)
+        self.assertEqual(Donor.objects.get(pk=self.donor.pk).total_donated, 25)
+    
+    @patch('aidledger_app.views.hedera_service')
+    def test_key_reuse_and_failures(self, hedera):
+        """Test a key can't be reused for a different body and is released when HCS refused the message"""
+        hedera.log_donation_to_hcs.side_effect = Exception("INSUFFICIENT_PAYER_BALANCE")
+        response = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(IdempotencyKey.objects.filter(key='retry-2').exists())
+        
+        hedera.log_donation_to_hcs.side_effect = None
+        hedera.log_donation_to_hcs.return_value = "0.0.2@1700000000.2"
+        response = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        changed = dict(self.data, amount='30.00')
+        response = self.client.post('/api/donate/', changed, format='json', HTTP_IDEMPOTENCY_KEY='retry-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+    
+    @patch('aidledger_app.views.ledger.record_donation', side_effect=Exception("connection reset"))
+    @patch('aidledger_app.views.hedera_service')
+    def test_failure_after_submission_keeps_key(self, hedera, mock_record):
+        """Test a retry after the HCS message was sent replays the failure instead of logging again"""
+        def submit(*args):
+            idempotency.note_submission("0.0.2@1700000000.3")
+            return "0.0.2@1700000000.3"
+        hedera.log_donation_to_hcs.side_effect = submit
+        
+        first = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-3')
+        second = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-3')
+        
+        self.assertEqual(first.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(second.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.data['submitted_txn_hashes'], ["0.0.2@1700000000.3"])
+        self.assertEqual(hedera.log_donation_to_hcs.call_count, 1)
+    
+    @patch('aidledger_app.views.hedera_service')
+    def test_abandoned_claim_expires(self, hedera):
+        """Test a claim left processing by a dead worker is reclaimed and purged after its lease"""
+        hedera.log_donation_to_hcs.return_value = "0.0.2@1700000000.4"
+        stale = datetime.now(dt_timezone.utc) - timedelta(seconds=301)
+        IdempotencyKey.objects.create(scope='donate', key='retry-4', fingerprint=idempotency.fingerprint(self.data),
+                                      created_at=stale)
+        IdempotencyKey.objects.create(scope='donate', key='retry-5', fingerprint='x', created_at=stale)
+        IdempotencyKey.objects.create(scope='donate', key='retry-6', fingerprint='x')
+        
+        response = self.client.post('/api/donate/', self.data, format='json', HTTP_IDEMPOTENCY_KEY='retry-4')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(idempotency.purge_expired(), 1)
+        self.assertEqual(
+            set(IdempotencyKey.objects.values_list('key', 'status')),
+            {('retry-4', 'completed'), ('retry-6', 'processing')}
+        )
+
+
+class AdmissionControlTestCase(APITestCase):
+    def test_full_queue_rejects_immediately(self):
+        """Test submissions beyond the slots and queue are refused with a retry hint"""
+        controller = AdmissionController(max_concurrent=1, max_queued=0, queue_timeout=5)
+        with controller.slot():
+            with self.assertRaises(LedgerBusy) as raised:
+                with controller.slot():
+                    pass
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(controller.rejected, 1)
+        
+        with controller.slot():
+            self.assertEqual(controller.active, 1)
+    
+    @patch('aidledger_app.views.hedera_service')
+    def test_busy_ledger_returns_503(self, hedera):
+        """Test a refused submission surfaces as 503 with Retry-After and records nothing"""
+        donor = Donor.objects.create(name="Test Donor", email="donor@test.com", wallet_id="0.0.1234567")
+        ngo = NGO.objects.create(name="Test NGO", region="Test Region", wallet_id="0.0.2234567")
+        hedera.log_donation_to_hcs.side_effect = LedgerBusy(3)
+        
+        response = self.client.post(
+            '/api/donate/', {'donor_id': donor.id, 'ngo_id': ngo.id, 'amount': '10.00'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertEqual(Donation.objects.count(), 0)
+
+
+class CircuitBreakerTestCase(APITestCase):
+    def test_breaker_opens_and_recovers_after_probe(self):
+        """Test a failing operation class fails fast, then closes once its probe passes"""
+        breaker = CircuitBreaker('test', min_calls=2, failure_rate=0.5, open_seconds=60)
+        
+        def fail():
+            raise ConnectionError("network unreachable")
+        
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(fail)
+        self.assertEqual(breaker.state, 'open')
+        
+        never_called = MagicMock()
+        with self.assertRaises(CircuitOpen):
+            breaker.call(never_called)
+        never_called.assert_not_called()
+        
+        # Cool-down elapsed: the probe runs first and closes the circuit
+        breaker.opened_at -= 60
+        breaker.probe = MagicMock()
+        self.assertEqual(breaker.call(lambda: 'ok'), 'ok')
+        breaker.probe.assert_called_once()
+        self.assertEqual(breaker.state, 'closed')
+    
+    @patch('aidledger_app.ledger.hedera_service')
+    @patch('aidledger_app.views.hedera_service')
+    def test_open_circuit_queues_donation(self, view_hedera, ledger_hedera):
+        """Test donations are accepted as pending while HCS is down and submitted later"""
+        donor = Donor.objects.create(name="Test Donor", email="donor@test.com", wallet_id="0.0.1234567")
+        ngo = NGO.objects.create(name="Test NGO", region="Test Region", wallet_id="0.0.2234567")
+        view_hedera.log_donation_to_hcs.side_effect = CircuitOpen('hcs_submit', 15)
+        
+        response = self.client.post(
+            '/api/donate/', {'donor_id': donor.id, 'ngo_id': ngo.id, 'amount': '40.00'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertTrue(response.data['txn_hash'].startswith('queued:'))
+        self.assertEqual(Donor.objects.get(pk=donor.pk).total_donated, 0)
+        
+        ledger_hedera.log_donation_to_hcs.return_value = "0.0.2@1700000000.9"
+        self.assertEqual(submit_queued(), 1)
+        donation = Donation.objects.get()
+        self.assertEqual(donation.status, 'confirmed')
+        self.assertEqual(donation.txn_hash, "0.0.2@1700000000.9")
+        self.assertEqual(Donor.objects.get(pk=donor.pk).total_donated, 40)
+    
+    @patch('aidledger_app.ledger.hedera_service')
+    def test_late_confirmation_reaches_ledger_consumers(self, ledger_hedera):
+        """Test a donation confirmed after newer ones is still folded, sealed and streamed"""
+        donor = Donor.objects.create(name="Test Donor", email="donor@test.com", wallet_id="0.0.1234567")
+        ngo = NGO.objects.create(name="Test NGO", region="Test Region", wallet_id="0.0.2234567")
+        queued = queue_donation(donor, ngo, 40)
+        Donation.objects.create(
+            donor=donor, ngo=ngo, amount=10, txn_hash="0.0.2@1700000000.10", status='confirmed',
+            confirmed_at=datetime(2024, 6, 1, 12, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(update_rollups('donation'), 1)
+        self.assertEqual([epoch.leaf_count for epoch in build_epochs(anchor=False)], [1])
+        cursor = streaming.latest_cursor()
+        
+        ledger_hedera.log_donation_to_hcs.return_value = "0.0.2@1700000000.11"
+        self.assertEqual(submit_queued(), 1)
+        
+        self.assertEqual(update_rollups('donation'), 1)
+        until = datetime.now(dt_timezone.utc) + timedelta(hours=2)
+        self.assertEqual([epoch.leaf_count for epoch in build_epochs(until=until, anchor=False)], [1])
+        self.assertEqual([event['id'] for _, event in streaming.events_after(cursor)], [queued.id])
+
+
+class ConfirmationOrderTestCase(TransactionTestCase):
+    """Consumers must not step over a row whose transaction commits after later ones"""
+    
+    def setUp(self):
+        self.donors = [
+            Donor.objects.create(name=f"Donor {index}", email=f"donor{index}@test.com", wallet_id=f"0.0.10{index}")
+            for index in range(2)
+        ]
+        # One NGO per transaction, so neither waits on the other's row locks
+        self.ngos = [
+            NGO.objects.create(name=f"NGO {index}", region="Test Region", wallet_id=f"0.0.20{index}")
+            for index in range(2)
+        ]
+    
+    def confirm(self, index, amount, **fields):
+        return Donation.objects.create(
+            donor=self.donors[index], ngo=self.ngos[index], amount=amount,
+            txn_hash=f"0.0.2@1700000000.{index}", status='confirmed', **fields
+        )
+    
+    @contextmanager
+    def open_transaction(self, amount, **fields):
+        """Confirm a donation on another connection and commit it only when the block exits"""
+        written, release = threading.Event(), threading.Event()
+        
+        def run():
+            try:
+                with transaction.atomic():
+                    self.confirm(0, amount, **fields)
+                    written.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+        
+        thread = threading.Thread(target=run)
+        thread.start()
+        written.wait(10)
+        try:
+            yield
+        finally:
+            release.set()
+            thread.join()
+    
+    def test_rollups_fold_a_confirmation_committed_late(self):
+        """Test a lower confirmation number committed after a higher one is still folded"""
+        with self.open_transaction(5):
+            self.confirm(1, 10)
+            update_rollups('donation')
+        update_rollups('donation')
+        
+        day = AnalyticsRollup.objects.filter(event_type='donation', granularity='day')
+        self.assertEqual(sum(rollup.total_amount for rollup in day), 15)
+        self.assertEqual(sum(rollup.event_count for rollup in day), 2)
+    
+    def test_stream_replays_a_confirmation_committed_late(self):
+        """Test a stream cursor does not move past a confirmation still committing"""
+        cursor = streaming.latest_cursor()
+        with self.open_transaction(5):
+            self.confirm(1, 10)
+            self.assertEqual(streaming.events_after(cursor), [])
+        
+        events = streaming.events_after(cursor)
+        self.assertEqual([event['txn_hash'] for _, event in events], ["0.0.2@1700000000.0", "0.0.2@1700000000.1"])
+        self.assertEqual(streaming.events_after(events[-1][0]), [])
+    
+    def test_reconcile_checks_rows_confirmed_after_a_run(self):
+        """Test an incremental run checks a row created before the last run but confirmed after it"""
+        MirrorCheckpoint.objects.create(topic_id="0.0.9000", last_consensus_timestamp="1893456000.000000000")
+        queued = Donation.objects.create(
+            donor=self.donors[0], ngo=self.ngos[0], amount=5, txn_hash="queued:late",
+            timestamp=datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(reconcile("0.0.9000")['missing_on_ledger']['donation'], [])
+        
+        queued.txn_hash = "0.0.2@1700000000.0"
+        queued.status = 'confirmed'
+        queued.save()
+        self.assertEqual(reconcile("0.0.9000")['missing_on_ledger']['donation'], ["0.0.2@1700000000.0"])
+        self.assertEqual(reconcile("0.0.9000")['missing_on_ledger']['donation'], [])
+    
+    def test_epochs_wait_for_open_transactions(self):
+        """Test an epoch is not sealed past a confirmation still committing"""
+        until = datetime(2024, 6, 2, tzinfo=dt_timezone.utc)
+        with self.open_transaction(5, confirmed_at=datetime(2024, 6, 1, 12, 10, tzinfo=dt_timezone.utc)):
+            self.confirm(1, 10, confirmed_at=datetime(2024, 6, 1, 12, 20, tzinfo=dt_timezone.utc))
+            self.assertEqual(build_epochs(until=until, anchor=False), [])
+        
+        self.assertEqual([epoch.leaf_count for epoch in build_epochs(until=until, anchor=False)], [2])
+
+
+class AccountPoolTestCase(TestCase):
+    def setUp(self):
+        for index in range(3):
+            PooledAccount.objects.create(
+                account_id=f"0.0.900{index}",
+                encrypted_key=accounts.encrypt_key(f"302e0201-key-{index}")
+            )
+    
+    def test_claims_are_exclusive_and_keys_encrypted(self):
+        """Test accounts are handed out once each, oldest first, with recoverable keys"""
+        self.assertEqual(accounts.claim_accounts(2), ["0.0.9000", "0.0.9001"])
+        self.assertEqual(accounts.claim_account(), "0.0.9002")
+        self.assertIsNone(accounts.claim_account())
+        
+        pooled = PooledAccount.objects.get(account_id="0.0.9001")
+        self.assertIsNotNone(pooled.claimed_at)
+        self.assertNotIn("key-1", pooled.encrypted_key)
+        self.assertEqual(accounts.decrypt_key(pooled.encrypted_key), "302e0201-key-1")
+    
+    @patch('aidledger_app.accounts.hedera_service')
+    def test_registration_uses_pool_and_refill(self, hedera):
+        """Test registration claims a pooled wallet and the refill job tops the pool up"""
+        response = self.client.post('/register/', {
+            'username': 'pooled', 'email': 'pooled@example.com', 'user_type': 'donor',
+            'password1': 'a-long-password', 'password2': 'a-long-password',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Donor.objects.get(name='pooled').wallet_id, "0.0.9000")
+        hedera.create_token_account.assert_not_called()
+        
+        hedera.create_token_account.side_effect = [(f"0.0.95{index}", f"key-{index}") for index in range(4)]
+        self.assertEqual(accounts.refill(low_water=3, target=6), 4)
+        self.assertEqual(accounts.available_count(), 6)
+        self.assertEqual(accounts.refill(low_water=3, target=6), 0)
+
+
+class BatchTransferTestCase(TestCase):
+    def test_pack_transfers_respects_network_limits(self):
+        """Test recipients are packed nine to a transaction without repeating an account"""
+        transfers = [(f"0.0.{index % 12}", 5) for index in range(40)]
+        groups = pack_transfers(transfers, 9)
+        
+        self.assertEqual(len(groups), 5)
+        self.assertEqual(sorted(index for group in groups for index in group), list(range(40)))
+        for group in groups:
+            self.assertLessEqual(len(group), 9)
+            self.assertEqual(len({transfers[index][0] for index in group}), len(group))
+    
+    def test_batch_reports_per_recipient_results(self):
+        """Test a failed transaction only fails the recipients packed into it"""
+        transfers = [(f"0.0.{7000 + index}", 10) for index in range(20)]
+        
+        def submit(from_wallet, chunk):
+            if chunk[0][0] == "0.0.7009":
+                raise Exception("INSUFFICIENT_TOKEN_BALANCE")
+            return f"0.0.2@{chunk[0][0]}"
+        
+        with patch.object(hedera_service, '_submit_transfer', side_effect=submit) as submitted:
+            results = hedera_service.transfer_aidcoin_batch("0.0.5000", transfers)
+        
+        self.assertEqual(submitted.call_count, 3)
+        self.assertEqual([result['to_wallet'] for result in results], [wallet for wallet, _ in transfers])
+        self.assertEqual([result['status'] for result in results].count('success'), 11)
+        self.assertEqual(results[9]['error'], "INSUFFICIENT_TOKEN_BALANCE")
+        self.assertEqual(results[0]['txn_hash'], "0.0.2@0.0.7000")
+
+
+
+@override_settings(LEDGER_BATCH_ANCHOR_SIZE=3)
+class DistributionBatchTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567",
+            total_received=1000
+        )
+        self.recipients = [
+            Recipient.objects.create(name=f"Household {index}", location="Test Location",
+                                     wallet_id=f"0.0.{3300000 + index}")
+            for index in range(5)
+        ]
+    
+    def _batch(self, amount):
+        return {
+            'ngo_id': self.ngo.id,
+            'distributions': [{'recipient_id': r.id, 'amount': amount} for r in self.recipients],
+        }
+    
+    @patch.object(hedera_service, 'log_distribution_batch_to_hcs', side_effect=["0.0.2@1700000100.000000000",
+                                                                               "0.0.2@1700000101.000000000"])
+    def test_batch_anchors_rows_per_message(self, log_batch):
+        """Test a run is stored in bulk and anchored with one message per chunk"""
+        response = self.client.post(reverse('create-distribution-batch'), self._batch('100.00'), format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(log_batch.call_count, 2)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(Distribution.objects.filter(status='confirmed').count(), 5)
+        self.assertEqual(
+            sorted(Distribution.objects.values_list('txn_hash', flat=True))[:2],
+            ["0.0.2@1700000100.000000000#0", "0.0.2@1700000100.000000000#1"]
+        )
+        
+        # Reconciliation matches each batch message against its rows' total
+        payload = {"type": "distribution_batch", "ngo": "Test NGO", "amount": "300.00"}
+        TopicMessage.objects.create(
+            topic_id="0.0.9000", sequence_number=1, consensus_timestamp="1700000100.000000001",
+            txn_hash="0.0.2@1700000100.000000000", event_type="distribution_batch",
+            amount=300, payload=payload
+        )
+        report = reconcile("0.0.9000")
+        self.assertEqual(report['missing_in_db']['distribution'], [])
+        self.assertEqual(report['mismatched']['distribution'], [])
+    
+    @patch.object(hedera_service, 'log_distribution_batch_to_hcs')
+    def test_batch_rejected_before_ledger(self, log_batch):
+        """Test unknown recipients and overdrawn runs are refused without touching Hedera"""
+        batch = self._batch('100.00')
+        batch['distributions'].append({'recipient_id': 999999, 'amount': '1.00'})
+        response = self.client.post(reverse('create-distribution-batch'), batch, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('999999', str(response.data['distributions']))
+        
+        response = self.client.post(reverse('create-distribution-batch'), self._batch('250.00'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Insufficient funds')
+        
+        log_batch.assert_not_called()
+        self.assertFalse(Distribution.objects.exists())
+
+
+@override_settings(RECURRING_MAX_CATCH_UP=3)
+class RecurringDonationTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(name="Test Donor", email="test@example.com", wallet_id="0.0.1234567")
+        self.ngo = NGO.objects.create(name="Test NGO", region="Test Region", wallet_id="0.0.2234567")
+        self.now = datetime(2024, 6, 15, tzinfo=dt_timezone.utc)
+    
+    @patch.object(hedera_service, 'log_donation_batch_to_hcs', side_effect=lambda entries: f"0.0.2@{len(entries)}.1")
+    def test_due_schedules_charged_once(self, log_batch):
+        """Test due schedules are charged in one batch message and not again on the next pass"""
+        due = [
+            RecurringDonation.objects.create(donor=self.donor, ngo=self.ngo, amount=10,
+                                             next_run_at=datetime(2024, 6, day, tzinfo=dt_timezone.utc))
+            for day in (1, 2, 3)
+        ]
+        RecurringDonation.objects.create(donor=self.donor, ngo=self.ngo, amount=10,
+                                         next_run_at=datetime(2024, 7, 1, tzinfo=dt_timezone.utc))
+        
+        self.assertEqual(recurring.run_due(now=self.now), 3)
+        self.assertEqual(recurring.run_due(now=self.now), 0)
+        
+        log_batch.assert_called_once()
+        self.assertEqual(Donation.objects.filter(status='confirmed', schedule__isnull=False).count(), 3)
+        self.donor.refresh_from_db()
+        self.assertEqual(self.donor.total_donated, 30)
+        due[0].refresh_from_db()
+        self.assertEqual(due[0].next_run_at, datetime(2024, 7, 1, tzinfo=dt_timezone.utc))
+    
+    @patch.object(hedera_service, 'log_donation_batch_to_hcs', side_effect=CircuitOpen('hcs_submit', 5))
+    def test_catch_up_after_downtime(self, log_batch):
+        """Test a schedule far behind is charged for its latest missed runs only, oldest first"""
+        schedule = RecurringDonation.objects.create(
+            donor=self.donor, ngo=self.ngo, amount=10,
+            next_run_at=datetime(2024, 1, 31, tzinfo=dt_timezone.utc)
+        )
+        
+        self.assertEqual(recurring.run_due(now=self.now, limit=2), 2)
+        self.assertEqual(recurring.run_due(now=self.now), 1)
+        
+        runs = list(Donation.objects.filter(schedule=schedule).order_by('scheduled_for')
+                    .values_list('scheduled_for__month', 'status'))
+        self.assertEqual(runs, [(3, 'pending'), (4, 'pending'), (5, 'pending')])
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_run_at, datetime(2024, 6, 30, tzinfo=dt_timezone.utc))
+    
+    def test_monthly_runs_keep_their_anchor_day(self):
+        """Test a short month clamps one run without moving the ones after it"""
+        schedule = RecurringDonation.objects.create(
+            donor=self.donor, ngo=self.ngo, amount=10,
+            next_run_at=datetime(2024, 1, 31, tzinfo=dt_timezone.utc)
+        )
+        self.assertEqual(schedule.anchor_day, 31)
+        
+        runs = [schedule.next_run_at]
+        for _ in range(3):
+            runs.append(recurring.advance(runs[-1], schedule.interval, schedule.anchor_day))
+        self.assertEqual([run.day for run in runs], [31, 29, 31, 30])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+    
+    def _routed_view(self, calls):
+        @replicas.replica_reads
+        def view(request):
+            calls.append(self.router.db_for_read(Donation))
+            if calls[0] == 'replica_1' and len(calls) == 1 and request.GET.get('fail'):
+                raise OperationalError("connection refused")
+            return HttpResponse()
+        return view
+    
+    def test_reads_routed_unless_pinned_or_marked(self):
+        """Test read-only views use a replica except within the read-your-writes window or while it is marked"""
+        calls = []
+        view = self._routed_view(calls)
+        
+        view(self.factory.get('/'))
+        view(self.factory.post('/'))
+        pinned = self.factory.get('/')
+        pinned.COOKIES[replicas.PIN_COOKIE] = str(time.time() + 5)
+        view(pinned)
+        replicas.mark_replica('replica_1', 'lagging')
+        view(self.factory.get('/'))
+        
+        self.assertEqual(calls, ['replica_1', None, None, None])
+        self.assertIsNone(self.router.db_for_read(Donation))
+        self.assertEqual(self.router.db_for_write(Donation), 'default')
+    
+    def test_writes_pin_client_and_failed_replica_falls_back(self):
+        """Test a write sets the pin cookie and a replica error reruns the view on the primary"""
+        response = self.client.post(reverse('donor-list'), {
+            'name': "Pinned Donor", 'email': "pinned@example.com", 'wallet_id': "0.0.7654321"
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertGreater(float(response.cookies[replicas.PIN_COOKIE].value), time.time())
+        
+        calls = []
+        self._routed_view(calls)(self.factory.get('/', {'fail': '1'}))
+        self.assertEqual(calls, ['replica_1', None])
+        self.assertEqual(replicas.marks(), {'replica_1': 'unreachable'})
+    
+    def test_marks_shared_through_database_and_expire(self):
+        """Test a mark made by another process reaches this one, and lapses when it expires"""
+        replicas.mark_replica('replica_1', 'lagging')
+        # A per-process cache would not carry the mark over from the check_replicas command
+        cache.clear()
+        self.assertEqual(replicas.marks(), {'replica_1': 'lagging'})
+        self.assertIsNone(replicas.choose_replica())
+        
+        ReplicaMark.objects.update(expires_at=datetime.now(dt_timezone.utc) - timedelta(seconds=1))
+        self.assertEqual(replicas.marks(), {})
+        self.assertEqual(replicas.choose_replica(), 'replica_1')
+
+
+class LedgerPartitionTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        self.donation = Donation.objects.create(
+            donor=self.donor,
+            ngo=self.ngo,
+            amount=25,
+            txn_hash="old_hash",
+            timestamp=datetime(2020, 3, 15, tzinfo=dt_timezone.utc)
+        )
+    
+    def _partition_ids(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {name}")
+            return [row[0] for row in cursor.fetchall()]
+    
+    def test_ensure_partitions_moves_rows_out_of_default(self):
+        """Test creating a month's partition picks up its rows from the default partition"""
+        default = f"{Donation._meta.db_table}_default"
+        march = partitions.partition_name(Donation, date(2020, 3, 1))
+        self.assertEqual(self._partition_ids(default), [self.donation.pk])
+        
+        created = partitions.ensure_partitions(ahead=1, today=date(2020, 3, 10))
+        self.assertIn(march, created)
+        self.assertIn(partitions.partition_name(Distribution, date(2020, 4, 1)), created)
+        self.assertEqual(partitions.ensure_partitions(ahead=1, today=date(2020, 3, 10)), [])
+        
+        self.assertEqual(self._partition_ids(march), [self.donation.pk])
+        self.assertEqual(self._partition_ids(default), [])
+        self.assertEqual(Donation.objects.get(txn_hash="old_hash").pk, self.donation.pk)
+    
+    def test_keys_unique_across_partitions(self):
+        """Test txn_hash and schedule runs stay unique across months, on insert and on update"""
+        later = datetime(2021, 7, 1, tzinfo=dt_timezone.utc)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Donation.objects.create(donor=self.donor, ngo=self.ngo, amount=5, txn_hash="old_hash", timestamp=later)
+        
+        other = Donation.objects.create(donor=self.donor, ngo=self.ngo, amount=5, txn_hash="new_hash", timestamp=later)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Donation.objects.filter(pk=other.pk).update(txn_hash="old_hash")
+        
+        schedule = RecurringDonation.objects.create(donor=self.donor, ngo=self.ngo, amount=5)
+        run = datetime(2021, 8, 1, tzinfo=dt_timezone.utc)
+        Donation.objects.filter(pk=self.donation.pk).update(schedule=schedule, scheduled_for=run)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Donation.objects.create(donor=self.donor, ngo=self.ngo, amount=5, txn_hash="run_hash",
+                                    timestamp=later, schedule=schedule, scheduled_for=run)
+        
+        # Archiving the month keeps its keys taken
+        Donation.objects.filter(pk=self.donation.pk).update(status='failed')
+        partitions.ensure_partitions(ahead=0, today=date(2020, 3, 1))
+        with tempfile.TemporaryDirectory() as directory:
+            partitions.archive_partition('donations', date(2020, 3, 1), directory)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Donation.objects.create(donor=self.donor, ngo=self.ngo, amount=5, txn_hash="old_hash", timestamp=later)
+    
+    @patch('aidledger_app.ledger.hedera_service')
+    def test_archived_distributions_still_count_against_funds(self, ledger_hedera):
+        """Test archiving a month of distributions does not free its amount to be distributed again"""
+        recipient = Recipient.objects.create(name="Test Recipient", location="Test Location", wallet_id="0.0.3234567")
+        NGO.objects.filter(pk=self.ngo.pk).update(total_received=100)
+        Distribution.objects.create(
+            ngo=self.ngo, recipient=recipient, amount=60, txn_hash="queued:old_distribution",
+            timestamp=datetime(2020, 3, 20, tzinfo=dt_timezone.utc), allocated=True
+        )
+        ledger_hedera.log_distribution_to_hcs.return_value = "0.0.2@1700000000.1"
+        self.assertEqual(submit_queued(), 1)
+        partitions.ensure_partitions(ahead=0, today=date(2020, 3, 1))
+        with tempfile.TemporaryDirectory() as directory:
+            partitions.archive_partition('distributions', date(2020, 3, 1), directory)
+        
+        self.assertFalse(Distribution.objects.exists())
+        self.assertEqual(available_funds(NGO.objects.get(pk=self.ngo.pk)), 40)
+        with self.assertRaises(InsufficientFunds):
+            reserve_distribution_batch(self.ngo, [(recipient, 50)])
+    
+    def test_archived_month_served_from_file(self):
+        """Test a settled month is moved to Parquet and still readable through the API"""
+        partitions.ensure_partitions(ahead=0, today=date(2020, 3, 1))
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                partitions.archive_partition('donations', date(2020, 3, 1), directory)
+            
+            Donation.objects.filter(pk=self.donation.pk).update(status='failed')
+            archived = partitions.archive_partition('donations', date(2020, 3, 1), directory)
+            self.assertEqual(archived.row_count, 1)
+            self.assertFalse(Donation.objects.filter(pk=self.donation.pk).exists())
+            
+            response = self.client.get('/api/archive/donations/2020-03/', {'donor': self.donor.pk})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['count'], 1)
+            self.assertEqual(response.data['results'][0]['txn_hash'], "old_hash")
+            self.assertEqual(response.data['results'][0]['amount'], "25.00")
+            
+            response = self.client.get('/api/archive/donations/2020-03/', {'status': 'confirmed'})
+            self.assertEqual(response.data['count'], 0)
+            self.assertEqual(self.client.get('/api/archive/donations/2020-04/').status_code,
+                             status.HTTP_404_NOT_FOUND)
+
+
+class ColdArchiveTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        other = Donor.objects.create(name="Other Donor", email="other@example.com", wallet_id="0.0.1234568")
+        for day, donor in [(3, self.donor), (5, other), (9, self.donor)]:
+            Donation.objects.create(
+                donor=donor, ngo=self.ngo, amount=day, txn_hash=f"cold_hash_{day}", status='confirmed',
+                allocated_amount=day, timestamp=datetime(2020, 3, day, tzinfo=dt_timezone.utc)
+            )
+        Donation.objects.create(
+            donor=self.donor, ngo=self.ngo, amount=50, txn_hash="live_hash", status='confirmed'
+        )
+        
+        self.directory = tempfile.TemporaryDirectory()
+        partitions.ensure_partitions(ahead=0, today=date(2020, 3, 1))
+        self.archived = partitions.archive_partition('donations', date(2020, 3, 1), self.directory.name)
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    @patch.object(hedera_service, 'verify_transaction', return_value={'result': 'SUCCESS'})
+    def test_verify_falls_through_to_archive(self, mock_verify):
+        """Test verification reports the archived record found through the txn_hash index"""
+        response = self.client.get('/api/verify/cold_hash_5/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['result'], 'SUCCESS')
+        record = response.data['ledger_record']
+        self.assertTrue(record['archived'])
+        self.assertEqual((record['type'], record['donor_name'], record['amount']), ('donation', "Other Donor", "5.00"))
+        
+        self.assertFalse(self.client.get('/api/verify/live_hash/').data['ledger_record']['archived'])
+        self.assertIsNone(archive.find_transaction("missing_hash"))
+    
+    def test_entity_history_appends_archived_rows(self):
+        """Test a donor-filtered list returns live rows, then archived ones newest first"""
+        # Archives written before indexes existed get them on first read
+        for path in archive.index_paths(self.archived.path):
+            path.unlink()
+        
+        response = self.client.get('/api/donations/', {'donor': self.donor.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['txn_hash'] for row in response.data], ["live_hash", "cold_hash_9", "cold_hash_3"])
+        self.assertEqual(response.data[1]['ngo_name'], "Test NGO")
+        
+        history = archive.entity_history('donations', {'ngo_id': self.ngo.pk, 'donor_id': self.donor.pk}, limit=1)
+        self.assertEqual([donation.txn_hash for donation in history], ["cold_hash_9"])
+        self.assertEqual(self.client.get('/api/donations/', {'donor': 'x'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+@patch.object(hedera_service, 'get_account_balance', return_value={'hbar_balance': '1', 'token_balances': []})
+class UserDashboardTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user('donor', 'donor@example.com', 'password')
+        CustomUser.objects.create(user=self.user, user_type='donor')
+        self.donor = Donor.objects.create(
+            user=self.user,
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        self.client.force_login(self.user)
+    
+    def _donate(self, count):
+        for _ in range(count):
+            ngo = NGO.objects.create(
+                name=f"NGO {NGO.objects.count()}", region="Test Region", wallet_id=f"0.0.9{NGO.objects.count():06d}"
+            )
+            Donation.objects.create(
+                donor=self.donor, ngo=ngo, amount=5, txn_hash=f"dash_hash_{ngo.pk}", status='confirmed'
+            )
+    
+    def test_query_count_does_not_grow_with_data(self, mock_balance):
+        """Test the dashboard renders in the same number of queries for 10 or 30 donations and NGOs"""
+        self._donate(10)
+        cache.clear()
+        with self.assertNumQueries(6):
+            self.client.get(reverse('user_dashboard'))
+        
+        self._donate(20)
+        cache.clear()
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('user_dashboard'))
+        self.assertEqual(len(response.context['donations']), 10)
+        self.assertEqual(response.context['aggregates'], {'donation_count': 30})
+        self.assertContains(response, "NGO 29")
+        self.assertContains(response, "Latest 10 of 30 donations")
+    
+    def test_aggregates_cached_until_own_write(self, mock_balance):
+        """Test counts come from the per-user cache and a new donation drops it"""
+        self._donate(2)
+        self.assertEqual(dashboard.user_aggregates('donor', self.donor.pk), {'donation_count': 2})
+        with self.assertNumQueries(0):
+            dashboard.user_aggregates('donor', self.donor.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self._donate(1)
+        self.assertEqual(dashboard.user_aggregates('donor', self.donor.pk), {'donation_count': 3})
+
+
+class TypeaheadTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        for index, name in enumerate(["Red Cross", "red crescent", "Relief Fund", "Oxfam"]):
+            NGO.objects.create(name=name, region=f"Region {index}", wallet_id=f"0.0.880{index}")
+        for index in range(30):
+            Recipient.objects.create(name=f"Family {index:02d}", location="Camp A", wallet_id=f"0.0.990{index:02d}")
+    
+    def test_prefix_suggestions_are_bounded_and_indexed(self):
+        """Test suggestions match name prefixes case-insensitively, capped, in index order"""
+        response = self.client.get(reverse('ngo-suggest'), {'q': 'RED'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(r['name'], r['detail']) for r in response.data['results']],
+                         [("red crescent", "Region 1"), ("Red Cross", "Region 0")])
+        
+        response = self.client.get(reverse('recipient-suggest'), {'q': 'fam', 'limit': 500})
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(response.data['results'][0]['name'], "Family 00")
+        self.assertEqual(self.client.get(reverse('recipient-suggest'), {'q': ' '}).data['results'], [])
+        
+        with CaptureQueriesContext(connection) as queries:
+            search.suggest('ngo', 'red')
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {queries.captured_queries[0]['sql']}")
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        # The prefix range and the ordering both come from the index; only pk ties are sorted
+        self.assertIn('Index Scan using ngo_name_prefix', plan)
+        self.assertNotIn('\n  ->  Sort', plan)
+        self.assertIn('Presorted Key', plan)
+    
+    def test_forms_no_longer_list_every_entity(self):
+        """Test the donation form renders a typeahead instead of every NGO"""
+        user = User.objects.create_user('donor', 'donor@example.com', 'password')
+        CustomUser.objects.create(user=user, user_type='donor')
+        self.client.force_login(user)
+        
+        response = self.client.get('/donate/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, reverse('ngo-suggest'))
+        self.assertNotContains(response, "Oxfam")
+
+
+class LedgerAdminTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(self.admin)
+        
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngo = NGO.objects.create(
+            name="Test NGO",
+            region="Test Region",
+            wallet_id="0.0.2234567"
+        )
+        
+        for txn_hash, row_status in [("0.0.2@1.1#0", 'confirmed'), ("0.0.2@1.1#1", 'confirmed'),
+                                     ("0.0.2@2.2", 'failed'), ("queued:abc", 'pending')]:
+            Donation.objects.create(donor=self.donor, ngo=self.ngo, amount=10, txn_hash=txn_hash, status=row_status)
+    
+    def test_changelist_uses_estimates_past_the_limit(self):
+        """Test large tables are paginated on the planner's estimate instead of COUNT(*)"""
+        queryset = Donation.objects.all()
+        self.assertEqual(EstimatedCountPaginator(queryset, 100).count, 4)
+        
+        with override_settings(ADMIN_EXACT_COUNT_LIMIT=0):
+            with CaptureQueriesContext(connection) as queries:
+                count = EstimatedCountPaginator(queryset, 100).count
+        self.assertEqual(count, estimated_count(queryset))
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        
+        response = self.client.get('/admin/aidledger_app/donation/', {'status__exact': 'confirmed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Test NGO")
+    
+    @patch.object(async_ledger, 'verify_transaction', new_callable=AsyncMock,
+                  return_value={'transactions': [{'result': 'SUCCESS'}]})
+    def test_reverify_action_runs_in_background(self, mock_verify):
+        """Test the re-verify action returns at once and its stored report shows on the next changelist"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/admin/aidledger_app/donation/', {
+                'action': 'reverify_on_mirror_node',
+                '_selected_action': list(Donation.objects.values_list('pk', flat=True)),
+            }, follow=True)
+        self.assertContains(response, "Re-verifying 4 rows in the background")
+        self.assertEqual(len(callbacks), 1)
+        job = ReverifyJob.objects.get()
+        self.assertEqual(job.status, 'pending')
+        
+        # The worker thread would see the job only once the test transaction commits
+        self.assertEqual(reverify.run_job(job.pk)['job'], job.pk)
+        self.assertIsNone(reverify.run_job(job.pk))
+        
+        # Rows sharing a batch anchor are looked up once; queued rows not at all
+        self.assertEqual(sorted(call.args[0] for call in mock_verify.await_args_list), ["0.0.2@1.1", "0.0.2@2.2"])
+        response = self.client.get('/admin/aidledger_app/donation/')
+        self.assertContains(response, "2 verified, 1 mismatched, 0 unreachable, 1 queued")
+        self.assertContains(response, "0.0.2@2.2 (failed, network: success)")
+        self.assertNotContains(self.client.get('/admin/aidledger_app/donation/'), "verified")
+    
+    @patch.object(async_ledger, 'verify_transaction', new_callable=AsyncMock,
+                  return_value={'transactions': [{'result': 'SUCCESS'}]})
+    def test_jobs_interrupted_by_restart_are_finished(self, mock_verify):
+        """Test the command runs queued jobs and takes over ones whose worker outlived its lease"""
+        rows = [["0.0.2@1.1#0", 'confirmed']]
+        queued = ReverifyJob.objects.create(user=self.admin, label="donations", rows=rows)
+        abandoned = ReverifyJob.objects.create(
+            user=self.admin, label="donations", rows=rows, status='running',
+            started_at=datetime.now(dt_timezone.utc) - timedelta(hours=1)
+        )
+        ReverifyJob.objects.create(
+            user=self.admin, label="donations", rows=rows, status='running',
+            started_at=datetime.now(dt_timezone.utc)
+        )
+        
+        call_command('run_reverify_jobs', stdout=io.StringIO())
+        self.assertEqual(
+            sorted(report['job'] for report in reverify.pop_reports(self.admin.pk)), [queued.pk, abandoned.pk]
+        )
+        self.assertEqual(reverify.pop_reports(self.admin.pk), [])
+
+
+class EntityIdentityMapTestCase(APITestCase):
+    def setUp(self):
+        """Set up test data"""
+        self.donor = Donor.objects.create(
+            name="Test Donor",
+            email="test@example.com",
+            wallet_id="0.0.1234567"
+        )
+        
+        self.ngos = [
+            NGO.objects.create(name=f"NGO {index}", region="Test Region", wallet_id=f"0.0.22{index}")
+            for index in range(3)
+        ]
+    
+    def _selects_from(self, queries, table):
+        return [q['sql'] for q in queries.captured_queries
+                if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+    
+    @patch.object(hedera_service, 'log_donation_to_hcs', return_value='0.0.2@1700000000.1')
+    def test_view_reuses_entities_fetched_by_validation(self, mock_log):
+        """Test a donation request reads its donor and NGO once each"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/donate/', {
+                'donor_id': self.donor.pk, 'ngo_id': self.ngos[0].pk, 'amount': '10.00'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self._selects_from(queries, Donor._meta.db_table)), 1)
+        self.assertEqual(len(self._selects_from(queries, NGO._meta.db_table)), 1)
+        
+        with entities.scope():
+            self.assertIs(entities.require(Donor, self.donor.pk), entities.get(Donor, self.donor.pk))
+            with self.assertRaises(NGO.DoesNotExist):
+                entities.require(NGO, 999999)
+    
+    def test_batched_validation_uses_one_query_per_model(self):
+        """Test many=True validation resolves every donor and NGO id with a single IN query each"""
+        data = [{'donor_id': self.donor.pk, 'ngo_id': ngo.pk, 'amount': '5.00'} for ngo in self.ngos]
+        data.append({'donor_id': self.donor.pk, 'ngo_id': 999999, 'amount': '5.00'})
+        
+        serializer = DonationCreateSerializer(data=data, many=True)
+        with self.assertNumQueries(2):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors[3], {'ngo_id': ["NGO not found"]})
+        self.assertEqual(serializer.errors[:3], [{}, {}, {}])
+
+
+class WalletIndexTestCase(TestCase):
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        wallets.wallet_index.clear()
+        self.addCleanup(wallets.wallet_index.clear)
+        
+        self.donor = Donor.objects.create(name="Test Donor", email="test@example.com", wallet_id="0.0.1234567")
+        self.ngo = NGO.objects.create(name="Test NGO", region="Test Region", wallet_id="0.0.7654321")
+        self.recipients = [
+            Recipient.objects.create(name=f"Recipient {index}", location="Test Location", wallet_id=f"0.0.33{index}")
+            for index in range(4)
+        ]
+    
+    def _version(self):
+        return caching.resource_versions([wallets.VERSION_RESOURCE])[wallets.VERSION_RESOURCE]
+    
+    @override_settings(WALLET_INDEX_SIZE=3)
+    def test_resolves_from_memory_within_bound(self):
+        """Test the warmed index answers with only its version check and evicts least recently used accounts"""
+        self.assertEqual(wallets.wallet_index.warm(), 3)
+        with self.assertNumQueries(2):
+            self.assertEqual(wallets.resolve("0.0.1234567"), ("donor", self.donor.pk, "Test Donor"))
+            self.assertEqual(wallets.resolve("0.0.7654321"), ("ngo", self.ngo.pk, "Test NGO"))
+        
+        # Unknown accounts are remembered, pushing out the least recently used entry
+        with self.assertNumQueries(4):
+            self.assertEqual(wallets.resolve_many(["0.0.999", "0.0.330"]), {
+                "0.0.999": None,
+                "0.0.330": ("recipient", self.recipients[0].pk, "Recipient 0"),
+            })
+        self.assertEqual(len(wallets.wallet_index), 3)
+        with self.assertNumQueries(1):
+            self.assertIsNone(wallets.resolve("0.0.999"))
+        with self.assertNumQueries(2):
+            wallets.resolve("0.0.1234567")
+    
+    def test_entity_writes_invalidate_every_worker(self):
+        """Test saving or deleting an entity bumps the shared version and drops cached owners"""
+        self.assertEqual(wallets.resolve("0.0.7654321").name, "Test NGO")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ngo.name = "Renamed NGO"
+            self.ngo.save()
+        self.assertEqual(self._version(), 1)
+        self.assertEqual(wallets.resolve("0.0.7654321").name, "Renamed NGO")
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipients[1].delete()
+        self.assertEqual(self._version(), 2)
+        self.assertIsNone(wallets.resolve("0.0.331"))
+        
+        mirror_result = {'transactions': [{'transfers': [
+            {'account': "0.0.1234567", 'amount': -5}, {'account': "0.0.98", 'amount': 5}
+        ]}]}
+        self.assertEqual(wallets.transfer_owners(mirror_result), {
+            "0.0.1234567": {'type': 'donor', 'id': self.donor.pk, 'name': "Test Donor"}
+        })
+
+
+class URLConfTestCase(TestCase):
+    def test_names_reverse_to_their_single_route(self):
+        """Test HTML and API routes reverse to unprefixed paths and resolve to their own views"""
+        self.assertEqual(reverse('home'), '/')
+        self.assertEqual(reverse('make_donation'), '/donate/')
+        self.assertEqual(reverse('create-donation'), '/api/donate/')
+        self.assertEqual(resolve('/api/donate/').url_name, 'create-donation')
+        self.assertEqual(resolve('/donate/').url_name, 'make_donation')
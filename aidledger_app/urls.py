@@ -18,13 +18,34 @@ urlpatterns = [
     path('api/donors/', views.DonorListCreateView.as_view(), name='donor-list'),
     path('api/ngos/', views.NGOListCreateView.as_view(), name='ngo-list'),
     path('api/recipients/', views.RecipientListCreateView.as_view(), name='recipient-list'),
+    path('api/ngos/suggest/', views.suggest_view, {'kind': 'ngo'}, name='ngo-suggest'),
+    path('api/recipients/suggest/', views.suggest_view, {'kind': 'recipient'}, name='recipient-suggest'),
+    path('api/donors/<int:donor_id>/impact/', views.donor_impact, name='donor-impact'),
     path('api/donations/', views.DonationListView.as_view(), name='donation-list'),
     path('api/distributions/', views.DistributionListView.as_view(), name='distribution-list'),
+    path('api/recurring/', views.RecurringDonationListCreateView.as_view(), name='recurring-donation-list'),
     path('api/donate/', views.create_donation, name='create-donation'),
     path('api/distribute/', views.create_distribution, name='create-distribution'),
+    path('api/distribute/batch/', views.create_distribution_batch, name='create-distribution-batch'),
     path('api/transactions/', views.get_transactions, name='get-transactions'),
+    path('api/archive/', views.archived_partitions, name='archived-partitions'),
+    path('api/archive/<str:table>/<str:month>/', views.archived_rows, name='archived-rows'),
+    path('api/export/<str:table>/', views.export_table, name='export-table'),
     path('api/verify/<str:txn_hash>/', views.verify_transaction, name='verify-transaction'),
+    path('api/search/', views.search_view, name='search'),
+    path('api/proof/<str:txn_hash>/', views.get_proof, name='get-proof'),
     path('api/stats/', views.get_stats, name='get-stats'),
+    path('api/health/ledger/', views.ledger_health, name='ledger-health'),
+    
+    # Async (ASGI) API endpoints
+    path('api/async/verify/<str:txn_hash>/', views.verify_transaction_async, name='verify-transaction-async'),
+    path('api/async/balance/<str:wallet_id>/', views.get_account_balance_async, name='account-balance-async'),
+    path('api/async/donate/', views.create_donation_async, name='create-donation-async'),
+    path('api/async/distribute/', views.create_distribution_async, name='create-distribution-async'),
+    
+    # Live transaction stream
+    path('api/stream/transactions/', views.stream_transactions, name='stream-transactions'),
+    path('api/analytics/timeseries/', views.analytics_timeseries, name='analytics-timeseries'),
     
     # Public dashboard
     path('', views.dashboard_view, name='home'),
@@ -1,53 +1,178 @@
 from rest_framework import generics, status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django.shortcuts import render, redirect
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.cache import cache
+from django.http import FileResponse, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags, urlencode
+from django.views.decorators.http import condition, require_GET
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
+from datetime import datetime
 from decimal import Decimal
+import functools
+import hashlib
+import json
 import logging
+import tempfile
 
-from .models import CustomUser, Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats
+from .models import (
+    CustomUser, Donor, NGO, Recipient, Donation, Distribution, AidLedgerStats, MerkleLeaf,
+    RecurringDonation, ArchivedPartition
+)
 from .serializers import (
     DonorSerializer, NGOSerializer, RecipientSerializer,
     DonationSerializer, DistributionSerializer, AidLedgerStatsSerializer,
-    DonationCreateSerializer, DistributionCreateSerializer
+    DonationCreateSerializer, DistributionCreateSerializer, DistributionBatchSerializer,
+    AnalyticsBucketSerializer,
+    DonorImpactSerializer, SearchResultSerializer, RecurringDonationSerializer, ArchivedPartitionSerializer
 )
 from .hedera_service import hedera_service
+from . import (
+    accounts, analytics, allocation, archive, async_ledger, caching, circuit, dashboard, entities, export,
+    ledger, merkle, partitions, search, streaming, wallets
+)
+from .admission import LedgerBusy, ledger_admission
+from .circuit import CircuitOpen
+from .idempotency import idempotent
+from .replicas import replica_reads
 
 logger = logging.getLogger(__name__)
 
 
-class DonorListCreateView(generics.ListCreateAPIView):
+def ledger_busy_response(error, response_class=Response):
+    """503 telling the client when to retry a submission the ledger had no room for"""
+    response = response_class(
+        {'error': 'Ledger is busy', 'details': str(error)},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    Serve list responses with strong ETags derived from per-resource change
+    counters, answer If-None-Match with 304 and reuse serialized pages
+    cached by (resource, versions, query params)
+    """
+    version_resources = []
+    
+    def list(self, request, *args, **kwargs):
+        versions = caching.resource_versions(self.version_resources)
+        fingerprint = '|'.join([
+            self.version_resources[0],
+            ','.join(f'{name}={version}' for name, version in versions.items()),
+            request.accepted_renderer.format,
+            urlencode(sorted(request.query_params.lists()), doseq=True)
+        ])
+        digest = hashlib.sha256(fingerprint.encode()).hexdigest()
+        etag = f'"{digest}"'
+        
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f'api:list:{digest}'
+            data = cache.get(cache_key)
+            if data is None:
+                data = super().list(request, *args, **kwargs).data
+                cache.set(cache_key, data, caching.list_cache_timeout())
+            response = Response(data)
+        
+        response['ETag'] = etag
+        patch_cache_control(response, max_age=0, must_revalidate=True)
+        return response
+
+
+@method_decorator(replica_reads, name='dispatch')
+class DonorListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = Donor.objects.all()
     serializer_class = DonorSerializer
+    version_resources = ['donor']
 
 
-class NGOListCreateView(generics.ListCreateAPIView):
+@method_decorator(replica_reads, name='dispatch')
+class NGOListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = NGO.objects.all()
     serializer_class = NGOSerializer
+    version_resources = ['ngo']
 
 
-class RecipientListCreateView(generics.ListCreateAPIView):
+@method_decorator(replica_reads, name='dispatch')
+class RecipientListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = Recipient.objects.all()
     serializer_class = RecipientSerializer
+    version_resources = ['recipient']
 
 
-class DonationListView(generics.ListAPIView):
-    queryset = Donation.objects.all()
+class EntityHistoryMixin:
+    """
+    Filter a ledger list by entity id (e.g. ?donor=3). Filtered lists are
+    an entity's full history: rows already moved to the cold archive follow
+    the live ones, newest first.
+    """
+    archive_table = None
+    entity_filters = {}
+    
+    def entity_filter_values(self):
+        values = {}
+        for param, column in self.entity_filters.items():
+            if param in self.request.query_params:
+                try:
+                    values[column] = int(self.request.query_params[param])
+                except ValueError:
+                    raise ValidationError({param: 'Must be an integer id'})
+        return values
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(**self.entity_filter_values())
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        filters = self.entity_filter_values()
+        if filters:
+            archived = archive.entity_history(self.archive_table, filters)
+            response.data.extend(self.get_serializer(archived, many=True).data)
+        return response
+
+
+@method_decorator(replica_reads, name='dispatch')
+class DonationListView(ConditionalListMixin, EntityHistoryMixin, generics.ListAPIView):
+    queryset = Donation.objects.select_related('donor', 'ngo')
     serializer_class = DonationSerializer
+    version_resources = ['donation', 'donor', 'ngo']
+    archive_table = 'donations'
+    entity_filters = {'donor': 'donor_id', 'ngo': 'ngo_id'}
 
 
-class DistributionListView(generics.ListAPIView):
-    queryset = Distribution.objects.all()
+@method_decorator(replica_reads, name='dispatch')
+class DistributionListView(ConditionalListMixin, EntityHistoryMixin, generics.ListAPIView):
+    queryset = Distribution.objects.select_related('ngo', 'recipient')
     serializer_class = DistributionSerializer
+    version_resources = ['distribution', 'ngo', 'recipient']
+    archive_table = 'distributions'
+    entity_filters = {'ngo': 'ngo_id', 'recipient': 'recipient_id'}
+
+
+class RecurringDonationListCreateView(generics.ListCreateAPIView):
+    """Standing pledges, charged by the run_recurring_donations command"""
+    queryset = RecurringDonation.objects.select_related('donor', 'ngo').order_by('next_run_at')
+    serializer_class = RecurringDonationSerializer
 
 
 @api_view(['POST'])
+@idempotent('donate')
 def create_donation(request):
     """Create a new donation and log it to Hedera"""
     serializer = DonationCreateSerializer(data=request.data)
@@ -56,42 +181,29 @@ def create_donation(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        with transaction.atomic():
-            donor = Donor.objects.get(id=serializer.validated_data['donor_id'])
-            ngo = NGO.objects.get(id=serializer.validated_data['ngo_id'])
-            amount = serializer.validated_data['amount']
-            
+        # Already fetched by validation
+        donor = entities.require(Donor, serializer.validated_data['donor_id'])
+        ngo = entities.require(NGO, serializer.validated_data['ngo_id'])
+        amount = serializer.validated_data['amount']
+        
+        try:
             # Log to Hedera HCS
             txn_hash = hedera_service.log_donation_to_hcs(
                 donor.name, ngo.name, float(amount)
             )
+        except CircuitOpen:
+            # Hedera is down: accept the donation now and submit it once it recovers
+            donation = ledger.queue_donation(donor, ngo, amount)
+            return Response(DonationSerializer(donation).data, status=status.HTTP_202_ACCEPTED)
+        
+        # Create donation record and update totals
+        donation = ledger.record_donation(donor, ngo, amount, txn_hash)
+        
+        response_serializer = DonationSerializer(donation)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
             
-            # Create donation record
-            donation = Donation.objects.create(
-                donor=donor,
-                ngo=ngo,
-                amount=amount,
-                txn_hash=txn_hash,
-                status='confirmed'
-            )
-            
-            # Update donor and NGO totals
-            donor.total_donated += amount
-            donor.save()
-            
-            ngo.total_received += amount
-            ngo.save()
-            
-            # Update statistics
-            stats, created = AidLedgerStats.objects.get_or_create(
-                defaults={'total_donations': 0, 'total_distributions': 0}
-            )
-            stats.total_donations += amount
-            stats.save()
-            
-            response_serializer = DonationSerializer(donation)
-            return Response(response_serializer.data, status=status.HTTP_201_CREATED)
-            
+    except LedgerBusy as e:
+        return ledger_busy_response(e)
     except Exception as e:
         logger.error(f"Failed to create donation: {e}")
         return Response(
@@ -101,6 +213,7 @@ def create_donation(request):
 
 
 @api_view(['POST'])
+@idempotent('distribute')
 def create_distribution(request):
     """Create a new distribution and log it to Hedera"""
     serializer = DistributionCreateSerializer(data=request.data)
@@ -109,35 +222,29 @@ def create_distribution(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        with transaction.atomic():
-            ngo = NGO.objects.get(id=serializer.validated_data['ngo_id'])
-            recipient = Recipient.objects.get(id=serializer.validated_data['recipient_id'])
-            amount = serializer.validated_data['amount']
-            
+        # Already fetched by validation
+        ngo = entities.require(NGO, serializer.validated_data['ngo_id'])
+        recipient = entities.require(Recipient, serializer.validated_data['recipient_id'])
+        amount = serializer.validated_data['amount']
+        
+        try:
             # Log to Hedera HCS
             txn_hash = hedera_service.log_distribution_to_hcs(
                 ngo.name, recipient.name, float(amount)
             )
+        except CircuitOpen:
+            # Hedera is down: accept the distribution now and submit it once it recovers
+            distribution = ledger.queue_distribution(ngo, recipient, amount)
+            return Response(DistributionSerializer(distribution).data, status=status.HTTP_202_ACCEPTED)
+        
+        # Create distribution record and update statistics
+        distribution = ledger.record_distribution(ngo, recipient, amount, txn_hash)
+        
+        response_serializer = DistributionSerializer(distribution)
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
             
-            # Create distribution record
-            distribution = Distribution.objects.create(
-                ngo=ngo,
-                recipient=recipient,
-                amount=amount,
-                txn_hash=txn_hash,
-                status='confirmed'
-            )
-            
-            # Update statistics
-            stats, created = AidLedgerStats.objects.get_or_create(
-                defaults={'total_donations': 0, 'total_distributions': 0}
-            )
-            stats.total_distributions += amount
-            stats.save()
-            
-            response_serializer = DistributionSerializer(distribution)
-            return Response(response_serializer.data, status=status.HTTP_201_CREATED)
-            
+    except LedgerBusy as e:
+        return ledger_busy_response(e)
     except Exception as e:
         logger.error(f"Failed to create distribution: {e}")
         return Response(
@@ -146,6 +253,44 @@ def create_distribution(request):
         )
 
 
+@api_view(['POST'])
+@idempotent('distribute_batch')
+def create_distribution_batch(request):
+    """Create many distributions from one NGO and anchor them to Hedera in a few messages"""
+    serializer = DistributionBatchSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    ngo = serializer.validated_data['ngo']
+    try:
+        distributions = ledger.reserve_distribution_batch(ngo, serializer.validated_data['items'])
+    except ledger.InsufficientFunds as e:
+        return Response(
+            {'error': 'Insufficient funds', 'details': str(e)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        logger.error(f"Failed to create distribution batch: {e}")
+        return Response(
+            {'error': 'Failed to create distribution batch', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    
+    # Rows are stored; anything not anchored now stays queued for submit_queued
+    anchors = ledger.anchor_distribution_batch(ngo, distributions)
+    queued = sum(1 for d in distributions if d.status == 'pending')
+    return Response({
+        'ngo_id': ngo.id,
+        'count': len(distributions),
+        'total_amount': sum(d.amount for d in distributions),
+        'queued': queued,
+        'anchors': anchors,
+        'distributions': DistributionSerializer(distributions, many=True).data,
+    }, status=status.HTTP_202_ACCEPTED if queued else status.HTTP_201_CREATED)
+
+
+@replica_reads
 @api_view(['GET'])
 def get_transactions(request):
     """Get all transactions (donations and distributions)"""
@@ -161,12 +306,113 @@ def get_transactions(request):
     })
 
 
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_table(request, table):
+    """Download a ledger or entity table as a compressed columnar file"""
+    file_format = request.query_params.get('file_format', 'parquet')
+    if table not in export.TABLE_NAMES:
+        return Response({'error': 'Unknown table'}, status=status.HTTP_404_NOT_FOUND)
+    if file_format not in export.FILE_FORMATS:
+        return Response({'error': 'Invalid file_format'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Spool to disk so memory stays flat regardless of table size
+    spool = tempfile.TemporaryFile()
+    try:
+        export.write_table(table, spool, file_format)
+    except Exception as e:
+        spool.close()
+        logger.error(f"Failed to export {table}: {e}")
+        return Response(
+            {'error': 'Failed to export table', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=f'{table}.{file_format}')
+
+
+# Entity filters the archive endpoint accepts per table -> archived column
+ARCHIVE_ENTITY_FILTERS = {
+    'donations': {'donor': 'donor_id', 'ngo': 'ngo_id'},
+    'distributions': {'ngo': 'ngo_id', 'recipient': 'recipient_id'},
+}
+
+
+@api_view(['GET'])
+def archived_partitions(request):
+    """Months of donations and distributions moved out of the database"""
+    serializer = ArchivedPartitionSerializer(ArchivedPartition.objects.all(), many=True)
+    return Response(serializer.data)
+
+
+@api_view(['GET'])
+def archived_rows(request, table, month):
+    """Read-only rows of an archived month, filtered by entity, status or txn_hash"""
+    try:
+        month = datetime.strptime(month, '%Y-%m').date()
+    except ValueError:
+        return Response({'error': 'Month must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+    archive = ArchivedPartition.objects.filter(table=table, month=month).first()
+    if archive is None:
+        return Response({'error': 'No archive for that month'}, status=status.HTTP_404_NOT_FOUND)
+    
+    filters = {
+        column: request.query_params[column]
+        for column in ('status', 'txn_hash') if column in request.query_params
+    }
+    for param, column in ARCHIVE_ENTITY_FILTERS[table].items():
+        if param in request.query_params:
+            try:
+                filters[column] = int(request.query_params[param])
+            except ValueError:
+                return Response({'error': f'Invalid {param}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+        limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return Response({'error': 'Invalid offset or limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        data = partitions.read_archive(archive, filters, offset, limit)
+    except OSError as e:
+        logger.error(f"Failed to read archive {archive}: {e}")
+        return Response(
+            {'error': 'Failed to read archive', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return Response({'table': table, 'month': f"{month:%Y-%m}", **data})
+
+
+def ledger_record(txn_hash):
+    """AidLedger's own record of a transaction, from the live tables or the cold archive"""
+    donation = Donation.objects.select_related('donor', 'ngo').filter(txn_hash=txn_hash).first()
+    if donation is not None:
+        return {'type': 'donation', 'archived': False, **DonationSerializer(donation).data}
+    distribution = Distribution.objects.select_related('ngo', 'recipient').filter(txn_hash=txn_hash).first()
+    if distribution is not None:
+        return {'type': 'distribution', 'archived': False, **DistributionSerializer(distribution).data}
+    
+    found = archive.find_transaction(txn_hash)
+    if found is None:
+        return None
+    table, row = found
+    if table == 'donations':
+        return {'type': 'donation', 'archived': True, **DonationSerializer(row).data}
+    return {'type': 'distribution', 'archived': True, **DistributionSerializer(row).data}
+
+
 @api_view(['GET'])
 def verify_transaction(request, txn_hash):
-    """Verify a transaction using Hedera Mirror Node API"""
+    """Verify a transaction using Hedera Mirror Node API, alongside AidLedger's record of it"""
     try:
         verification_result = hedera_service.verify_transaction(txn_hash)
-        return Response(verification_result)
+        return Response({
+            **verification_result,
+            'ledger_record': ledger_record(txn_hash),
+            'account_owners': wallets.transfer_owners(verification_result),
+        })
     except Exception as e:
         logger.error(f"Failed to verify transaction {txn_hash}: {e}")
         return Response(
@@ -175,6 +421,99 @@ def verify_transaction(request, txn_hash):
         )
 
 
+@api_view(['GET'])
+def get_proof(request, txn_hash):
+    """Get a Merkle inclusion proof for a transaction against its epoch's anchored root"""
+    leaf = MerkleLeaf.objects.select_related('epoch').filter(txn_hash=txn_hash).first()
+    if leaf is None:
+        return Response(
+            {'error': 'Transaction is not yet included in a sealed epoch'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    epoch = leaf.epoch
+    start = leaf.position * merkle.HASH_SIZE
+    return Response({
+        'txn_hash': txn_hash,
+        'event': merkle.event_for_txn(txn_hash),
+        'leaf_hash': bytes(epoch.levels[start:start + merkle.HASH_SIZE]).hex(),
+        'position': leaf.position,
+        'proof': merkle.inclusion_proof(epoch.levels, epoch.leaf_count, leaf.position),
+        'epoch': {
+            'epoch_start': epoch.epoch_start,
+            'epoch_end': epoch.epoch_end,
+            'leaf_count': epoch.leaf_count,
+            'root': epoch.root,
+            'anchor_txn_hash': epoch.anchor_txn_hash or None
+        },
+        'hashing': 'leaf = sha256(0x00 || canonical JSON of event), node = sha256(0x01 || left || right)'
+    })
+
+
+@replica_reads
+@api_view(['GET'])
+def search_view(request):
+    """Typo-tolerant ranked search across entities and transactions"""
+    query = request.query_params.get('q', '').strip()
+    if len(query) < search.MIN_QUERY_LENGTH:
+        return Response(
+            {'error': f'Query must be at least {search.MIN_QUERY_LENGTH} characters'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    types = request.query_params.get('type')
+    if types:
+        types = types.split(',')
+        if any(kind not in search.SEARCH_TYPES for kind in types):
+            return Response({'error': 'Invalid type'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(int(request.query_params.get('limit', search.DEFAULT_LIMIT)), 100)
+    except ValueError:
+        return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = search.search(query, types, max(limit, 1))
+    return Response({
+        'query': query,
+        'results': SearchResultSerializer(results, many=True).data
+    })
+
+
+@replica_reads
+@api_view(['GET'])
+def suggest_view(request, kind):
+    """Typeahead: NGOs or recipients whose name starts with q, a bounded page at a time"""
+    query = request.query_params.get('q', '').strip()
+    try:
+        limit = int(request.query_params.get('limit', search.SUGGEST_LIMIT))
+    except ValueError:
+        return Response({'error': 'Invalid limit'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    results = search.suggest(kind, query, min(max(limit, 1), search.MAX_SUGGEST_LIMIT)) if query else []
+    return Response({'query': query, 'results': results})
+
+
+@api_view(['GET'])
+def ledger_health(request):
+    """Circuit breaker states, admission queue and queued submissions for this process"""
+    queued = {
+        'donations': Donation.objects.filter(status='pending', txn_hash__startswith=ledger.QUEUED_PREFIX).count(),
+        'distributions': Distribution.objects.filter(status='pending', txn_hash__startswith=ledger.QUEUED_PREFIX).count(),
+    }
+    circuits = circuit.health()
+    return Response({
+        'status': 'ok' if all(c['state'] == circuit.CLOSED for c in circuits.values()) else 'degraded',
+        'circuits': circuits,
+        'admission': {
+            'active': ledger_admission.active,
+            'waiting': ledger_admission.waiting,
+            'rejected': ledger_admission.rejected,
+        },
+        'queued_submissions': queued,
+    })
+
+
+@replica_reads
 @api_view(['GET'])
 def get_stats(request):
     """Get AidLedger statistics"""
@@ -188,16 +527,217 @@ def get_stats(request):
         }
     )
     
-    # Update counts
-    stats.total_donors = Donor.objects.count()
-    stats.total_ngos = NGO.objects.count()
-    stats.total_recipients = Recipient.objects.count()
-    stats.save()
+    # Update counts, writing only when they moved so the cached stats stay valid
+    counts = {
+        'total_donors': Donor.objects.count(),
+        'total_ngos': NGO.objects.count(),
+        'total_recipients': Recipient.objects.count()
+    }
+    if any(getattr(stats, field) != value for field, value in counts.items()):
+        for field, value in counts.items():
+            setattr(stats, field, value)
+        stats.save()
     
     serializer = AidLedgerStatsSerializer(stats)
     return Response(serializer.data)
 
 
+@replica_reads
+@api_view(['GET'])
+def donor_impact(request, donor_id):
+    """Get the recipients a donor's money reached via traced fund allocations"""
+    try:
+        donor = Donor.objects.get(id=donor_id)
+    except Donor.DoesNotExist:
+        return Response({'error': 'Donor not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    impact = allocation.donor_impact(donor.id)
+    impact.update({
+        'donor_name': donor.name,
+        'total_donated': donor.total_donated
+    })
+    return Response(DonorImpactSerializer(impact).data)
+
+
+@replica_reads
+@api_view(['GET'])
+def analytics_timeseries(request):
+    """Get a donation or distribution time series from the rollup tables"""
+    event_type = request.query_params.get('event_type', 'donation')
+    granularity = request.query_params.get('granularity', 'day')
+    ngo_id = request.query_params.get('ngo')
+    region = request.query_params.get('region')
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+
+    if event_type not in analytics.EVENT_MODELS:
+        return Response({'error': 'Invalid event_type'}, status=status.HTTP_400_BAD_REQUEST)
+    if granularity not in analytics.GRANULARITIES:
+        return Response({'error': 'Invalid granularity'}, status=status.HTTP_400_BAD_REQUEST)
+    if ngo_id is not None and not ngo_id.isdigit():
+        return Response({'error': 'Invalid ngo'}, status=status.HTTP_400_BAD_REQUEST)
+
+    bounds = {}
+    for name, value in (('start', start), ('end', end)):
+        if value:
+            try:
+                parsed = parse_datetime(value)
+                if parsed is None:
+                    parsed_date = parse_date(value)
+                    parsed = parsed_date and datetime.combine(parsed_date, datetime.min.time())
+            except ValueError:
+                # Well formed but not a real date, e.g. 2024-02-30
+                parsed = None
+            if parsed is None:
+                return Response({'error': f'Invalid {name}'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            bounds[name] = parsed
+
+    series = analytics.timeseries(
+        event_type, granularity,
+        ngo_id=int(ngo_id) if ngo_id else None,
+        region=region,
+        **bounds
+    )
+    return Response({
+        'event_type': event_type,
+        'granularity': granularity,
+        'results': AnalyticsBucketSerializer(series, many=True).data
+    })
+
+
+# Async (ASGI) API views
+# These hold a coroutine rather than a worker thread while waiting on the ledger
+
+def async_api_view(http_method_names):
+    """Restrict an async view to the given methods and exempt it from CSRF like DRF's API views"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in http_method_names:
+                return HttpResponseNotAllowed(http_method_names)
+            return await view(request, *args, **kwargs)
+        # Django 4.2's csrf_exempt would wrap the coroutine in a sync view
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+@async_api_view(['GET'])
+async def verify_transaction_async(request, txn_hash):
+    """Verify a transaction on the Mirror Node without blocking a thread"""
+    verification_result = await async_ledger.verify_transaction(txn_hash)
+    return JsonResponse(verification_result)
+
+
+@async_api_view(['GET'])
+async def get_account_balance_async(request, wallet_id):
+    """Get a wallet's HBAR and token balances from the Mirror Node"""
+    try:
+        balance = await async_ledger.get_account_balance(wallet_id)
+        owner = await sync_to_async(wallets.resolve)(wallet_id)
+        return JsonResponse({**balance, 'owner': owner._asdict() if owner else None})
+    except Exception as e:
+        logger.error(f"Failed to get balance for {wallet_id}: {e}")
+        return JsonResponse(
+            {'error': 'Failed to get account balance', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _json_body(request):
+    try:
+        return json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+
+
+@async_api_view(['POST'])
+@idempotent('donate')
+async def create_donation_async(request):
+    """Create a new donation, awaiting Hedera consensus asynchronously"""
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = DonationCreateSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        donor = await entities.arequire(Donor, serializer.validated_data['donor_id'])
+        ngo = await entities.arequire(NGO, serializer.validated_data['ngo_id'])
+        amount = serializer.validated_data['amount']
+        
+        try:
+            txn_hash = await async_ledger.log_donation(donor.name, ngo.name, float(amount))
+        except CircuitOpen:
+            donation = await sync_to_async(ledger.queue_donation)(donor, ngo, amount)
+            return JsonResponse(DonationSerializer(donation).data, status=status.HTTP_202_ACCEPTED)
+        donation = await sync_to_async(ledger.record_donation)(donor, ngo, amount, txn_hash)
+        
+        return JsonResponse(DonationSerializer(donation).data, status=status.HTTP_201_CREATED)
+    except LedgerBusy as e:
+        return ledger_busy_response(e, JsonResponse)
+    except Exception as e:
+        logger.error(f"Failed to create donation: {e}")
+        return JsonResponse(
+            {'error': 'Failed to create donation', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@async_api_view(['POST'])
+@idempotent('distribute')
+async def create_distribution_async(request):
+    """Create a new distribution, awaiting Hedera consensus asynchronously"""
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = DistributionCreateSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        ngo = await entities.arequire(NGO, serializer.validated_data['ngo_id'])
+        recipient = await entities.arequire(Recipient, serializer.validated_data['recipient_id'])
+        amount = serializer.validated_data['amount']
+        
+        try:
+            txn_hash = await async_ledger.log_distribution(ngo.name, recipient.name, float(amount))
+        except CircuitOpen:
+            distribution = await sync_to_async(ledger.queue_distribution)(ngo, recipient, amount)
+            return JsonResponse(DistributionSerializer(distribution).data, status=status.HTTP_202_ACCEPTED)
+        distribution = await sync_to_async(ledger.record_distribution)(ngo, recipient, amount, txn_hash)
+        
+        return JsonResponse(DistributionSerializer(distribution).data, status=status.HTTP_201_CREATED)
+    except LedgerBusy as e:
+        return ledger_busy_response(e, JsonResponse)
+    except Exception as e:
+        logger.error(f"Failed to create distribution: {e}")
+        return JsonResponse(
+            {'error': 'Failed to create distribution', 'details': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_GET
+def stream_transactions(request):
+    """Push confirmed donations and distributions as Server-Sent Events"""
+    if not streaming.supported(request):
+        # WSGI would drain the endless stream into memory; 204 tells EventSource not to reconnect
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(
+        streaming.sse_stream(last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # Authentication Views
 def register_view(request):
     """User registration view"""
@@ -243,14 +783,14 @@ def register_view(request):
                         user=user,
                         name=username,
                         email=email,
-                        wallet_id=f"0.0.{user.id}0001"  # Simplified for demo
+                        wallet_id=accounts.checkout_account()
                     )
                 elif user_type == 'ngo':
                     ngo = NGO.objects.create(
                         user=user,
                         name=username,
                         region="Global",
-                        wallet_id=f"0.0.{user.id}0002",
+                        wallet_id=accounts.checkout_account(),
                         description=f"NGO created by {username}"
                     )
                 
@@ -285,55 +825,21 @@ def login_view(request):
 
 @login_required
 def user_dashboard(request):
-    """User-specific dashboard"""
-    user = request.user
-    context = {}
-    
+    """User-specific dashboard, loaded in a fixed number of queries"""
     try:
-        custom_user = CustomUser.objects.get(user=user)
-        
-        if custom_user.user_type == 'donor':
-            donor = Donor.objects.get(user=user)
-            donations = Donation.objects.filter(donor=donor).order_by('-timestamp')[:10]
-            
-            # Get wallet balance
-            try:
-                balance = hedera_service.get_account_balance(donor.wallet_id)
-            except:
-                balance = {'hbar_balance': '0', 'token_balances': []}
-            
-            context.update({
-                'profile': donor,
-                'donations': donations,
-                'user_type': 'donor',
-                'balance': balance,
-                'ngos': NGO.objects.all()  # For donation form
-            })
-            
-        elif custom_user.user_type == 'ngo':
-            ngo = NGO.objects.get(user=user)
-            donations = Donation.objects.filter(ngo=ngo).order_by('-timestamp')[:10]
-            distributions = Distribution.objects.filter(ngo=ngo).order_by('-timestamp')[:10]
-            
-            # Get wallet balance
-            try:
-                balance = hedera_service.get_account_balance(ngo.wallet_id)
-            except:
-                balance = {'hbar_balance': '0', 'token_balances': []}
-            
-            context.update({
-                'profile': ngo,
-                'donations': donations,
-                'distributions': distributions,
-                'user_type': 'ngo',
-                'balance': balance,
-                'recipients': Recipient.objects.all()  # For distribution form
-            })
-        
+        context = dashboard.load_user_dashboard(request.user)
     except (CustomUser.DoesNotExist, Donor.DoesNotExist, NGO.DoesNotExist):
         messages.error(request, 'User profile not found.')
         return redirect('logout')
     
+    profile = context.get('profile')
+    if profile is not None:
+        # Get wallet balance
+        try:
+            context['balance'] = hedera_service.get_account_balance(profile.wallet_id)
+        except:
+            context['balance'] = {'hbar_balance': '0', 'token_balances': []}
+    
     return render(request, 'user_dashboard.html', context)
 
 
@@ -353,34 +859,18 @@ def make_donation_view(request):
             ngo = NGO.objects.get(id=ngo_id)
             
             # Create donation directly instead of API call
-            with transaction.atomic():
+            try:
                 # Log to Hedera HCS
                 txn_hash = hedera_service.log_donation_to_hcs(
                     donor.name, ngo.name, float(amount)
                 )
-                
-                # Create donation record
-                donation = Donation.objects.create(
-                    donor=donor,
-                    ngo=ngo,
-                    amount=amount,
-                    txn_hash=txn_hash,
-                    status='confirmed'
-                )
-                
-                # Update donor and NGO totals
-                donor.total_donated += Decimal(amount)
-                donor.save()
-                
-                ngo.total_received += Decimal(amount)
-                ngo.save()
-                
-                # Update statistics
-                stats, created = AidLedgerStats.objects.get_or_create(
-                    defaults={'total_donations': 0, 'total_distributions': 0}
-                )
-                stats.total_donations += Decimal(amount)
-                stats.save()
+            except CircuitOpen:
+                ledger.queue_donation(donor, ngo, Decimal(amount))
+                messages.warning(request, f'Hedera is unavailable; your donation of {amount} AID to {ngo.name} is queued.')
+                return redirect('user_dashboard')
+            
+            # Create donation record and update totals
+            ledger.record_donation(donor, ngo, Decimal(amount), txn_hash)
             
             messages.success(request, f'Successfully donated {amount} AID to {ngo.name}!')
             return redirect('user_dashboard')
@@ -388,8 +878,7 @@ def make_donation_view(request):
         except Exception as e:
             messages.error(request, f'Error: {str(e)}')
     
-    ngos = NGO.objects.all()
-    return render(request, 'make_donation.html', {'ngos': ngos})
+    return render(request, 'make_donation.html')
 
 
 @login_required
@@ -408,27 +897,18 @@ def make_distribution_view(request):
             recipient = Recipient.objects.get(id=recipient_id)
             
             # Create distribution directly
-            with transaction.atomic():
+            try:
                 # Log to Hedera HCS
                 txn_hash = hedera_service.log_distribution_to_hcs(
                     ngo.name, recipient.name, float(amount)
                 )
-                
-                # Create distribution record
-                distribution = Distribution.objects.create(
-                    ngo=ngo,
-                    recipient=recipient,
-                    amount=amount,
-                    txn_hash=txn_hash,
-                    status='confirmed'
-                )
-                
-                # Update statistics
-                stats, created = AidLedgerStats.objects.get_or_create(
-                    defaults={'total_donations': 0, 'total_distributions': 0}
-                )
-                stats.total_distributions += Decimal(amount)
-                stats.save()
+            except CircuitOpen:
+                ledger.queue_distribution(ngo, recipient, Decimal(amount))
+                messages.warning(request, f'Hedera is unavailable; your distribution of {amount} AID to {recipient.name} is queued.')
+                return redirect('user_dashboard')
+            
+            # Create distribution record and update statistics
+            ledger.record_distribution(ngo, recipient, Decimal(amount), txn_hash)
             
             messages.success(request, f'Successfully distributed {amount} AID to {recipient.name}!')
             return redirect('user_dashboard')
@@ -436,18 +916,42 @@ def make_distribution_view(request):
         except Exception as e:
             messages.error(request, f'Error: {str(e)}')
     
-    recipients = Recipient.objects.all()
-    return render(request, 'make_distribution.html', {'recipients': recipients})
+    return render(request, 'make_distribution.html')
 
 
+@condition(etag_func=caching.dashboard_etag, last_modified_func=caching.dashboard_last_modified)
 def dashboard_view(request):
-    """Main public dashboard view"""
+    """
+    Main public dashboard view. Fragments are refilled from the primary: a
+    lagging replica's snapshot would be cached under the fresh validators a
+    write has just set.
+    """
+    anonymous = not request.user.is_authenticated
+    cacheable = anonymous and not len(messages.get_messages(request))
+    
+    if cacheable:
+        page_key = caching.dashboard_page_key(request)
+        content = cache.get(page_key)
+        if content is not None:
+            response = HttpResponse(content)
+            patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+            return response
+    
     context = {
-        'donations': Donation.objects.all().order_by('-timestamp')[:10],
-        'distributions': Distribution.objects.all().order_by('-timestamp')[:10],
-        'stats': AidLedgerStats.objects.first()
+        'donations': caching.recent_donations(),
+        'distributions': caching.recent_distributions(),
+        'stats': caching.dashboard_stats(),
+        'live_stream': streaming.supported(request)
     }
-    return render(request, 'dashboard.html', context)
+    response = render(request, 'dashboard.html', context)
+    
+    if cacheable:
+        cache.set(page_key, response.content, caching.dashboard_timeout())
+    if anonymous:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
 
 
 @login_required
@@ -0,0 +1,152 @@
+"""
+Process-local wallet_id -> entity index for AidLedger
+Maps Hedera account ids back to the Donor, NGO or Recipient holding them
+through a bounded LRU kept by each worker, so code walking many accounts
+(Mirror Node transfers, balances) resolves them in memory. Accounts that
+belong to nobody are remembered as well. Saving or deleting any of those
+models bumps a version stamp kept as a ResourceVersion row, so every process
+sees it; a worker that reads a new stamp, one query per lookup batch,
+empties its index. Each worker warms the index with the newest entities on
+its first lookup, the earliest point it may touch the database.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from django.conf import settings
+
+from . import caching
+from .models import Donor, NGO, Recipient
+
+logger = logging.getLogger(__name__)
+
+VERSION_RESOURCE = 'wallets'
+
+# Resolution order when one account id appears in more than one table
+OWNER_MODELS = [('donor', Donor), ('ngo', NGO), ('recipient', Recipient)]
+
+
+class WalletOwner(NamedTuple):
+    type: str
+    id: int
+    name: str
+
+
+def max_size() -> int:
+    return getattr(settings, 'WALLET_INDEX_SIZE', 50000)
+
+
+def prewarm() -> bool:
+    return getattr(settings, 'WALLET_INDEX_PREWARM', True)
+
+
+class WalletIndex:
+    """LRU of wallet_id -> WalletOwner (None for unknown accounts), safe to share between threads"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._warmed = False
+
+    def _check_version(self) -> None:
+        version = caching.resource_versions([VERSION_RESOURCE])[VERSION_RESOURCE]
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self._entries.clear()
+                    logger.debug(f"Wallet index dropped for version {version}")
+                self._version = version
+
+    def _put(self, wallet_id: str, owner: Optional[WalletOwner]) -> None:
+        self._entries[wallet_id] = owner
+        self._entries.move_to_end(wallet_id)
+        while len(self._entries) > max_size():
+            self._entries.popitem(last=False)
+
+    def warm(self) -> int:
+        """Load the newest entities of each type, up to a third of the index each; returns entries loaded"""
+        share = max(max_size() // len(OWNER_MODELS), 1)
+        loaded = []
+        for kind, model in OWNER_MODELS:
+            rows = model.objects.order_by('-created_at').values_list('wallet_id', 'id', 'name')[:share]
+            loaded += [(wallet_id, WalletOwner(kind, pk, name)) for wallet_id, pk, name in rows]
+        with self._lock:
+            # Oldest first, so the newest entities end up most recently used
+            for wallet_id, owner in reversed(loaded):
+                self._entries.setdefault(wallet_id, owner)
+            self._warmed = True
+        logger.info(f"Warmed wallet index with {len(loaded)} accounts")
+        return len(loaded)
+
+    def resolve_many(self, wallet_ids: Iterable[str]) -> Dict[str, Optional[WalletOwner]]:
+        """Owner of each account id, looking the unknown ones up with one query per entity type"""
+        wallet_ids = set(wallet_ids)
+        self._check_version()
+        if not self._warmed and prewarm():
+            self.warm()
+
+        found = {}
+        with self._lock:
+            for wallet_id in wallet_ids:
+                if wallet_id in self._entries:
+                    self._entries.move_to_end(wallet_id)
+                    found[wallet_id] = self._entries[wallet_id]
+        missing = wallet_ids - found.keys()
+
+        fetched = {}
+        for kind, model in OWNER_MODELS:
+            if len(fetched) == len(missing):
+                break
+            rows = model.objects.filter(wallet_id__in=missing - fetched.keys()).values_list('wallet_id', 'id', 'name')
+            fetched.update((wallet_id, WalletOwner(kind, pk, name)) for wallet_id, pk, name in rows)
+
+        with self._lock:
+            for wallet_id in missing:
+                found[wallet_id] = fetched.get(wallet_id)
+                self._put(wallet_id, found[wallet_id])
+        return found
+
+    def resolve(self, wallet_id: str) -> Optional[WalletOwner]:
+        return self.resolve_many([wallet_id])[wallet_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+            self._warmed = False
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def bump_version() -> None:
+    """Invalidate every worker's index; called after Donor/NGO/Recipient writes commit"""
+    caching.bump_version(VERSION_RESOURCE)
+
+
+# Module-level singleton shared by every thread of the worker
+wallet_index = WalletIndex()
+
+
+def resolve(wallet_id: str) -> Optional[WalletOwner]:
+    return wallet_index.resolve(wallet_id)
+
+
+def resolve_many(wallet_ids: Iterable[str]) -> Dict[str, Optional[WalletOwner]]:
+    return wallet_index.resolve_many(wallet_ids)
+
+
+def transfer_owners(mirror_result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Known owners of the accounts in a Mirror Node transaction's HBAR and token transfers"""
+    accounts = {
+        transfer['account']
+        for txn in mirror_result.get('transactions') or []
+        for transfer in (txn.get('transfers') or []) + (txn.get('token_transfers') or [])
+        if transfer.get('account')
+    }
+    if not accounts:
+        return {}
+    return {account: owner._asdict() for account, owner in resolve_many(accounts).items() if owner}
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aidledger_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from aidledger_app.streaming import websocket_transactions  # noqa: E402  (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    """Route the live transaction WebSocket to the stream; everything else to Django"""
+    if scope['type'] == 'websocket' and scope['path'].rstrip('/') == '/ws/transactions':
+        await websocket_transactions(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'corsheaders',
     'aidledger_app',
@@ -53,6 +54,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'aidledger_app.replicas.primary_pinning_middleware',
+    'aidledger_app.entities.identity_map_middleware',
 ]
 
 ROOT_URLCONF = 'aidledger_project.urls'
@@ -87,9 +90,64 @@ DATABASES = {
         'PASSWORD': config('DATABASE_PASSWORD', default='password'),
         'HOST': config('DATABASE_HOST', default='localhost'),
         'PORT': config('DATABASE_PORT', default='5432'),
+        'OPTIONS': {
+            # Lower pg_trgm's word-similarity cut-off (default 0.6) so search tolerates typos
+            'options': '-c pg_trgm.word_similarity_threshold=' + config('SEARCH_SIMILARITY_THRESHOLD', default='0.4'),
+        },
+        # Persistent connections, checked before reuse so a dropped one is replaced
+        'CONN_MAX_AGE': config('DATABASE_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Streaming replicas of the primary, as a comma-separated list of hosts that
+# share its name, user, password and port. Read-only views are routed to
+# them by aidledger_app.replicas.ReplicaRouter
+DATABASE_REPLICAS = []
+for index, host in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['aidledger_app.replicas.ReplicaRouter']
+
+# How long a client reads from the primary after its own write, the
+# replication lag beyond which a replica is skipped, and how long a lagging
+# or unreachable replica stays out of rotation before it is tried again
+REPLICA_READ_YOUR_WRITES_SECONDS = config('REPLICA_READ_YOUR_WRITES_SECONDS', default=5, cast=float)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=10, cast=float)
+REPLICA_MARK_SECONDS = config('REPLICA_MARK_SECONDS', default=30, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='aidledger'),
+    }
+}
+
+DASHBOARD_CACHE_SECONDS = config('DASHBOARD_CACHE_SECONDS', default=300, cast=int)
+API_LIST_CACHE_SECONDS = config('API_LIST_CACHE_SECONDS', default=300, cast=int)
+# Per-user dashboard counts; dropped early on the user's own ledger writes
+USER_AGGREGATES_CACHE_SECONDS = config('USER_AGGREGATES_CACHE_SECONDS', default=3600, cast=int)
+
+# Admin changelists show the planner's row estimate instead of COUNT(*) past
+# this many rows; the re-verify action checks at most REVERIFY_MAX_ROWS rows,
+# REVERIFY_CONCURRENCY Mirror Node lookups at a time, and a job still running
+# after REVERIFY_LEASE_SECONDS is taken over by run_reverify_jobs
+ADMIN_EXACT_COUNT_LIMIT = config('ADMIN_EXACT_COUNT_LIMIT', default=100000, cast=int)
+REVERIFY_CONCURRENCY = config('REVERIFY_CONCURRENCY', default=20, cast=int)
+REVERIFY_MAX_ROWS = config('REVERIFY_MAX_ROWS', default=10000, cast=int)
+REVERIFY_LEASE_SECONDS = config('REVERIFY_LEASE_SECONDS', default=600, cast=int)
+
+# Accounts each worker keeps in its wallet_id -> Donor/NGO/Recipient index,
+# and whether the first lookup preloads it with the newest entities
+WALLET_INDEX_SIZE = config('WALLET_INDEX_SIZE', default=50000, cast=int)
+WALLET_INDEX_PREWARM = config('WALLET_INDEX_PREWARM', default=True, cast=bool)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -159,4 +217,68 @@ HEDERA_CONFIG = {
     'CHAIN_ID': config('HEDERA_CHAIN_ID', default=296, cast=int),
     'MAX_TX_FEE': config('MAX_TX_FEE', default=2, cast=int),
     'MAX_QUERY_PAYMENT': config('MAX_QUERY_PAYMENT', default=1, cast=int),
+    'MIRROR_NODE_URL': config('MIRROR_NODE_URL', default='https://testnet.mirrornode.hedera.com'),
 }
+
+# Admission control for Hedera writes (per process): concurrent submissions,
+# how many may wait for a slot, and how long they wait before a 503
+LEDGER_MAX_CONCURRENT_SUBMISSIONS = config('LEDGER_MAX_CONCURRENT_SUBMISSIONS', default=8, cast=int)
+LEDGER_MAX_QUEUED_SUBMISSIONS = config('LEDGER_MAX_QUEUED_SUBMISSIONS', default=16, cast=int)
+LEDGER_QUEUE_TIMEOUT = config('LEDGER_QUEUE_TIMEOUT', default=5, cast=float)
+
+# Circuit breakers per Hedera operation class: trip when at least MIN_CALLS
+# calls in the rolling window fail at FAILURE_RATE or more, then fail fast for
+# OPEN_SECONDS before a health probe; balances are served from cache meanwhile
+HEDERA_BREAKER_WINDOW_SECONDS = config('HEDERA_BREAKER_WINDOW_SECONDS', default=30, cast=int)
+HEDERA_BREAKER_MIN_CALLS = config('HEDERA_BREAKER_MIN_CALLS', default=10, cast=int)
+HEDERA_BREAKER_FAILURE_RATE = config('HEDERA_BREAKER_FAILURE_RATE', default=0.5, cast=float)
+HEDERA_BREAKER_OPEN_SECONDS = config('HEDERA_BREAKER_OPEN_SECONDS', default=15, cast=float)
+HEDERA_BALANCE_CACHE_SECONDS = config('HEDERA_BALANCE_CACHE_SECONDS', default=86400, cast=int)
+
+# Pre-provisioned account pool for registration: refill below LOW_WATER up to
+# TARGET accounts, each funded with INITIAL_BALANCE_HBAR. Private keys are
+# encrypted with WALLET_ENCRYPTION_KEY (a Fernet key; derived from SECRET_KEY if unset)
+ACCOUNT_POOL_LOW_WATER = config('ACCOUNT_POOL_LOW_WATER', default=20, cast=int)
+ACCOUNT_POOL_TARGET = config('ACCOUNT_POOL_TARGET', default=50, cast=int)
+ACCOUNT_INITIAL_BALANCE_HBAR = config('ACCOUNT_INITIAL_BALANCE_HBAR', default=1, cast=float)
+WALLET_ENCRYPTION_KEY = config('WALLET_ENCRYPTION_KEY', default='')
+
+# Parallel TransferTransactions when paying many recipients at once
+HEDERA_BATCH_TRANSFER_WORKERS = config('HEDERA_BATCH_TRANSFER_WORKERS', default=4, cast=int)
+
+# Bulk write paths: most rows one distribution request may carry, and rows
+# anchored per HCS batch message
+DISTRIBUTION_BATCH_LIMIT = config('DISTRIBUTION_BATCH_LIMIT', default=5000, cast=int)
+LEDGER_BATCH_ANCHOR_SIZE = config('LEDGER_BATCH_ANCHOR_SIZE', default=250, cast=int)
+
+# Recurring donation scheduler: schedules claimed per chunk, runs charged per
+# pass (the rest wait for the next pass), and how many missed runs per schedule
+# are still charged after downtime; older ones are skipped
+RECURRING_CHUNK_SIZE = config('RECURRING_CHUNK_SIZE', default=250, cast=int)
+RECURRING_MAX_PER_PASS = config('RECURRING_MAX_PER_PASS', default=5000, cast=int)
+RECURRING_MAX_CATCH_UP = config('RECURRING_MAX_CATCH_UP', default=3, cast=int)
+
+# Donation and Distribution are partitioned by month: partitions kept ready
+# ahead of the current month, and how old a month gets before it is moved
+# to compressed files under LEDGER_ARCHIVE_DIR
+PARTITION_MONTHS_AHEAD = config('PARTITION_MONTHS_AHEAD', default=3, cast=int)
+ARCHIVE_AFTER_MONTHS = config('ARCHIVE_AFTER_MONTHS', default=24, cast=int)
+LEDGER_ARCHIVE_DIR = config('LEDGER_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+# Most archived rows appended to an entity's history in list responses
+ARCHIVE_HISTORY_LIMIT = config('ARCHIVE_HISTORY_LIMIT', default=1000, cast=int)
+
+# Seconds the async endpoints wait for a submitted message to reach consensus
+LEDGER_CONSENSUS_TIMEOUT = config('LEDGER_CONSENSUS_TIMEOUT', default=30, cast=int)
+
+# Live transaction stream: how often each process checks for events committed
+# by other workers, and how long an idle stream waits before a keep-alive
+STREAM_POLL_SECONDS = config('STREAM_POLL_SECONDS', default=2, cast=float)
+STREAM_HEARTBEAT_SECONDS = config('STREAM_HEARTBEAT_SECONDS', default=15, cast=float)
+
+# Idempotency-Key handling on donate/distribute: how long a duplicate waits
+# for the original request, how long stored responses are replayed, and how
+# long a claim may stay processing before it is treated as abandoned (keep
+# this well above the slowest request, consensus wait included)
+IDEMPOTENCY_WAIT_SECONDS = config('IDEMPOTENCY_WAIT_SECONDS', default=30, cast=float)
+IDEMPOTENCY_KEY_TTL_HOURS = config('IDEMPOTENCY_KEY_TTL_HOURS', default=24, cast=int)
+IDEMPOTENCY_LEASE_SECONDS = config('IDEMPOTENCY_LEASE_SECONDS', default=300, cast=int)
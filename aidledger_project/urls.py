@@ -19,6 +19,7 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('aidledger_app.urls')),
+    # The app's API routes already carry their api/ prefix; mounting the app a
+    # second time under api/ would shadow them and break reverse()
     path('', include('aidledger_app.urls')),
 ]